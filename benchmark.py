@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ benchmark.py - MEDICIÓN DE RENDIMIENTO DEL SISTEMA
+=====================================================
+
+Genera inventarios sintéticos de 1k / 10k / 100k / 1M movimientos en una
+carpeta temporal (nunca toca datos/ de producción) y mide cada punto de
+entrada público:
+
+- ExcelManager: guardar_material, exportar_excel_materiales,
+  obtener_stock_materiales, obtener_ultimos_movimientos
+- GraphicsGenerator: generar_grafica_cemento / _combustibles / _stock_materiales
+  (perfil "print"; cemento también con el perfil "telegram")
+- PDFCreator: generar_pdf_materiales / generar_pdf_combustibles
+
+Las operaciones "frio" parten sin cachés (como después de reiniciar el bot
+o de una edición externa del Excel); las "cache" repiten la consulta con
+las cachés llenas.
+
+Resultados en JSON (resultados_benchmark.json) y comparación contra los
+umbrales de umbrales_benchmark.json: si una mediana supera su umbral el
+script termina con código 1.
+
+USO:
+    python benchmark.py
+    python benchmark.py --tamanos 1000,10000 --repeticiones 5
+    python benchmark.py --salida resultados.json --umbrales umbrales_benchmark.json
+"""
+
+import os
+import sys
+import io
+import json
+import math
+import time
+import random
+import warnings
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import contextlib
+from datetime import datetime, timedelta
+from functools import partial
+
+DIRECTORIO_PROYECTO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, DIRECTORIO_PROYECTO)
+
+import openpyxl
+
+from modules.config import (ARCHIVO_EXCEL_MATERIALES, ARCHIVO_LIBRO_STOCK, ARCHIVO_CONSUMO_DIARIO,
+                            MATERIALES_VALIDOS, DIRECTORIO_CACHE_GRAFICAS, DIRECTORIO_CACHE_REPORTES)
+from modules.excel_manager import ExcelManager
+from modules.graphics_generator import GraphicsGenerator
+from modules.pdf_creator import PDFCreator
+from modules.cache_movimientos import CacheMovimientos
+from modules.libro_stock import LibroStock
+from modules.consumo_diario import ConsumoDiario
+from modules.tabla_movimientos import MovimientosTable
+
+TAMANOS_BENCHMARK = [1000, 10000, 100000, 1000000]
+REPETICIONES_BENCHMARK = 3
+REGISTROS_POR_GUARDADO = 100      # guardar_material se mide por lotes de este tamaño
+DIAS_SINTETICOS = 90              # Los movimientos se reparten en estos días
+SEMILLA = 20250601
+
+ARCHIVO_RESULTADOS = "resultados_benchmark.json"
+ARCHIVO_UMBRALES = os.path.join(DIRECTORIO_PROYECTO, "umbrales_benchmark.json")
+IMAGENES_PDF = ["encabezado_tupiza.png", "pie_tupiza.png"]
+
+# ============================================================================
+# DATOS SINTÉTICOS
+# ============================================================================
+
+def generar_inventario_sintetico(archivo, cantidad, semilla=SEMILLA):
+    """Escribe un Excel de materiales con la misma estructura que ExcelManager
+
+    Usa el modo write_only de openpyxl para poder generar 1M de filas.
+    """
+    aleatorio = random.Random(semilla)
+    inicio = datetime(2025, 1, 1)
+
+    libro = openpyxl.Workbook(write_only=True)
+    hoja = libro.create_sheet("Inventario Materiales")
+    hoja.append(["INVENTARIO DE MATERIALES - PLANTA PREMOLDEADOS TUPIZA"])
+    hoja.append([])
+    hoja.append([])
+    hoja.append(["Fecha", "Hora", "Material", "Proveedor/Destino", "Tipo Movimiento", "Cantidad", "Observaciones"])
+
+    for i in range(cantidad):
+        dia = inicio + timedelta(days=i * DIAS_SINTETICOS // cantidad)
+        tipo = "📈 Entrada" if aleatorio.random() < 0.6 else "📉 Salida"
+        hoja.append([
+            dia.strftime("%d/%m/%Y"),
+            f"{8 + i % 10:02d}:{i % 60:02d}:00",
+            aleatorio.choice(MATERIALES_VALIDOS),
+            "Proveedor Benchmark",
+            tipo,
+            float(aleatorio.randint(1, 200)),
+            f"Movimiento sintético {i}"
+        ])
+
+    libro.save(archivo)
+
+
+def reiniciar_caches():
+    """Deja el proceso como recién iniciado (sin cachés de datos)"""
+    CacheMovimientos.invalidar()
+    LibroStock._libro = None
+    LibroStock._version_archivo = None
+    ConsumoDiario._acumulado = None
+    ConsumoDiario._version_archivo = None
+    MovimientosTable._ultima = (None, None)
+
+
+def vaciar_cache_graficas():
+    shutil.rmtree(DIRECTORIO_CACHE_GRAFICAS, ignore_errors=True)
+
+
+def vaciar_cache_reportes():
+    shutil.rmtree(DIRECTORIO_CACHE_REPORTES, ignore_errors=True)
+
+# ============================================================================
+# MEDICIÓN
+# ============================================================================
+
+def medir(funcion, repeticiones, preparar=None, silencioso=True):
+    """Ejecuta funcion() varias veces y retorna la lista de duraciones en segundos"""
+    duraciones = []
+    for _ in range(repeticiones):
+        salida = io.StringIO() if silencioso else sys.stdout
+        with contextlib.redirect_stdout(salida), warnings.catch_warnings():
+            if silencioso:
+                warnings.simplefilter("ignore")
+            if preparar:
+                preparar()
+            inicio = time.perf_counter()
+            funcion()
+            duraciones.append(time.perf_counter() - inicio)
+    return duraciones
+
+
+def guardar_lote():
+    """Registra REGISTROS_POR_GUARDADO movimientos con guardar_material"""
+    fecha = datetime.now().strftime("%d/%m/%Y")
+    hora = datetime.now().strftime("%H:%M:%S")
+    for i in range(REGISTROS_POR_GUARDADO):
+        tipo = "📈 Entrada" if i % 2 == 0 else "📉 Salida"
+        ExcelManager.guardar_material(fecha, hora, "Cemento", "Benchmark", tipo, 5.0, "")
+
+
+def guardar_lote_masivo():
+    """Registra REGISTROS_POR_GUARDADO movimientos con guardar_materiales_lote (incluye exportar)"""
+    fecha = datetime.now().strftime("%d/%m/%Y")
+    hora = datetime.now().strftime("%H:%M:%S")
+    ExcelManager.guardar_materiales_lote(
+        (fecha, hora, "Cemento", "Benchmark", "📈 Entrada" if i % 2 == 0 else "📉 Salida", 5.0, "")
+        for i in range(REGISTROS_POR_GUARDADO)
+    )
+
+
+def operaciones_benchmark():
+    """Lista de (nombre, función, preparación) a medir para cada tamaño"""
+    def preparar_frio():
+        reiniciar_caches()
+
+    def preparar_stock_frio():
+        reiniciar_caches()
+        if os.path.exists(ARCHIVO_LIBRO_STOCK):
+            os.remove(ARCHIVO_LIBRO_STOCK)
+
+    def preparar_guardado():
+        LibroStock.actualizar()
+        ConsumoDiario.actualizar()
+
+    def preparar_consumo_frio():
+        reiniciar_caches()
+        if os.path.exists(ARCHIVO_CONSUMO_DIARIO):
+            os.remove(ARCHIVO_CONSUMO_DIARIO)
+
+    def preparar_grafica_fria():
+        reiniciar_caches()
+        vaciar_cache_graficas()
+
+    def preparar_pdf_frio():
+        reiniciar_caches()
+        vaciar_cache_reportes()
+
+    return [
+        ("guardar_material", guardar_lote, preparar_guardado),
+        ("guardar_materiales_lote", guardar_lote_masivo, preparar_guardado),
+        ("exportar_excel_materiales", ExcelManager.exportar_excel_materiales, guardar_lote),
+        ("obtener_stock_materiales:frio", ExcelManager.obtener_stock_materiales, preparar_stock_frio),
+        ("obtener_stock_materiales:cache", ExcelManager.obtener_stock_materiales, None),
+        ("obtener_ultimos_movimientos:frio", ExcelManager.obtener_ultimos_movimientos, preparar_frio),
+        ("obtener_ultimos_movimientos:cache", ExcelManager.obtener_ultimos_movimientos, None),
+        ("obtener_datos_cemento:reconstruir", GraphicsGenerator.obtener_datos_cemento, preparar_consumo_frio),
+        ("obtener_datos_cemento:cache", GraphicsGenerator.obtener_datos_cemento, None),
+        ("generar_grafica_cemento:frio", GraphicsGenerator.generar_grafica_cemento, preparar_grafica_fria),
+        ("generar_grafica_cemento:cache", GraphicsGenerator.generar_grafica_cemento, None),
+        ("generar_grafica_cemento:telegram", partial(GraphicsGenerator.generar_grafica_cemento, "telegram"),
+         preparar_grafica_fria),
+        ("generar_grafica_combustibles:frio", GraphicsGenerator.generar_grafica_combustibles, preparar_grafica_fria),
+        ("generar_grafica_stock_materiales:frio", GraphicsGenerator.generar_grafica_stock_materiales, preparar_grafica_fria),
+        ("generar_pdf_materiales:frio", PDFCreator.generar_pdf_materiales, preparar_pdf_frio),
+        ("generar_pdf_materiales:cache", PDFCreator.generar_pdf_materiales, None),
+        ("generar_pdf_combustibles:frio", PDFCreator.generar_pdf_combustibles, preparar_pdf_frio),
+        ("generar_pdf_combustibles:cache", PDFCreator.generar_pdf_combustibles, None),
+    ]
+
+
+def ejecutar_tamano(cantidad, repeticiones, silencioso=True):
+    """Mide todas las operaciones sobre un inventario sintético de `cantidad` movimientos"""
+    directorio_original = os.getcwd()
+    temporal = tempfile.mkdtemp(prefix=f"benchmark_{cantidad}_")
+    resultados = []
+
+    try:
+        os.chdir(temporal)
+        os.makedirs(os.path.dirname(ARCHIVO_EXCEL_MATERIALES), exist_ok=True)
+        for imagen in IMAGENES_PDF:
+            origen = os.path.join(DIRECTORIO_PROYECTO, imagen)
+            if os.path.exists(origen):
+                shutil.copy(origen, imagen)
+
+        print(f"\n📦 Generando inventario sintético de {cantidad:,} movimientos...")
+        inicio = time.perf_counter()
+        generar_inventario_sintetico(ARCHIVO_EXCEL_MATERIALES, cantidad)
+        print(f"   ✅ Listo en {time.perf_counter() - inicio:.1f} s ({os.path.getsize(ARCHIVO_EXCEL_MATERIALES) / 1e6:.1f} MB)")
+        reiniciar_caches()
+
+        for nombre, funcion, preparar in operaciones_benchmark():
+            duraciones = medir(funcion, repeticiones, preparar, silencioso)
+            if nombre in ("guardar_material", "guardar_materiales_lote"):
+                duraciones = [d / REGISTROS_POR_GUARDADO for d in duraciones]
+            resultado = {
+                "operacion": nombre,
+                "movimientos": cantidad,
+                "repeticiones": repeticiones,
+                "min_s": min(duraciones),
+                "mediana_s": statistics.median(duraciones),
+                "max_s": max(duraciones),
+            }
+            resultados.append(resultado)
+            print(f"   ⏱️ {nombre:<40} {resultado['mediana_s']:>10.4f} s")
+    finally:
+        os.chdir(directorio_original)
+        reiniciar_caches()
+        shutil.rmtree(temporal, ignore_errors=True)
+
+    return resultados
+
+# ============================================================================
+# ESCALAMIENTO Y UMBRALES
+# ============================================================================
+
+def calcular_escalamiento(resultados):
+    """Exponente de crecimiento entre tamaños consecutivos por operación
+
+    Un exponente ~0 es costo constante, ~1 lineal; valores mayores muestran
+    dónde una operación se degrada más rápido que los datos.
+    """
+    por_operacion = {}
+    for resultado in resultados:
+        por_operacion.setdefault(resultado["operacion"], []).append(resultado)
+
+    escalamiento = {}
+    for operacion, filas in por_operacion.items():
+        filas = sorted(filas, key=lambda fila: fila["movimientos"])
+        tramos = []
+        for anterior, siguiente in zip(filas, filas[1:]):
+            if anterior["mediana_s"] > 0 and siguiente["mediana_s"] > 0:
+                exponente = (math.log(siguiente["mediana_s"] / anterior["mediana_s"]) /
+                             math.log(siguiente["movimientos"] / anterior["movimientos"]))
+                tramos.append({"desde": anterior["movimientos"], "hasta": siguiente["movimientos"],
+                               "exponente": round(exponente, 3)})
+        escalamiento[operacion] = tramos
+    return escalamiento
+
+
+def cargar_umbrales(archivo):
+    """Umbrales {operacion: {movimientos: segundos}}; vacío si no existe el archivo"""
+    if not archivo or not os.path.exists(archivo):
+        return {}
+    with open(archivo, 'r', encoding='utf-8') as f:
+        return json.load(f).get("umbrales", {})
+
+
+def verificar_umbrales(resultados, umbrales):
+    """Retorna las mediciones cuya mediana supera su umbral"""
+    regresiones = []
+    for resultado in resultados:
+        umbral = umbrales.get(resultado["operacion"], {}).get(str(resultado["movimientos"]))
+        if umbral is not None and resultado["mediana_s"] > umbral:
+            regresiones.append(dict(resultado, umbral_s=umbral))
+    return regresiones
+
+# ============================================================================
+# PROGRAMA PRINCIPAL
+# ============================================================================
+
+def ejecutar_benchmark(tamanos=TAMANOS_BENCHMARK, repeticiones=REPETICIONES_BENCHMARK,
+                       archivo_salida=ARCHIVO_RESULTADOS, archivo_umbrales=ARCHIVO_UMBRALES,
+                       silencioso=True):
+    """Mide todos los tamaños, guarda el JSON y retorna el informe"""
+    print("⏱️ === BENCHMARK DEL SISTEMA INDUSTRIAL ===")
+    print(f"📊 Tamaños: {', '.join(f'{n:,}' for n in tamanos)} | Repeticiones: {repeticiones}")
+
+    resultados = []
+    for cantidad in tamanos:
+        resultados.extend(ejecutar_tamano(cantidad, repeticiones, silencioso))
+
+    regresiones = verificar_umbrales(resultados, cargar_umbrales(archivo_umbrales))
+    informe = {
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "tamanos": list(tamanos),
+        "repeticiones": repeticiones,
+        "resultados": resultados,
+        "escalamiento": calcular_escalamiento(resultados),
+        "regresiones": regresiones,
+    }
+
+    if archivo_salida:
+        with open(archivo_salida, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Resultados guardados en {archivo_salida}")
+
+    if regresiones:
+        print(f"\n🔥 {len(regresiones)} mediciones superan su umbral:")
+        for regresion in regresiones:
+            print(f"   ❌ {regresion['operacion']} ({regresion['movimientos']:,}): "
+                  f"{regresion['mediana_s']:.4f} s > {regresion['umbral_s']} s")
+    else:
+        print("\n✅ Todas las mediciones dentro de los umbrales")
+
+    return informe
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del Sistema Industrial Unificado")
+    parser.add_argument("--tamanos", default=",".join(str(n) for n in TAMANOS_BENCHMARK),
+                        help="Cantidades de movimientos separadas por comas")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES_BENCHMARK)
+    parser.add_argument("--salida", default=ARCHIVO_RESULTADOS, help="Archivo JSON de resultados")
+    parser.add_argument("--umbrales", default=ARCHIVO_UMBRALES, help="Archivo JSON de umbrales")
+    parser.add_argument("--detalle", action="store_true", help="Mostrar los mensajes de los módulos")
+    argumentos = parser.parse_args()
+
+    tamanos = [int(valor) for valor in argumentos.tamanos.split(",") if valor.strip()]
+    informe = ejecutar_benchmark(tamanos, argumentos.repeticiones, argumentos.salida,
+                                 argumentos.umbrales, silencioso=not argumentos.detalle)
+    sys.exit(1 if informe["regresiones"] else 0)
+
+
+if __name__ == "__main__":
+    main()
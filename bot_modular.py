@@ -21,12 +21,16 @@ Fecha: 2025
 
 import os
 import sys
-import json
+import time
 from datetime import datetime
+
+# Inicio de la importación (para verificar el presupuesto de arranque)
+_inicio_importacion = time.perf_counter()
+
 from telegram.ext import Application, MessageHandler, filters, ContextTypes, CommandHandler
 from telegram import Update, ReplyKeyboardMarkup, KeyboardButton
+from telegram.error import BadRequest
 import logging
-from PIL import Image
 
 # =============================================================================
 # IMPORTAR MÓDULOS DEL SISTEMA
@@ -44,9 +48,25 @@ try:
     # Importar módulos del sistema
     from modules.config import *
     from modules.excel_manager import ExcelManager
-    from modules.graphics_generator import GraphicsGenerator
     from modules.menu_controller import MenuController
-    from modules.pdf_creator import PDFCreator, validar_reportlab
+    from modules.carga_diferida import (ObjetoDiferido, MetodoDiferido, modulo_disponible,
+                                        verificar_presupuesto_importacion)
+    
+    # Gráficas y PDFs se envían por nombre: matplotlib y ReportLab se
+    # importan solo en el proceso trabajador, nunca en el bot
+    GRAFICA_CEMENTO = MetodoDiferido("modules.graphics_generator", "GraphicsGenerator", "generar_grafica_cemento")
+    GRAFICA_COMBUSTIBLES = MetodoDiferido("modules.graphics_generator", "GraphicsGenerator", "generar_grafica_combustibles")
+    GRAFICA_STOCK = MetodoDiferido("modules.graphics_generator", "GraphicsGenerator", "generar_grafica_stock_materiales")
+    PDF_MATERIALES = MetodoDiferido("modules.pdf_creator", "PDFCreator", "generar_pdf_materiales")
+    PDF_FOTOS = MetodoDiferido("modules.pdf_creator", "PDFCreator", "generar_pdf_fotos")
+    CierreDia = ObjetoDiferido("modules.cierre_dia", "CierreDia")
+    from modules.ejecutor_tareas import EjecutorTareas, TareaExcedioTiempo, EjecutorOcupado
+    from modules.estados_conversacion import EstadosConversacion
+    from modules.archivos_telegram import ArchivosTelegram, TIPO_FOTO, TIPO_DOCUMENTO
+    from modules.metricas import Metricas
+    from modules.prerender_graficas import PrerenderGraficas
+    from modules.escritor_movimientos import EscritorMovimientos
+    from modules.almacen_fotos import AlmacenFotos
     
     print("✅ Todos los módulos cargados correctamente")
     
@@ -60,6 +80,12 @@ except ImportError as e:
     print("   - modules/graphics_generator.py")
     print("   - modules/menu_controller.py")
     print("   - modules/pdf_creator.py")
+    print("   - modules/ejecutor_tareas.py")
+    print("   - modules/estados_conversacion.py")
+    print("   - modules/archivos_telegram.py")
+    print("   - modules/carga_diferida.py")
+    print("   - modules/metricas.py")
+    print("   - modules/prerender_graficas.py")
     print("2. Ejecuta desde la carpeta que contiene modules/")
     sys.exit(1)
 
@@ -95,52 +121,24 @@ ESPERANDO_CANTIDAD_PRODUCCION = "esperando_cantidad_produccion"
 ESPERANDO_ACTIVIDAD = "esperando_actividad"
 ESPERANDO_FECHA_REPORTE = "esperando_fecha_reporte"
 
-# Variables globales para estados
-estados_usuario = {}
-estados_produccion = {}
+# Botones del menú que atiende manejar_mensaje (cada uno con su histograma de latencia)
+RAMAS_MENU = frozenset([
+    "📦 Registrar Material", "🔧 Registrar Equipo", "📝 Registrar Actividad",
+    "🏭 Registrar Producción", "📊 Gráfica Cemento", "⛽ Gráfica Combustibles",
+    "📈 Gráfica Stock", "📉 Gráfica Producción", "📋 Reporte Ejecutivo",
+    "📅 Reporte por Fecha", "📸 Reporte con Fotos", "📝 Datos de Ejemplo",
+    "✅ Sí, agregar datos ejemplo", "🔙 Volver al menú", "📋 Estado del Bot", "❌ Cancelar",
+])
+
+# Estados de conversación en memoria (se guardan en disco de forma diferida)
+estados_usuario = EstadosConversacion(ARCHIVO_ESTADOS_USUARIO)
+estados_produccion = EstadosConversacion(ARCHIVO_ESTADOS_PRODUCCION)
 
 # Configuración de logging
 logging.basicConfig(level=logging.WARNING)
 
-# =============================================================================
-# FUNCIONES DE ESTADOS (del bot original)
-# =============================================================================
-
-def cargar_estados_usuario():
-    """Carga estados de usuario desde archivo"""
-    global estados_usuario
-    try:
-        if os.path.exists(ARCHIVO_ESTADOS_USUARIO):
-            with open(ARCHIVO_ESTADOS_USUARIO, 'r', encoding='utf-8') as f:
-                estados_usuario = json.load(f)
-    except:
-        estados_usuario = {}
-
-def guardar_estados_usuario(estados):
-    """Guarda estados de usuario en archivo"""
-    try:
-        with open(ARCHIVO_ESTADOS_USUARIO, 'w', encoding='utf-8') as f:
-            json.dump(estados, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print(f"Error guardando estados usuario: {e}")
-
-def cargar_estados_produccion():
-    """Carga estados de producción desde archivo"""
-    global estados_produccion
-    try:
-        if os.path.exists(ARCHIVO_ESTADOS_PRODUCCION):
-            with open(ARCHIVO_ESTADOS_PRODUCCION, 'r', encoding='utf-8') as f:
-                estados_produccion = json.load(f)
-    except:
-        estados_produccion = {}
-
-def guardar_estados_produccion(estados):
-    """Guarda estados de producción en archivo"""
-    try:
-        with open(ARCHIVO_ESTADOS_PRODUCCION, 'w', encoding='utf-8') as f:
-            json.dump(estados, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print(f"Error guardando estados producción: {e}")
+# Tiempo que tomó importar el bot (se informa al iniciar main)
+_tiempo_importacion = time.perf_counter() - _inicio_importacion
 
 # =============================================================================
 # FUNCIÓN DE CREACIÓN DE CARPETAS
@@ -161,6 +159,20 @@ def crear_carpeta_fotos():
     
     return carpeta_dia
 
+def validar_reportlab():
+    """Indica si ReportLab está instalado (sin importarlo todavía)"""
+    return modulo_disponible("reportlab")
+
+def redimensionar_foto(ruta_completa):
+    """Reduce la foto a 1200x900 como máximo y la guarda en JPEG"""
+    from PIL import Image
+    
+    with Image.open(ruta_completa) as img:
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGB')
+        img.thumbnail((1200, 900), Image.Resampling.LANCZOS)
+        img.save(ruta_completa, 'JPEG', quality=85, optimize=True)
+
 # =============================================================================
 # FUNCIONES DE MENÚS USANDO MenuController
 # =============================================================================
@@ -203,9 +215,8 @@ def agregar_datos_ejemplo():
             (fecha_hoy, hora_actual, "Cemento", "Sistema", "📉 Salida", 15.0, "Producción adoquines"),
         ]
         
-        # Usar ExcelManager para guardar datos
-        for fecha, hora, material, proveedor, tipo, cantidad, obs in datos_materiales:
-            ExcelManager.guardar_material(fecha, hora, material, proveedor, tipo, cantidad, obs)
+        # Usar ExcelManager para guardar todos los datos en un solo lote
+        ExcelManager.guardar_materiales_lote(datos_materiales)
         
         print("✅ Datos de ejemplo agregados exitosamente")
         return True
@@ -214,6 +225,112 @@ def agregar_datos_ejemplo():
         print(f"❌ Error agregando datos de ejemplo: {e}")
         return False
 
+# =============================================================================
+# TAREAS PESADAS FUERA DEL BUCLE DEL BOT (EjecutorTareas)
+# =============================================================================
+
+async def generar_en_proceso(funcion, *args, timeout=TIMEOUT_TAREA_RENDER):
+    """Exporta el diario (en un hilo) y genera la gráfica o PDF en un proceso aparte"""
+    await EjecutorTareas.ejecutar_io(ExcelManager.sincronizar_diario)
+    return await EjecutorTareas.ejecutar_render(funcion, *args, timeout=timeout)
+
+# Dibuja las gráficas del menú en segundo plano tras registrar movimientos
+prerender_graficas = PrerenderGraficas(generar_en_proceso)
+
+# Único escritor de movimientos: agrupa en un lote los registros simultáneos
+escritor_movimientos = EscritorMovimientos()
+
+async def iniciar_tareas_fondo(aplicacion):
+    """Arranca las tareas de segundo plano dentro del bucle del bot"""
+    ExcelManager.suscribir_movimientos(prerender_graficas.notificar)
+    escritor_movimientos.iniciar()
+    prerender_graficas.iniciar()
+
+async def detener_tareas_fondo(aplicacion):
+    """Detiene las tareas de segundo plano antes de cerrar el bucle"""
+    await escritor_movimientos.detener()
+    prerender_graficas.detener()
+
+async def avisar_error_tarea(update: Update, context: ContextTypes.DEFAULT_TYPE, error):
+    """Informa al usuario que una tarea pesada no se pudo completar"""
+    if isinstance(error, TareaExcedioTiempo):
+        texto = ("⏱️ **LA TAREA TARDÓ DEMASIADO**\n\n"
+                 "El proceso se canceló para no bloquear el bot.\n"
+                 "💡 Intenta nuevamente en unos minutos.")
+    elif isinstance(error, EjecutorOcupado):
+        texto = ("⏳ **SISTEMA OCUPADO**\n\n"
+                 "Se están generando otros reportes.\n"
+                 "💡 Intenta nuevamente en unos minutos.")
+    else:
+        print(f"Error en tarea pesada: {error}")
+        texto = f"❌ Error en el sistema modular: {error}"
+    
+    await context.bot.send_message(
+        chat_id=update.message.chat_id,
+        text=texto,
+        reply_markup=crear_menu_principal(),
+        parse_mode='Markdown'
+    )
+
+# =============================================================================
+# ENVÍO DE ARCHIVOS REUTILIZANDO file_id (ArchivosTelegram)
+# =============================================================================
+
+async def _enviar_archivo(context: ContextTypes.DEFAULT_TYPE, tipo, chat_id, ruta, **kwargs):
+    """Envía una foto o documento; si el contenido ya se envió antes usa su file_id"""
+    huella = await EjecutorTareas.ejecutar_io(ArchivosTelegram.calcular_hash, ruta)
+    if tipo == TIPO_FOTO:
+        enviar, campo = context.bot.send_photo, "photo"
+    else:
+        enviar, campo = context.bot.send_document, "document"
+        kwargs.setdefault("filename", os.path.basename(ruta))
+    
+    file_id = ArchivosTelegram.obtener(tipo, huella)
+    if file_id:
+        try:
+            with Metricas.cronometro("plamph_envio_segundos", tipo=tipo, modo="file_id"):
+                return await enviar(chat_id=chat_id, **{campo: file_id}, **kwargs)
+        except BadRequest as e:
+            # file_id vencido o de otro bot: se sube el archivo de nuevo
+            print(f"⚠️ file_id no aceptado, se sube el archivo: {e}")
+            ArchivosTelegram.olvidar(tipo, huella)
+    
+    with open(ruta, 'rb') as archivo:
+        with Metricas.cronometro("plamph_envio_segundos", tipo=tipo, modo="subida"):
+            mensaje = await enviar(chat_id=chat_id, **{campo: archivo}, **kwargs)
+    
+    if tipo == TIPO_FOTO and mensaje.photo:
+        ArchivosTelegram.registrar(tipo, huella, mensaje.photo[-1].file_id)
+    elif tipo == TIPO_DOCUMENTO and mensaje.document:
+        ArchivosTelegram.registrar(tipo, huella, mensaje.document.file_id)
+    return mensaje
+
+async def enviar_foto(context: ContextTypes.DEFAULT_TYPE, chat_id, ruta, **kwargs):
+    """Envía una imagen (gráfica) reutilizando su file_id si no cambió"""
+    return await _enviar_archivo(context, TIPO_FOTO, chat_id, ruta, **kwargs)
+
+async def enviar_documento(context: ContextTypes.DEFAULT_TYPE, chat_id, ruta, **kwargs):
+    """Envía un documento (PDF) reutilizando su file_id si no cambió"""
+    return await _enviar_archivo(context, TIPO_DOCUMENTO, chat_id, ruta, **kwargs)
+
+# =============================================================================
+# EXPORTACIÓN PERIÓDICA DEL DIARIO DE MOVIMIENTOS
+# =============================================================================
+
+async def exportar_diario_job(context: ContextTypes.DEFAULT_TYPE):
+    """Vuelca al Excel los movimientos registrados en el diario"""
+    try:
+        exportados = await EjecutorTareas.ejecutar_io(ExcelManager.exportar_excel_materiales)
+    except Exception as e:
+        print(f"⚠️ Exportación periódica no completada: {e}")
+        return
+    if exportados:
+        print(f"📒 {exportados} movimientos exportados del diario al Excel")
+
+async def exportar_metricas_job(context: ContextTypes.DEFAULT_TYPE):
+    """Escribe el archivo de métricas en formato Prometheus"""
+    Metricas.exportar()
+
 # =============================================================================
 # COMANDO PRINCIPAL /start
 # =============================================================================
@@ -222,16 +339,9 @@ async def comando_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Comando inicial del bot modular"""
     user_id = str(update.message.from_user.id)
     
-    global estados_usuario, estados_produccion
-    
-    # Limpiar estados usando las funciones modulares
-    if user_id in estados_usuario:
-        del estados_usuario[user_id]
-    if user_id in estados_produccion:
-        del estados_produccion[user_id]
-    
-    guardar_estados_usuario(estados_usuario)
-    guardar_estados_produccion(estados_produccion)
+    # Limpiar estados (se guardan en disco de forma diferida)
+    estados_usuario.eliminar(user_id)
+    estados_produccion.eliminar(user_id)
     
     mensaje_bienvenida = f"""🏭 **BOT MODULAR UNIFICADO - PLANTA TUPIZA**
 *Sistema Organizado en Módulos Especializados*
@@ -254,6 +364,7 @@ async def comando_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 • Reporte completo con todas las gráficas
 • Reportes de cualquier fecha específica
 • Reportes fotográficos con imágenes reales
+• /cierre - Todos los reportes y gráficas del turno (zip o pdf)
 
 📝 **REGISTRO DE OPERACIONES:**
 • Materiales, equipos, actividades y producción
@@ -282,21 +393,26 @@ async def generar_grafica_cemento_handler(update: Update, context: ContextTypes.
         text="📊 Generando gráfica de consumo de cemento..."
     )
     
-    archivo_grafica = GraphicsGenerator.generar_grafica_cemento()
+    try:
+        # Si ya está pre-dibujada para los datos actuales se envía sin leer el Excel.
+        # Perfil "telegram": 1280 px de ancho y PNG optimizado (Telegram no muestra más)
+        archivo_grafica = (prerender_graficas.obtener("generar_grafica_cemento") or
+                           await generar_en_proceso(GRAFICA_CEMENTO, "telegram"))
+    except Exception as e:
+        await avisar_error_tarea(update, context, e)
+        return
     
     if archivo_grafica and os.path.exists(archivo_grafica):
         try:
-            with open(archivo_grafica, 'rb') as img_file:
-                await context.bot.send_photo(
-                    chat_id=update.message.chat_id,
-                    photo=img_file,
-                    caption="✅ **GRÁFICA DE CONSUMO DE CEMENTO**\n\n"
-                           "📊 Generada con GraphicsGenerator\n"
-                           "📈 Sistema modular - Módulo de gráficas\n"
-                           "🏭 Planta Municipal de Premoldeados - Tupiza",
-                    parse_mode='Markdown'
-                )
-            os.remove(archivo_grafica)
+            await enviar_foto(
+                context, update.message.chat_id, archivo_grafica,
+                caption="✅ **GRÁFICA DE CONSUMO DE CEMENTO**\n\n"
+                       "📊 Generada con GraphicsGenerator\n"
+                       "📈 Sistema modular - Módulo de gráficas\n"
+                       "🏭 Planta Municipal de Premoldeados - Tupiza",
+                parse_mode='Markdown'
+            )
+            # La gráfica queda en la caché (graficas/cache) para la próxima solicitud
         except Exception as e:
             await context.bot.send_message(
                 chat_id=update.message.chat_id,
@@ -316,36 +432,38 @@ async def generar_grafica_combustibles_handler(update: Update, context: ContextT
         text="⛽ Generando gráfica de combustibles con análisis detallado..."
     )
     
-    archivo_grafica = GraphicsGenerator.generar_grafica_combustibles()
+    try:
+        archivo_grafica = (prerender_graficas.obtener("generar_grafica_combustibles") or
+                           await generar_en_proceso(GRAFICA_COMBUSTIBLES, "telegram"))
+    except Exception as e:
+        await avisar_error_tarea(update, context, e)
+        return
     
     if archivo_grafica and os.path.exists(archivo_grafica):
         try:
             # Obtener información detallada usando ExcelManager
-            info_combustibles = ExcelManager.obtener_datos_combustibles()
+            info_combustibles = await EjecutorTareas.ejecutar_io(ExcelManager.obtener_datos_combustibles)
             
-            with open(archivo_grafica, 'rb') as img_file:
-                mensaje_detallado = "✅ **ANÁLISIS DE COMBUSTIBLES**\n\n"
-                mensaje_detallado += "📊 **Generado con GraphicsGenerator**\n"
-                mensaje_detallado += "📋 **Datos procesados con ExcelManager**\n\n"
-                
-                if info_combustibles:
-                    gasolina = info_combustibles.get('gasolina', 0)
-                    diesel = info_combustibles.get('diesel', 0)
-                    
-                    mensaje_detallado += "⛽ **ESTADO ACTUAL:**\n"
-                    mensaje_detallado += f"• **Gasolina**: {gasolina:.1f} litros\n"
-                    mensaje_detallado += f"• **Diesel**: {diesel:.1f} litros\n\n"
-                
-                mensaje_detallado += "🎯 **Sistema Modular en Funcionamiento**\n"
-                mensaje_detallado += "🏭 Planta Municipal de Premoldeados - Tupiza"
+            mensaje_detallado = "✅ **ANÁLISIS DE COMBUSTIBLES**\n\n"
+            mensaje_detallado += "📊 **Generado con GraphicsGenerator**\n"
+            mensaje_detallado += "📋 **Datos procesados con ExcelManager**\n\n"
+            
+            if info_combustibles:
+                gasolina = info_combustibles.get('gasolina', 0)
+                diesel = info_combustibles.get('diesel', 0)
                 
-                await context.bot.send_photo(
-                    chat_id=update.message.chat_id,
-                    photo=img_file,
-                    caption=mensaje_detallado,
-                    parse_mode='Markdown'
-                )
-            os.remove(archivo_grafica)
+                mensaje_detallado += "⛽ **ESTADO ACTUAL:**\n"
+                mensaje_detallado += f"• **Gasolina**: {gasolina:.1f} litros\n"
+                mensaje_detallado += f"• **Diesel**: {diesel:.1f} litros\n\n"
+            
+            mensaje_detallado += "🎯 **Sistema Modular en Funcionamiento**\n"
+            mensaje_detallado += "🏭 Planta Municipal de Premoldeados - Tupiza"
+            
+            await enviar_foto(
+                context, update.message.chat_id, archivo_grafica,
+                caption=mensaje_detallado,
+                parse_mode='Markdown'
+            )
         except Exception as e:
             await context.bot.send_message(
                 chat_id=update.message.chat_id,
@@ -365,33 +483,35 @@ async def generar_grafica_stock_handler(update: Update, context: ContextTypes.DE
         text="📈 Generando gráfica de stock con GraphicsGenerator..."
     )
     
-    archivo_grafica = GraphicsGenerator.generar_grafica_stock_materiales()
+    try:
+        archivo_grafica = (prerender_graficas.obtener("generar_grafica_stock_materiales") or
+                           await generar_en_proceso(GRAFICA_STOCK, "telegram"))
+    except Exception as e:
+        await avisar_error_tarea(update, context, e)
+        return
     
     if archivo_grafica and os.path.exists(archivo_grafica):
         try:
             # Obtener información de stock usando ExcelManager
-            stock_info = ExcelManager.obtener_stock_materiales()
+            stock_info = await EjecutorTareas.ejecutar_io(ExcelManager.obtener_stock_materiales)
             
-            with open(archivo_grafica, 'rb') as img_file:
-                mensaje_detallado = "✅ **GRÁFICA DE STOCK DE MATERIALES**\n\n"
-                mensaje_detallado += "📊 **Generada con GraphicsGenerator**\n"
-                mensaje_detallado += "📋 **Cálculos realizados con ExcelManager**\n\n"
-                
-                if stock_info:
-                    mensaje_detallado += f"📈 **RESUMEN:**\n"
-                    mensaje_detallado += f"• Total de materiales: {len(stock_info)}\n"
-                    mensaje_detallado += f"• Stock total: {sum(stock_info.values()):.1f} unidades\n\n"
-                
-                mensaje_detallado += "🎯 **Arquitectura Modular Funcionando**\n"
-                mensaje_detallado += "🏭 Planta Municipal de Premoldeados - Tupiza"
-                
-                await context.bot.send_photo(
-                    chat_id=update.message.chat_id,
-                    photo=img_file,
-                    caption=mensaje_detallado,
-                    parse_mode='Markdown'
-                )
-            os.remove(archivo_grafica)
+            mensaje_detallado = "✅ **GRÁFICA DE STOCK DE MATERIALES**\n\n"
+            mensaje_detallado += "📊 **Generada con GraphicsGenerator**\n"
+            mensaje_detallado += "📋 **Cálculos realizados con ExcelManager**\n\n"
+            
+            if stock_info:
+                mensaje_detallado += f"📈 **RESUMEN:**\n"
+                mensaje_detallado += f"• Total de materiales: {len(stock_info)}\n"
+                mensaje_detallado += f"• Stock total: {sum(stock_info.values()):.1f} unidades\n\n"
+            
+            mensaje_detallado += "🎯 **Arquitectura Modular Funcionando**\n"
+            mensaje_detallado += "🏭 Planta Municipal de Premoldeados - Tupiza"
+            
+            await enviar_foto(
+                context, update.message.chat_id, archivo_grafica,
+                caption=mensaje_detallado,
+                parse_mode='Markdown'
+            )
         except Exception as e:
             await context.bot.send_message(
                 chat_id=update.message.chat_id,
@@ -431,12 +551,12 @@ async def generar_reporte_ejecutivo_handler(update: Update, context: ContextType
             return
         
         # Generar PDF usando PDFCreator
-        archivo_pdf = PDFCreator.generar_pdf_materiales()
+        archivo_pdf = await generar_en_proceso(PDF_MATERIALES)
         
         if archivo_pdf and os.path.exists(archivo_pdf):
             # Obtener estadísticas usando ExcelManager
-            total_registros = ExcelManager.contar_registros_materiales()
-            stock_actual = ExcelManager.obtener_stock_materiales()
+            total_registros = await EjecutorTareas.ejecutar_io(ExcelManager.contar_registros_materiales)
+            stock_actual = await EjecutorTareas.ejecutar_io(ExcelManager.obtener_stock_materiales)
             
             mensaje_resultado = "✅ **REPORTE EJECUTIVO GENERADO EXITOSAMENTE**\n\n"
             mensaje_resultado += "🎯 **SISTEMA MODULAR EN ACCIÓN:**\n"
@@ -452,15 +572,13 @@ async def generar_reporte_ejecutivo_handler(update: Update, context: ContextType
             
             mensaje_resultado += "🎯 **ARQUITECTURA MODULAR FUNCIONANDO**"
             
-            with open(archivo_pdf, 'rb') as pdf_file:
-                await context.bot.send_document(
-                    chat_id=update.message.chat_id,
-                    document=pdf_file,
-                    filename=archivo_pdf,
-                    caption=mensaje_resultado,
-                    parse_mode='Markdown'
-                )
-            os.remove(archivo_pdf)
+            await enviar_documento(
+                context, update.message.chat_id, archivo_pdf,
+                caption=mensaje_resultado,
+                parse_mode='Markdown'
+            )
+            # El PDF queda en la caché de reportes: si nadie registra movimientos,
+            # el próximo pedido lo reutiliza (y Telegram lo recibe por file_id)
         else:
             await context.bot.send_message(
                 chat_id=update.message.chat_id,
@@ -471,6 +589,8 @@ async def generar_reporte_ejecutivo_handler(update: Update, context: ContextType
                      "• Problema de permisos de archivos"
             )
             
+    except (TareaExcedioTiempo, EjecutorOcupado) as e:
+        await avisar_error_tarea(update, context, e)
     except Exception as e:
         print(f"Error en reporte ejecutivo: {e}")
         await context.bot.send_message(
@@ -481,6 +601,108 @@ async def generar_reporte_ejecutivo_handler(update: Update, context: ContextType
             parse_mode='Markdown'
         )
 
+async def generar_reporte_fotos_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler para el reporte fotográfico de la última semana"""
+    if not validar_reportlab():
+        await context.bot.send_message(
+            chat_id=update.message.chat_id,
+            text="❌ **PDF NO DISPONIBLE**\n\n"
+                 "ReportLab no está instalado.\n"
+                 "💡 Instala con: pip install reportlab"
+        )
+        return
+    
+    await context.bot.send_message(
+        chat_id=update.message.chat_id,
+        text=f"📸 **GENERANDO REPORTE FOTOGRÁFICO**\n\n"
+             f"⏳ Fotos de los últimos {DIAS_REPORTE_FOTOS} días..."
+    )
+    
+    try:
+        archivo_pdf = await EjecutorTareas.ejecutar_render(PDF_FOTOS)
+        
+        if not archivo_pdf or not os.path.exists(archivo_pdf):
+            await context.bot.send_message(
+                chat_id=update.message.chat_id,
+                text="📸 **SIN FOTOS EN EL PERÍODO**\n\n"
+                     "💡 Envía fotos al bot y aparecerán en el reporte.",
+                reply_markup=crear_menu_principal(),
+                parse_mode='Markdown'
+            )
+        elif os.path.getsize(archivo_pdf) > MAX_MB_DOCUMENTO_TELEGRAM * 1024 * 1024:
+            await context.bot.send_message(
+                chat_id=update.message.chat_id,
+                text=f"⚠️ El reporte supera {MAX_MB_DOCUMENTO_TELEGRAM} MB y Telegram no lo acepta.\n"
+                     f"💡 Genéralo desde la consola: python main_modular.py --fotos [desde] [hasta]"
+            )
+        else:
+            await enviar_documento(
+                context, update.message.chat_id, archivo_pdf,
+                caption=f"📸 **REPORTE FOTOGRÁFICO** - últimos {DIAS_REPORTE_FOTOS} días",
+                parse_mode='Markdown'
+            )
+            
+    except (TareaExcedioTiempo, EjecutorOcupado) as e:
+        await avisar_error_tarea(update, context, e)
+    except Exception as e:
+        print(f"Error en reporte fotográfico: {e}")
+        await context.bot.send_message(
+            chat_id=update.message.chat_id,
+            text=f"❌ Error generando el reporte fotográfico: {e}"
+        )
+
+async def comando_cierre(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Comando /cierre [zip|pdf]: todas las gráficas y reportes del turno en un archivo"""
+    formato = context.args[0].lower() if context.args else FORMATO_CIERRE_DIA
+    if formato not in ("zip", "pdf"):
+        await context.bot.send_message(
+            chat_id=update.message.chat_id,
+            text="💡 Uso: /cierre [zip|pdf]"
+        )
+        return
+    
+    if not validar_reportlab():
+        await context.bot.send_message(
+            chat_id=update.message.chat_id,
+            text="❌ **PDF NO DISPONIBLE**\n\n"
+                 "ReportLab no está instalado.\n"
+                 "💡 Instala con: pip install reportlab"
+        )
+        return
+    
+    await context.bot.send_message(
+        chat_id=update.message.chat_id,
+        text="🌙 **GENERANDO CIERRE DE TURNO**\n\n"
+             "⏳ Reportes de materiales y combustibles y todas las gráficas,\n"
+             "generados en paralelo..."
+    )
+    
+    try:
+        archivo_cierre = await CierreDia.generar_en_ejecutor(formato)
+        
+        if archivo_cierre and os.path.exists(archivo_cierre):
+            await enviar_documento(
+                context, update.message.chat_id, archivo_cierre,
+                caption=f"🌙 **CIERRE DE TURNO** - {datetime.now().strftime('%d/%m/%Y %H:%M')}",
+                parse_mode='Markdown'
+            )
+            os.remove(archivo_cierre)
+        else:
+            await context.bot.send_message(
+                chat_id=update.message.chat_id,
+                text="❌ **NO SE PUDO GENERAR EL CIERRE**\n\n"
+                     "💡 Verifica que haya datos registrados."
+            )
+            
+    except (TareaExcedioTiempo, EjecutorOcupado) as e:
+        await avisar_error_tarea(update, context, e)
+    except Exception as e:
+        print(f"Error en cierre de turno: {e}")
+        await context.bot.send_message(
+            chat_id=update.message.chat_id,
+            text=f"❌ Error generando el cierre: {e}"
+        )
+
 # =============================================================================
 # HANDLERS DE REGISTRO USANDO ExcelManager
 # =============================================================================
@@ -489,7 +711,6 @@ async def registrar_material_handler(update: Update, context: ContextTypes.DEFAU
     """Handler para registrar material usando ExcelManager"""
     user_id = str(update.message.from_user.id)
     estados_usuario[user_id] = {"estado": ESPERANDO_MATERIAL}
-    guardar_estados_usuario(estados_usuario)
     
     await context.bot.send_message(
         chat_id=update.message.chat_id,
@@ -504,7 +725,6 @@ async def registrar_actividad_handler(update: Update, context: ContextTypes.DEFA
     """Handler para registrar actividad usando ExcelManager"""
     user_id = str(update.message.from_user.id)
     estados_usuario[user_id] = {"estado": ESPERANDO_ACTIVIDAD}
-    guardar_estados_usuario(estados_usuario)
     
     await context.bot.send_message(
         chat_id=update.message.chat_id,
@@ -543,15 +763,25 @@ async def agregar_datos_ejemplo_handler(update: Update, context: ContextTypes.DE
 # HANDLER PRINCIPAL DE MENSAJES
 # =============================================================================
 
+def rama_mensaje(mensaje, user_id):
+    """Etiqueta de métricas de la rama de manejar_mensaje que atenderá el mensaje"""
+    if mensaje in RAMAS_MENU:
+        return mensaje
+    if user_id in estados_usuario:
+        return f"estado:{estados_usuario[user_id].get('estado')}"
+    return "mensaje_libre"  # Texto libre: no se usa como etiqueta
+
 async def manejar_mensaje(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handler principal que maneja todos los mensajes usando los módulos"""
+    """Handler principal: atiende el mensaje y mide la latencia de su rama"""
+    rama = rama_mensaje(update.message.text, str(update.message.from_user.id))
+    with Metricas.cronometro("plamph_handler_segundos", rama=rama):
+        await despachar_mensaje(update, context)
+
+async def despachar_mensaje(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja todos los mensajes usando los módulos"""
     mensaje = update.message.text
     user_id = str(update.message.from_user.id)
     
-    # Cargar estados
-    cargar_estados_usuario()
-    cargar_estados_produccion()
-    
     # Comandos del menú principal
     if mensaje == "📦 Registrar Material":
         await registrar_material_handler(update, context)
@@ -602,14 +832,7 @@ async def manejar_mensaje(update: Update, context: ContextTypes.DEFAULT_TYPE):
             parse_mode='Markdown'
         )
     elif mensaje == "📸 Reporte con Fotos":
-        await context.bot.send_message(
-            chat_id=update.message.chat_id,
-            text="📸 **REPORTE FOTOGRÁFICO**\n"
-                 "🎯 *Usando PDFCreator*\n\n"
-                 "Función disponible en el sistema modular.",
-            reply_markup=crear_menu_principal(),
-            parse_mode='Markdown'
-        )
+        await generar_reporte_fotos_handler(update, context)
     elif mensaje == "📝 Datos de Ejemplo":
         await agregar_datos_ejemplo_handler(update, context)
     elif mensaje == "✅ Sí, agregar datos ejemplo":
@@ -618,7 +841,11 @@ async def manejar_mensaje(update: Update, context: ContextTypes.DEFAULT_TYPE):
             text="📝 Agregando datos de ejemplo usando **ExcelManager**..."
         )
         
-        exito = agregar_datos_ejemplo()
+        try:
+            exito = await EjecutorTareas.ejecutar_io(agregar_datos_ejemplo)
+        except Exception as e:
+            print(f"Error agregando datos de ejemplo: {e}")
+            exito = False
         
         if exito:
             await context.bot.send_message(
@@ -689,13 +916,8 @@ async def manejar_mensaje(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
     elif mensaje == "❌ Cancelar":
         # Cancelar cualquier operación en curso
-        if user_id in estados_usuario:
-            del estados_usuario[user_id]
-        if user_id in estados_produccion:
-            del estados_produccion[user_id]
-        
-        guardar_estados_usuario(estados_usuario)
-        guardar_estados_produccion(estados_produccion)
+        estados_usuario.eliminar(user_id)
+        estados_produccion.eliminar(user_id)
         
         await context.bot.send_message(
             chat_id=update.message.chat_id,
@@ -731,7 +953,7 @@ async def procesar_estados_usuario(update: Update, context: ContextTypes.DEFAULT
         if mensaje in MATERIALES:
             estado["material"] = mensaje
             estado["estado"] = ESPERANDO_MOVIMIENTO
-            guardar_estados_usuario(estados_usuario)
+            estados_usuario.marcar_modificado(user_id)
             
             await context.bot.send_message(
                 chat_id=update.message.chat_id,
@@ -751,7 +973,7 @@ async def procesar_estados_usuario(update: Update, context: ContextTypes.DEFAULT
         if mensaje in ["📈 Entrada", "📉 Salida"]:
             estado["movimiento"] = mensaje
             estado["estado"] = ESPERANDO_CANTIDAD
-            guardar_estados_usuario(estados_usuario)
+            estados_usuario.marcar_modificado(user_id)
             
             await context.bot.send_message(
                 chat_id=update.message.chat_id,
@@ -772,7 +994,7 @@ async def procesar_estados_usuario(update: Update, context: ContextTypes.DEFAULT
             cantidad = float(mensaje)
             estado["cantidad"] = cantidad
             estado["estado"] = ESPERANDO_OBSERVACIONES
-            guardar_estados_usuario(estados_usuario)
+            estados_usuario.marcar_modificado(user_id)
             
             await context.bot.send_message(
                 chat_id=update.message.chat_id,
@@ -796,10 +1018,14 @@ async def procesar_estados_usuario(update: Update, context: ContextTypes.DEFAULT
         hora = datetime.now().strftime("%H:%M:%S")
         usuario = update.message.from_user.first_name or "Usuario"
         
-        exito = ExcelManager.guardar_material(
-            fecha, hora, estado["material"], usuario,
-            estado["movimiento"], estado["cantidad"], observaciones
-        )
+        try:
+            exito = await escritor_movimientos.registrar(
+                fecha, hora, estado["material"], usuario,
+                estado["movimiento"], estado["cantidad"], observaciones
+            )
+        except Exception as e:
+            print(f"Error guardando material: {e}")
+            exito = False
         
         if exito:
             mensaje_confirmacion = f"""✅ **MATERIAL REGISTRADO CON ÉXITO**
@@ -830,7 +1056,6 @@ async def procesar_estados_usuario(update: Update, context: ContextTypes.DEFAULT
         
         # Limpiar estado
         del estados_usuario[user_id]
-        guardar_estados_usuario(estados_usuario)
     
     elif estado["estado"] == ESPERANDO_ACTIVIDAD:
         # Guardar actividad usando ExcelManager
@@ -853,7 +1078,6 @@ async def procesar_estados_usuario(update: Update, context: ContextTypes.DEFAULT
         
         # Limpiar estado
         del estados_usuario[user_id]
-        guardar_estados_usuario(estados_usuario)
 
 # =============================================================================
 # HANDLER PARA FOTOS
@@ -880,18 +1104,18 @@ async def manejar_foto(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         await archivo_foto.download_to_drive(ruta_completa)
         
-        # Redimensionar foto para ahorrar espacio
+        # Redimensionar foto para ahorrar espacio (fuera del bucle del bot)
         try:
-            with Image.open(ruta_completa) as img:
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    img = img.convert('RGB')
-                img.thumbnail((1200, 900), Image.Resampling.LANCZOS)
-                img.save(ruta_completa, 'JPEG', quality=85, optimize=True)
+            await EjecutorTareas.ejecutar_io(redimensionar_foto, ruta_completa)
         except Exception as e:
             print(f"Error redimensionando foto: {e}")
         
-        # Aquí se podría usar ExcelManager para guardar el registro de la foto
+        # Copia reducida para el reporte fotográfico y registro en el manifiesto del día
         actividad = update.message.caption or "Foto de actividad de planta"
+        try:
+            await EjecutorTareas.ejecutar_io(AlmacenFotos.registrar, ruta_completa, usuario, actividad, hora)
+        except Exception as e:
+            print(f"Error registrando foto: {e}")
         
         mensaje_confirmacion = f"""📸 **FOTO GUARDADA CON SISTEMA MODULAR**
 
@@ -929,8 +1153,6 @@ async def manejar_foto(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 def main():
     """Función principal del bot modular"""
-    global estados_usuario, estados_produccion
-    
     print("🏭 === BOT MODULAR UNIFICADO - PLANTA TUPIZA ===")
     print(f"🕒 Iniciado: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
     print("✅ ARQUITECTURA MODULAR IMPLEMENTADA:")
@@ -947,6 +1169,9 @@ def main():
     print("🔄 Bot modular funcionando 24/7...")
     print()
     
+    # Matplotlib, ReportLab, PIL y openpyxl no deben cargarse antes de conectar
+    verificar_presupuesto_importacion(_tiempo_importacion)
+    
     # Verificar TOKEN
     if not TOKEN:
         print("❌ CONFIGURA EL TOKEN DEL BOT PRIMERO")
@@ -966,18 +1191,38 @@ def main():
     # Crear carpetas necesarias
     crear_carpeta_fotos()
     
-    # Cargar estados
-    cargar_estados_usuario()
-    cargar_estados_produccion()
+    # Cargar estados (una sola vez; luego viven en memoria)
+    estados_usuario.cargar()
+    estados_produccion.cargar()
     
     # Crear aplicación
-    aplicacion = Application.builder().token(TOKEN).build()
+    aplicacion = (Application.builder().token(TOKEN)
+                  .post_init(iniciar_tareas_fondo)
+                  .post_shutdown(detener_tareas_fondo)
+                  .build())
     
     # Agregar handlers
     aplicacion.add_handler(CommandHandler("start", comando_start))
+    aplicacion.add_handler(CommandHandler("cierre", comando_cierre))
     aplicacion.add_handler(MessageHandler(filters.PHOTO, manejar_foto))
     aplicacion.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, manejar_mensaje))
     
+    # Exportar periódicamente el diario de movimientos al Excel y las métricas
+    # (job_queue es None si falta python-telegram-bot[job-queue])
+    if aplicacion.job_queue:
+        aplicacion.job_queue.run_repeating(
+            exportar_diario_job,
+            interval=INTERVALO_EXPORTACION_EXCEL,
+            first=INTERVALO_EXPORTACION_EXCEL
+        )
+        aplicacion.job_queue.run_repeating(
+            exportar_metricas_job,
+            interval=INTERVALO_METRICAS,
+            first=INTERVALO_METRICAS
+        )
+    else:
+        print("⚠️ JobQueue no disponible - el Excel se actualizará al consultar datos")
+    
     # Mostrar estado final
     print("🎯 === SISTEMA MODULAR LISTO ===")
     print("📊 ExcelManager - Listo para gestionar datos")
@@ -988,6 +1233,13 @@ def main():
     
     # Ejecutar bot
     aplicacion.run_polling(drop_pending_updates=True)
+    
+    # Esperar las tareas en curso, guardar estados y dejar el Excel al día antes de salir
+    EjecutorTareas.cerrar()
+    estados_usuario.cerrar()
+    estados_produccion.cerrar()
+    ExcelManager.exportar_excel_materiales()
+    Metricas.exportar()
 
 if __name__ == "__main__":
     try:
@@ -12,6 +12,8 @@ import os
 import openpyxl
 from datetime import datetime
 
+from modules.bloqueo_archivos import bloqueo_de
+
 def limpiar_datos_falsos():
     """Elimina datos falsos y conserva solo los datos reales del usuario"""
     
@@ -39,100 +41,102 @@ def limpiar_datos_falsos():
     print(f"🔍 Analizando archivo: {archivo_excel}")
     
     try:
-        # Cargar archivo
-        libro = openpyxl.load_workbook(archivo_excel)
-        hoja = libro.active
-        
-        print(f"📊 Filas originales: {hoja.max_row}")
-        
-        # Identificar materiales falsos (datos de ejemplo)
-        materiales_falsos = [
-            "Material_0", "Material_1", "Material_2", "Material_3", "Material_4",
-            "Material_5", "Material_6", "Material_7", "Material_8", "Material_9",
-            "Sistema"  # Usuario "Sistema" también es falso
-        ]
-        
-        # Recopilar filas válidas (datos reales del usuario)
-        filas_validas = []
-        filas_eliminadas = 0
-        
-        # Conservar encabezados (filas 1-4)
-        for row in range(1, 5):
-            fila_datos = []
-            for col in range(1, hoja.max_column + 1):
-                valor = hoja.cell(row=row, column=col).value
-                fila_datos.append(valor)
-            filas_validas.append(fila_datos)
-        
-        # Revisar datos (fila 5 en adelante)
-        for row in range(5, hoja.max_row + 1):
-            material = hoja.cell(row=row, column=3).value  # Columna C - Material
-            usuario = hoja.cell(row=row, column=4).value   # Columna D - Usuario
-            
-            # Verificar si la fila es válida (no es dato falso)
-            es_fila_valida = True
-            
-            # Eliminar si el material es falso
-            if material and any(falso in str(material) for falso in materiales_falsos):
-                es_fila_valida = False
-                print(f"❌ Eliminando material falso: {material}")
-            
-            # Eliminar si el usuario es "Sistema" (datos de ejemplo)
-            if usuario and str(usuario).strip() == "Sistema":
-                es_fila_valida = False
-                print(f"❌ Eliminando registro del usuario 'Sistema': {material}")
-            
-            # Eliminar filas con datos de prueba en observaciones
-            observaciones = hoja.cell(row=row, column=7).value  # Columna G
-            if observaciones and any(texto in str(observaciones).lower() for texto in 
-                                   ["prueba", "test", "ejemplo", "registro", "datos de prueba"]):
-                es_fila_valida = False
-                print(f"❌ Eliminando por observaciones de prueba: {material}")
-            
-            if es_fila_valida:
-                # Conservar esta fila
+        # Nadie más (bot, consola) escribe el Excel mientras se limpia
+        with bloqueo_de(archivo_excel):
+            # Cargar archivo
+            libro = openpyxl.load_workbook(archivo_excel)
+            hoja = libro.active
+        
+            print(f"📊 Filas originales: {hoja.max_row}")
+        
+            # Identificar materiales falsos (datos de ejemplo)
+            materiales_falsos = [
+                "Material_0", "Material_1", "Material_2", "Material_3", "Material_4",
+                "Material_5", "Material_6", "Material_7", "Material_8", "Material_9",
+                "Sistema"  # Usuario "Sistema" también es falso
+            ]
+        
+            # Recopilar filas válidas (datos reales del usuario)
+            filas_validas = []
+            filas_eliminadas = 0
+        
+            # Conservar encabezados (filas 1-4)
+            for row in range(1, 5):
                 fila_datos = []
                 for col in range(1, hoja.max_column + 1):
                     valor = hoja.cell(row=row, column=col).value
                     fila_datos.append(valor)
                 filas_validas.append(fila_datos)
-            else:
-                filas_eliminadas += 1
-        
-        print(f"🧹 Filas eliminadas: {filas_eliminadas}")
-        print(f"✅ Filas conservadas: {len(filas_validas) - 4}")  # -4 por los encabezados
-        
-        # Crear nuevo libro con solo datos válidos
-        nuevo_libro = openpyxl.Workbook()
-        nueva_hoja = nuevo_libro.active
-        nueva_hoja.title = "Inventario Materiales"
         
-        # Escribir filas válidas
-        for row_idx, fila in enumerate(filas_validas, 1):
-            for col_idx, valor in enumerate(fila, 1):
-                nueva_hoja.cell(row=row_idx, column=col_idx, value=valor)
-        
-        # Aplicar formato a encabezados (opcional)
-        if len(filas_validas) >= 4:
-            from openpyxl.styles import Font, PatternFill, Alignment
+            # Revisar datos (fila 5 en adelante)
+            for row in range(5, hoja.max_row + 1):
+                material = hoja.cell(row=row, column=3).value  # Columna C - Material
+                usuario = hoja.cell(row=row, column=4).value   # Columna D - Usuario
             
-            # Formato para encabezados
-            for col in range(1, len(filas_validas[3]) + 1):  # Fila 4 son los encabezados
-                celda = nueva_hoja.cell(row=4, column=col)
-                celda.font = Font(name='Arial', size=12, bold=True, color='FFFFFF')
-                celda.fill = PatternFill(start_color='2E75B6', end_color='2E75B6', fill_type='solid')
-                celda.alignment = Alignment(horizontal='center', vertical='center')
-        
-        # Guardar archivo limpio
-        archivo_backup = archivo_excel.replace('.xlsx', f'_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx')
-        libro.save(archivo_backup)
-        print(f"💾 Respaldo creado: {archivo_backup}")
-        
-        # Guardar archivo limpio
-        nuevo_libro.save(archivo_excel)
-        print(f"✅ Archivo limpio guardado: {archivo_excel}")
+                # Verificar si la fila es válida (no es dato falso)
+                es_fila_valida = True
+            
+                # Eliminar si el material es falso
+                if material and any(falso in str(material) for falso in materiales_falsos):
+                    es_fila_valida = False
+                    print(f"❌ Eliminando material falso: {material}")
+            
+                # Eliminar si el usuario es "Sistema" (datos de ejemplo)
+                if usuario and str(usuario).strip() == "Sistema":
+                    es_fila_valida = False
+                    print(f"❌ Eliminando registro del usuario 'Sistema': {material}")
+            
+                # Eliminar filas con datos de prueba en observaciones
+                observaciones = hoja.cell(row=row, column=7).value  # Columna G
+                if observaciones and any(texto in str(observaciones).lower() for texto in 
+                                       ["prueba", "test", "ejemplo", "registro", "datos de prueba"]):
+                    es_fila_valida = False
+                    print(f"❌ Eliminando por observaciones de prueba: {material}")
+            
+                if es_fila_valida:
+                    # Conservar esta fila
+                    fila_datos = []
+                    for col in range(1, hoja.max_column + 1):
+                        valor = hoja.cell(row=row, column=col).value
+                        fila_datos.append(valor)
+                    filas_validas.append(fila_datos)
+                else:
+                    filas_eliminadas += 1
+        
+            print(f"🧹 Filas eliminadas: {filas_eliminadas}")
+            print(f"✅ Filas conservadas: {len(filas_validas) - 4}")  # -4 por los encabezados
+        
+            # Crear nuevo libro con solo datos válidos
+            nuevo_libro = openpyxl.Workbook()
+            nueva_hoja = nuevo_libro.active
+            nueva_hoja.title = "Inventario Materiales"
+        
+            # Escribir filas válidas
+            for row_idx, fila in enumerate(filas_validas, 1):
+                for col_idx, valor in enumerate(fila, 1):
+                    nueva_hoja.cell(row=row_idx, column=col_idx, value=valor)
+        
+            # Aplicar formato a encabezados (opcional)
+            if len(filas_validas) >= 4:
+                from openpyxl.styles import Font, PatternFill, Alignment
+            
+                # Formato para encabezados
+                for col in range(1, len(filas_validas[3]) + 1):  # Fila 4 son los encabezados
+                    celda = nueva_hoja.cell(row=4, column=col)
+                    celda.font = Font(name='Arial', size=12, bold=True, color='FFFFFF')
+                    celda.fill = PatternFill(start_color='2E75B6', end_color='2E75B6', fill_type='solid')
+                    celda.alignment = Alignment(horizontal='center', vertical='center')
+        
+            # Guardar archivo limpio
+            archivo_backup = archivo_excel.replace('.xlsx', f'_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx')
+            libro.save(archivo_backup)
+            print(f"💾 Respaldo creado: {archivo_backup}")
+        
+            # Guardar archivo limpio
+            nuevo_libro.save(archivo_excel)
+            print(f"✅ Archivo limpio guardado: {archivo_excel}")
         
-        return True
+            return True
         
     except Exception as e:
         print(f"❌ Error procesando archivo: {e}")
@@ -151,20 +155,19 @@ def verificar_resultado():
         return
     
     try:
-        libro = openpyxl.load_workbook(archivo_excel)
-        hoja = libro.active
+        from modules.lector_movimientos import iterar_movimientos
         
-        print(f"📊 Filas totales después de limpiar: {hoja.max_row}")
-        
-        # Analizar materiales restantes
+        # Analizar materiales restantes (lectura en modo streaming)
         materiales_encontrados = {}
         registros_validos = 0
-        
-        for row in range(5, hoja.max_row + 1):
-            material = hoja.cell(row=row, column=3).value
-            movimiento = hoja.cell(row=row, column=5).value
-            cantidad = hoja.cell(row=row, column=6).value
-            usuario = hoja.cell(row=row, column=4).value
+        filas_leidas = 0
+        
+        for mov in iterar_movimientos(archivo_excel):
+            filas_leidas += 1
+            material = mov.material
+            movimiento = mov.tipo
+            cantidad = mov.cantidad
+            usuario = mov.proveedor
             
             if material and movimiento and cantidad:
                 registros_validos += 1
@@ -174,14 +177,12 @@ def verificar_resultado():
                 if material not in materiales_encontrados:
                     materiales_encontrados[material] = 0
                 
-                try:
-                    cantidad_num = float(str(cantidad).replace(",", "."))
-                    if "Entrada" in str(movimiento):
-                        materiales_encontrados[material] += cantidad_num
-                    elif "Salida" in str(movimiento):
-                        materiales_encontrados[material] -= cantidad_num
-                except:
-                    pass
+                if "Entrada" in movimiento:
+                    materiales_encontrados[material] += cantidad
+                elif "Salida" in movimiento:
+                    materiales_encontrados[material] -= cantidad
+        
+        print(f"📊 Filas con datos después de limpiar: {filas_leidas}")
         
         print(f"\n📊 STOCK REAL DESPUÉS DE LA LIMPIEZA:")
         for material, stock in materiales_encontrados.items():
@@ -23,6 +23,7 @@ def verificar_dependencias():
     dependencias = {
         "openpyxl": "Gestión de archivos Excel",
         "matplotlib": "Generación de gráficas", 
+        "numpy": "Cálculos vectorizados de movimientos",
         "reportlab": "Generación de PDFs"
     }
     
@@ -157,11 +158,13 @@ def ejecutar_modo_prueba():
     hora_actual = datetime.now().strftime("%H:%M:%S")
     
     print("📝 Agregando datos de prueba...")
-    ExcelManager.guardar_material(fecha_hoy, hora_actual, "Cemento", "Proveedor Prueba", "📈 Entrada", 100.0, "Datos de prueba")
-    ExcelManager.guardar_material(fecha_hoy, hora_actual, "Gasolina", "Estación Central", "📈 Entrada", 200.0, "Abastecimiento prueba")
-    ExcelManager.guardar_material(fecha_hoy, hora_actual, "Diesel", "Estación Norte", "📈 Entrada", 150.0, "Abastecimiento prueba")
-    ExcelManager.guardar_material(fecha_hoy, hora_actual, "Gasolina", "Maquinaria", "📉 Salida", 25.0, "Consumo diario")
-    ExcelManager.guardar_material(fecha_hoy, hora_actual, "Diesel", "Vehículos", "📉 Salida", 40.0, "Transporte")
+    ExcelManager.guardar_materiales_lote([
+        (fecha_hoy, hora_actual, "Cemento", "Proveedor Prueba", "📈 Entrada", 100.0, "Datos de prueba"),
+        (fecha_hoy, hora_actual, "Gasolina", "Estación Central", "📈 Entrada", 200.0, "Abastecimiento prueba"),
+        (fecha_hoy, hora_actual, "Diesel", "Estación Norte", "📈 Entrada", 150.0, "Abastecimiento prueba"),
+        (fecha_hoy, hora_actual, "Gasolina", "Maquinaria", "📉 Salida", 25.0, "Consumo diario"),
+        (fecha_hoy, hora_actual, "Diesel", "Vehículos", "📉 Salida", 40.0, "Transporte"),
+    ])
     
     print("📈 Probando generación de gráficas...")
     grafica_combustibles = GraphicsGenerator.generar_grafica_combustibles()
@@ -220,8 +223,10 @@ def ejecutar_demo_rapido():
         ("Diesel", "📉 Salida", 60.0, "Vehículos")
     ]
     
-    for material, tipo, cantidad, obs in materiales_ejemplo:
-        ExcelManager.guardar_material(fecha, hora, material, "Demo", tipo, cantidad, obs)
+    ExcelManager.guardar_materiales_lote(
+        (fecha, hora, material, "Demo", tipo, cantidad, obs)
+        for material, tipo, cantidad, obs in materiales_ejemplo
+    )
     
     # 3. Mostrar stock
     print("3️⃣ Stock actual:")
@@ -251,6 +256,104 @@ def ejecutar_demo_rapido():
     print("✅ Sistema funcionando correctamente")
     print("🚀 Usa 'python main_modular.py' para modo interactivo")
 
+def ejecutar_exportacion():
+    """Exporta al Excel los movimientos pendientes del diario"""
+    print("\n📒 === EXPORTAR DIARIO DE MOVIMIENTOS ===")
+    
+    from modules.excel_manager import ExcelManager
+    from modules.config import ARCHIVO_EXCEL_MATERIALES
+    
+    exportados = ExcelManager.exportar_excel_materiales()
+    print(f"✅ {exportados} movimientos exportados a {ARCHIVO_EXCEL_MATERIALES}")
+
+def ejecutar_importacion(archivo):
+    """Importa en un solo lote los movimientos de un CSV o Excel"""
+    print("\n📥 === IMPORTAR MOVIMIENTOS DE MATERIALES ===")
+    
+    from modules.importador_movimientos import ImportadorMovimientos
+    from modules.config import ARCHIVO_EXCEL_MATERIALES
+    
+    resultado = ImportadorMovimientos.importar(archivo)
+    if resultado["errores"]:
+        print(f"❌ No se importó el archivo {archivo}:")
+        for error in resultado["errores"]:
+            print(f"   • {error}")
+        return False
+    
+    print(f"✅ {resultado['importados']} movimientos importados a {ARCHIVO_EXCEL_MATERIALES}")
+    return True
+
+def ejecutar_historial(desde=None, hasta=None):
+    """Genera el PDF con el historial completo de movimientos (o de un período)"""
+    print("\n📚 === HISTORIAL COMPLETO DE MOVIMIENTOS ===")
+    
+    from modules.pdf_creator import PDFCreator
+    
+    ruta = PDFCreator.generar_pdf_historial(desde=desde, hasta=hasta)
+    return ruta is not None
+
+def ejecutar_fotos(desde=None, hasta=None):
+    """Genera el reporte fotográfico del período (por defecto, la última semana)"""
+    print("\n📸 === REPORTE FOTOGRÁFICO ===")
+    
+    from modules.pdf_creator import PDFCreator
+    
+    ruta = PDFCreator.generar_pdf_fotos(desde=desde, hasta=hasta)
+    return ruta is not None
+
+def ejecutar_cierre(formato=None):
+    """Genera en paralelo todas las gráficas y reportes del cierre de turno"""
+    print("\n🌙 === CIERRE DE TURNO ===")
+    
+    from modules.cierre_dia import CierreDia, FORMATOS_CIERRE
+    from modules.config import FORMATO_CIERRE_DIA
+    
+    formato = formato or FORMATO_CIERRE_DIA
+    if formato not in FORMATOS_CIERRE:
+        print(f"❌ Formato no reconocido: {formato} (opciones: {', '.join(FORMATOS_CIERRE)})")
+        return False
+    
+    return CierreDia.generar(formato) is not None
+
+def ejecutar_traza(consulta="cemento"):
+    """Ejecuta una consulta de datos con la traza por fila activa y la muestra"""
+    print(f"\n🔍 === TRAZA DE EXTRACCIÓN: {consulta.upper()} ===")
+    
+    from modules.graphics_generator import GraphicsGenerator
+    from modules.traza import Traza, NIVEL_FILA
+    
+    consultas = {
+        "cemento": GraphicsGenerator.obtener_datos_cemento,
+        "combustibles": GraphicsGenerator.obtener_datos_combustibles
+    }
+    if consulta not in consultas:
+        print(f"❌ Consulta no reconocida: {consulta} (opciones: {', '.join(consultas)})")
+        return
+    
+    with Traza.capturar(NIVEL_FILA) as captura:
+        consultas[consulta]()
+    
+    for evento in captura.eventos:
+        print(f"   {Traza.formatear(evento)}")
+    if captura.descartados:
+        print(f"⚠️ {captura.descartados} eventos más antiguos descartados (búfer lleno)")
+
+def verificar_arranque():
+    """Mide el tiempo de importación del bot y lo compara con el presupuesto
+    
+    Returns:
+        bool: True si el bot importa dentro de PRESUPUESTO_IMPORTACION_S
+              sin cargar módulos pesados
+    """
+    print("\n⚡ === VERIFICACIÓN DE ARRANQUE DEL BOT ===")
+    
+    from modules.carga_diferida import medir_importacion, verificar_presupuesto_importacion
+    
+    segundos, pesados = medir_importacion("bot_modular")
+    if segundos is None:
+        return False
+    return verificar_presupuesto_importacion(segundos, pesados=pesados)
+
 def mostrar_ayuda():
     """Muestra la ayuda del sistema"""
     print("\n📖 === AYUDA DEL SISTEMA ===")
@@ -262,6 +365,13 @@ def mostrar_ayuda():
     print("   --demo           - Ejecutar demostración rápida")
     print("   --info           - Mostrar información del sistema")
     print("   --deps           - Verificar dependencias")
+    print("   --exportar       - Exportar diario de movimientos al Excel")
+    print("   --importar <archivo> - Importar movimientos desde un CSV o Excel")
+    print("   --arranque       - Verificar el tiempo de arranque del bot")
+    print("   --historial [desde] [hasta] - PDF con todos los movimientos (fechas dd/mm/aaaa)")
+    print("   --traza [consulta] - Mostrar las filas usadas (cemento | combustibles)")
+    print("   --cierre [zip|pdf] - Todas las gráficas y reportes del turno en paralelo")
+    print("   --fotos [desde] [hasta] - PDF con las fotos de planta (por defecto, la última semana)")
     print("   --help           - Mostrar esta ayuda")
     print("\nEJEMPLOS:")
     print("   python main_modular.py")
@@ -275,6 +385,9 @@ def main():
     print("🏭 Sistema Industrial Unificado - Planta Premoldeados Tupiza")
     print(f"⏰ Iniciado: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
     
+    from modules.config import asegurar_directorios
+    asegurar_directorios()
+    
     # Procesar argumentos de línea de comandos
     if len(sys.argv) > 1:
         argumento = sys.argv[1].lower()
@@ -285,6 +398,32 @@ def main():
             mostrar_informacion_sistema()
         elif argumento in ['--deps', 'deps', '--dependencies']:
             verificar_dependencias()
+        elif argumento in ['--exportar', 'exportar']:
+            ejecutar_exportacion()
+        elif argumento in ['--importar', 'importar']:
+            if len(sys.argv) < 3:
+                print("❌ Indica el archivo: python main_modular.py --importar movimientos.csv")
+                sys.exit(1)
+            if not ejecutar_importacion(sys.argv[2]):
+                sys.exit(1)
+        elif argumento in ['--historial', 'historial']:
+            desde = sys.argv[2] if len(sys.argv) > 2 else None
+            hasta = sys.argv[3] if len(sys.argv) > 3 else None
+            if not ejecutar_historial(desde, hasta):
+                sys.exit(1)
+        elif argumento in ['--fotos', 'fotos']:
+            desde = sys.argv[2] if len(sys.argv) > 2 else None
+            hasta = sys.argv[3] if len(sys.argv) > 3 else None
+            if not ejecutar_fotos(desde, hasta):
+                sys.exit(1)
+        elif argumento in ['--cierre', 'cierre']:
+            if not ejecutar_cierre(sys.argv[2].lower() if len(sys.argv) > 2 else None):
+                sys.exit(1)
+        elif argumento in ['--traza', 'traza']:
+            ejecutar_traza(sys.argv[2].lower() if len(sys.argv) > 2 else "cemento")
+        elif argumento in ['--arranque', 'arranque']:
+            if not verificar_arranque():
+                sys.exit(1)
         elif argumento in ['--test', 'test']:
             verificar_dependencias()
             ejecutar_modo_prueba()
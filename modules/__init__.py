@@ -9,9 +9,34 @@ Paquete de módulos para la gestión de la Planta de Premoldeados de Tupiza.
 Módulos disponibles:
 - config: Configuraciones del sistema
 - excel_manager: Gestión de archivos Excel
+- diario_movimientos: Diario de movimientos de solo agregar
+- importador_movimientos: Importación masiva de movimientos desde CSV o Excel
+- bloqueo_archivos: Bloqueo de escritura del Excel entre procesos
+- escritor_movimientos: Escritor único de movimientos del bot (cola asyncio)
+- libro_stock: Saldos de stock por material
+- consumo_diario: Consumo acumulado por material y día
+- cache_movimientos: Caché compartida del Excel de materiales
+- lector_movimientos: Lectura en modo streaming del Excel de materiales
+- tabla_movimientos: Tabla columnar (NumPy) de movimientos
+- clasificacion: Índice de clasificación de materiales y movimientos
 - graphics_generator: Generación de gráficas
+- cache_archivos: Base de las cachés en disco de archivos generados
+- cache_graficas: Caché de gráficas por tipo, datos y opciones
+- plantillas_graficas: Plantillas de gráficas reutilizables (matplotlib orientado a objetos)
+- prerender_graficas: Pre-dibujo de las gráficas del menú en segundo plano
 - menu_controller: Control de menús
 - pdf_creator: Generación de reportes PDF
+- pdf_historial: Historial completo de movimientos en PDF (streaming)
+- cache_reportes: Caché de reportes PDF por versión de datos
+- cierre_dia: Reportes y gráficas del cierre de turno en paralelo
+- almacen_fotos: Copias reducidas y manifiesto diario de las fotos de planta
+- pdf_fotos: Reporte fotográfico en PDF con imágenes diferidas
+- ejecutor_tareas: Ejecución de tareas pesadas fuera del bucle del bot
+- estados_conversacion: Estados de conversación en memoria con guardado diferido
+- archivos_telegram: file_id de Telegram por hash de contenido
+- carga_diferida: Carga diferida de módulos pesados y presupuesto de arranque
+- metricas: Métricas de rendimiento en formato Prometheus
+- traza: Traza estructurada de la extracción de datos
 
 Autor: Sistema Industrial Automatizado
 Versión: 1.0
@@ -33,16 +58,39 @@ try:
 except ImportError:
     pass
 
-try:
-    from . import graphics_generator
-except ImportError:
-    pass
+# graphics_generator (matplotlib) y pdf_creator (ReportLab) no se importan
+# aquí: se cargan al primer uso para que el bot arranque rápido
 
 # Lista de módulos exportables
 __all__ = [
     'config',
     'excel_manager', 
+    'diario_movimientos',
+    'importador_movimientos',
+    'bloqueo_archivos',
+    'escritor_movimientos',
+    'libro_stock',
+    'consumo_diario',
+    'cache_movimientos',
+    'lector_movimientos',
+    'tabla_movimientos',
+    'clasificacion',
     'graphics_generator',
+    'cache_archivos',
+    'cache_graficas',
+    'plantillas_graficas',
+    'prerender_graficas',
     'menu_controller',
-    'pdf_creator'
+    'pdf_creator',
+    'pdf_historial',
+    'cache_reportes',
+    'cierre_dia',
+    'almacen_fotos',
+    'pdf_fotos',
+    'ejecutor_tareas',
+    'estados_conversacion',
+    'archivos_telegram',
+    'carga_diferida',
+    'metricas',
+    'traza'
 ]
\ No newline at end of file
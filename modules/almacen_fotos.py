@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📸 modules/almacen_fotos.py - FOTOS DE PLANTA Y SUS COPIAS PARA REPORTES
+=======================================================================
+
+El bot guarda cada foto recibida en fotos_planta/AAAA-MM-DD/ (hasta
+1200x900). Un reporte de una semana o un mes con esas fotos tal cual
+tardaría en armarse y pesaría demasiado para enviarlo por Telegram.
+
+Al recibir la foto, AlmacenFotos.registrar():
+
+- guarda una copia reducida en fotos_planta/AAAA-MM-DD/miniaturas/ con el
+  tamaño con que se imprime en el PDF (LADO_MINIATURA_FOTOS), y
+- anota la foto en fotos_planta/AAAA-MM-DD/manifiesto.json: archivo,
+  copia, hora, usuario, descripción y tamaño de la copia.
+
+El reporte (modules/pdf_fotos.py) lee solo los manifiestos y las copias:
+no abre las fotos originales ni mide imágenes para maquetar. Las fotos
+anteriores a los manifiestos, o copiadas a mano en la carpeta, se
+agregan la primera vez que se pide su día.
+"""
+
+import os
+import json
+from datetime import datetime
+
+from .config import CARPETA_FOTOS, LADO_MINIATURA_FOTOS, CALIDAD_MINIATURA_FOTOS
+from .bloqueo_archivos import bloqueo_de
+
+CARPETA_MINIATURAS = "miniaturas"
+ARCHIVO_MANIFIESTO = "manifiesto.json"
+EXTENSIONES_FOTOS = (".jpg", ".jpeg", ".png")
+FORMATO_DIA = "%Y-%m-%d"
+
+
+def _orden(foto):
+    return (foto["hora"], foto["archivo"])
+
+
+class AlmacenFotos:
+    """Copias reducidas y manifiesto por día de las fotos de planta"""
+
+    # ===============================
+    # RUTAS
+    # ===============================
+
+    @staticmethod
+    def ruta_manifiesto(dia):
+        """Manifiesto de un día ("AAAA-MM-DD")"""
+        return os.path.join(CARPETA_FOTOS, dia, ARCHIVO_MANIFIESTO)
+
+    @staticmethod
+    def ruta_miniatura(dia, foto):
+        """Copia reducida de una foto del manifiesto"""
+        return os.path.join(CARPETA_FOTOS, dia, CARPETA_MINIATURAS, foto["miniatura"])
+
+    # ===============================
+    # MANIFIESTO
+    # ===============================
+
+    @staticmethod
+    def _leer(carpeta_dia):
+        ruta = os.path.join(carpeta_dia, ARCHIVO_MANIFIESTO)
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                return json.load(f).get("fotos", [])
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Manifiesto de fotos ilegible, se rehace: {ruta} ({e})")
+            return []
+
+    @staticmethod
+    def _guardar(carpeta_dia, fotos):
+        """Guarda el manifiesto de forma atómica"""
+        ruta = os.path.join(carpeta_dia, ARCHIVO_MANIFIESTO)
+        temporal = ruta + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({"fotos": fotos}, f, ensure_ascii=False, indent=1)
+        os.replace(temporal, ruta)
+
+    # ===============================
+    # COPIAS REDUCIDAS
+    # ===============================
+
+    @staticmethod
+    def _crear_miniatura(ruta_foto):
+        """Copia reducida de la foto para el PDF
+
+        Returns:
+            tuple: (nombre de la copia, ancho, alto) en píxeles
+        """
+        # PIL se importa al recibir la primera foto, no al iniciar el bot
+        from PIL import Image, ImageOps
+
+        carpeta = os.path.join(os.path.dirname(ruta_foto), CARPETA_MINIATURAS)
+        os.makedirs(carpeta, exist_ok=True)
+        nombre = os.path.splitext(os.path.basename(ruta_foto))[0] + ".jpg"
+        temporal = os.path.join(carpeta, nombre + ".tmp")
+
+        with Image.open(ruta_foto) as original:
+            img = ImageOps.exif_transpose(original)
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            img.thumbnail((LADO_MINIATURA_FOTOS, LADO_MINIATURA_FOTOS), Image.Resampling.LANCZOS)
+            img.save(temporal, 'JPEG', quality=CALIDAD_MINIATURA_FOTOS, optimize=True)
+            ancho, alto = img.size
+
+        os.replace(temporal, os.path.join(carpeta, nombre))
+        return nombre, ancho, alto
+
+    @staticmethod
+    def _entrada(ruta_foto, usuario="", descripcion="", hora=None):
+        """Crea la copia reducida y arma la entrada del manifiesto"""
+        miniatura, ancho, alto = AlmacenFotos._crear_miniatura(ruta_foto)
+        if hora is None:
+            hora = datetime.fromtimestamp(os.path.getmtime(ruta_foto)).strftime("%H:%M:%S")
+        return {
+            "archivo": os.path.basename(ruta_foto),
+            "miniatura": miniatura,
+            "hora": hora,
+            "usuario": usuario,
+            "descripcion": descripcion,
+            "ancho": ancho,
+            "alto": alto,
+        }
+
+    # ===============================
+    # API
+    # ===============================
+
+    @staticmethod
+    def registrar(ruta_foto, usuario="", descripcion="", hora=None):
+        """Crea la copia reducida de una foto recién guardada y la anota en su día
+
+        Args:
+            ruta_foto: Foto dentro de fotos_planta/AAAA-MM-DD/
+            usuario, descripcion: Quién la envió y su leyenda
+            hora: "HH:MM:SS" (por defecto, la de modificación del archivo)
+
+        Returns:
+            dict: Entrada del manifiesto, o None si hubo un error
+        """
+        try:
+            carpeta_dia = os.path.dirname(ruta_foto)
+            entrada = AlmacenFotos._entrada(ruta_foto, usuario, descripcion, hora)
+            with bloqueo_de(os.path.join(carpeta_dia, ARCHIVO_MANIFIESTO)):
+                fotos = [foto for foto in AlmacenFotos._leer(carpeta_dia)
+                         if foto["archivo"] != entrada["archivo"]]
+                fotos.append(entrada)
+                fotos.sort(key=_orden)
+                AlmacenFotos._guardar(carpeta_dia, fotos)
+            return entrada
+
+        except Exception as e:
+            print(f"❌ Error registrando foto {ruta_foto}: {e}")
+            return None
+
+    @staticmethod
+    def dias(desde=None, hasta=None):
+        """Días con carpeta de fotos ("AAAA-MM-DD") dentro del período, en orden
+
+        Args:
+            desde, hasta: Límites "AAAA-MM-DD" inclusive (None: sin límite)
+        """
+        if not os.path.isdir(CARPETA_FOTOS):
+            return []
+
+        dias = []
+        for entrada in os.scandir(CARPETA_FOTOS):
+            if not entrada.is_dir():
+                continue
+            try:
+                datetime.strptime(entrada.name, FORMATO_DIA)
+            except ValueError:
+                continue
+            if (desde is not None and entrada.name < desde) or (hasta is not None and entrada.name > hasta):
+                continue
+            dias.append(entrada.name)
+        return sorted(dias)
+
+    @staticmethod
+    def fotos_del_dia(dia):
+        """Fotos de un día según su manifiesto, en orden de hora
+
+        Agrega al manifiesto las fotos de la carpeta que no estén anotadas
+        (creando su copia reducida) y quita las que ya no existen.
+        """
+        carpeta_dia = os.path.join(CARPETA_FOTOS, dia)
+        if not os.path.isdir(carpeta_dia):
+            return []
+
+        with bloqueo_de(os.path.join(carpeta_dia, ARCHIVO_MANIFIESTO)):
+            fotos = AlmacenFotos._leer(carpeta_dia)
+            en_carpeta = {entrada.name for entrada in os.scandir(carpeta_dia)
+                          if entrada.is_file() and entrada.name.lower().endswith(EXTENSIONES_FOTOS)}
+            vigentes = [foto for foto in fotos
+                        if foto["archivo"] in en_carpeta
+                        and os.path.exists(AlmacenFotos.ruta_miniatura(dia, foto))]
+
+            anotadas = {foto["archivo"] for foto in vigentes}
+            nuevas = []
+            for nombre in sorted(en_carpeta - anotadas):
+                try:
+                    nuevas.append(AlmacenFotos._entrada(os.path.join(carpeta_dia, nombre)))
+                except Exception as e:
+                    print(f"⚠️ Foto omitida {os.path.join(carpeta_dia, nombre)}: {e}")
+
+            if nuevas or len(vigentes) != len(fotos):
+                vigentes = sorted(vigentes + nuevas, key=_orden)
+                AlmacenFotos._guardar(carpeta_dia, vigentes)
+        return vigentes
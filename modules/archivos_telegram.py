@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📮 modules/archivos_telegram.py - FILE_ID DE TELEGRAM POR CONTENIDO
+==================================================================
+
+Telegram asigna un file_id a cada foto o documento que el bot envía. Con
+ese file_id el mismo archivo se puede volver a enviar sin subir los bytes.
+
+Este módulo guarda en ARCHIVO_IDS_TELEGRAM la relación
+SHA-256 del contenido -> file_id, separada por tipo de envío (una foto y
+un documento con el mismo contenido tienen file_id distintos). Si el
+archivo que se va a enviar ya se envió antes, se usa el file_id.
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime
+
+from .config import ARCHIVO_IDS_TELEGRAM, MAX_IDS_TELEGRAM
+
+TIPO_FOTO = "foto"
+TIPO_DOCUMENTO = "documento"
+
+
+class ArchivosTelegram:
+    """Registro persistente de file_id de Telegram por hash de contenido"""
+
+    # Copia en memoria del registro: {"tipo:sha256": {"file_id": ..., "fecha": ...}}
+    _registro = None
+
+    @staticmethod
+    def calcular_hash(ruta):
+        """SHA-256 del contenido del archivo"""
+        suma = hashlib.sha256()
+        with open(ruta, 'rb') as f:
+            for bloque in iter(lambda: f.read(1024 * 1024), b""):
+                suma.update(bloque)
+        return suma.hexdigest()
+
+    @staticmethod
+    def _cargar():
+        if ArchivosTelegram._registro is None:
+            ArchivosTelegram._registro = {}
+            if os.path.exists(ARCHIVO_IDS_TELEGRAM):
+                try:
+                    with open(ARCHIVO_IDS_TELEGRAM, 'r', encoding='utf-8') as f:
+                        ArchivosTelegram._registro = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ Registro de file_id dañado, se empieza de nuevo: {e}")
+        return ArchivosTelegram._registro
+
+    @staticmethod
+    def _guardar():
+        """Guarda el registro de forma atómica, conservando los más recientes"""
+        registro = ArchivosTelegram._registro
+        if len(registro) > MAX_IDS_TELEGRAM:
+            recientes = sorted(registro.items(), key=lambda item: item[1]["fecha"])[-MAX_IDS_TELEGRAM:]
+            registro = ArchivosTelegram._registro = dict(recientes)
+
+        temporal = ARCHIVO_IDS_TELEGRAM + ".tmp"
+        try:
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(registro, f, ensure_ascii=False)
+            os.replace(temporal, ARCHIVO_IDS_TELEGRAM)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar el registro de file_id: {e}")
+
+    @staticmethod
+    def obtener(tipo, huella):
+        """Retorna el file_id ya conocido para este contenido, o None"""
+        entrada = ArchivosTelegram._cargar().get(f"{tipo}:{huella}")
+        return entrada["file_id"] if entrada else None
+
+    @staticmethod
+    def registrar(tipo, huella, file_id):
+        """Guarda el file_id devuelto por Telegram para este contenido"""
+        ArchivosTelegram._cargar()[f"{tipo}:{huella}"] = {
+            "file_id": file_id,
+            "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        ArchivosTelegram._guardar()
+
+    @staticmethod
+    def olvidar(tipo, huella):
+        """Descarta un file_id que Telegram ya no acepta"""
+        if ArchivosTelegram._cargar().pop(f"{tipo}:{huella}", None) is not None:
+            ArchivosTelegram._guardar()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔒 modules/bloqueo_archivos.py - BLOQUEO DE ESCRITURA ENTRE PROCESOS
+===================================================================
+
+El bot, la aplicación de consola (main_modular.py) y scripts como
+limpiar_excel.py escriben el mismo Excel de materiales. Sin coordinación,
+dos exportaciones a la vez pueden duplicar o perder filas.
+
+BloqueoArchivo toma un candado del sistema operativo (flock en Linux,
+msvcrt.locking en Windows) sobre un archivo "<ruta>.lock" al lado del
+archivo protegido:
+
+    with bloqueo_de(ARCHIVO_EXCEL_MATERIALES):
+        ... leer, modificar y guardar el Excel ...
+
+- Entre procesos: solo uno tiene el candado a la vez; los demás esperan
+  hasta TIMEOUT_BLOQUEO_ARCHIVOS segundos y luego reciben ArchivoBloqueado.
+- Dentro del proceso: es reentrante (como threading.RLock), así una
+  función que ya tiene el candado puede llamar a otra que también lo pide.
+"""
+
+import os
+import time
+import threading
+
+from .config import TIMEOUT_BLOQUEO_ARCHIVOS
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Pausa entre intentos mientras otro proceso tiene el candado
+ESPERA_REINTENTO_BLOQUEO = 0.05
+
+
+class ArchivoBloqueado(Exception):
+    """Otro proceso tiene el archivo bloqueado desde hace demasiado tiempo"""
+
+
+class BloqueoArchivo:
+    """Candado reentrante entre hilos y exclusivo entre procesos"""
+
+    def __init__(self, archivo, timeout=TIMEOUT_BLOQUEO_ARCHIVOS):
+        """
+        Args:
+            archivo: Archivo protegido (el candado es "<archivo>.lock")
+            timeout: Segundos máximos de espera por otro proceso
+        """
+        self.archivo = archivo
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._profundidad = 0
+        self._descriptor = None
+
+    def _bloquear_archivo(self):
+        # La ruta se resuelve al bloquear: los módulos se importan antes de fijar
+        # el directorio de trabajo (por ejemplo en benchmark.py)
+        ruta = os.path.abspath(self.archivo) + ".lock"
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        descriptor = os.open(ruta, os.O_RDWR | os.O_CREAT, 0o644)
+        limite = time.monotonic() + self.timeout
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    msvcrt.locking(descriptor, msvcrt.LK_NBLCK, 1)
+                self._descriptor = descriptor
+                return
+            except OSError:
+                if time.monotonic() >= limite:
+                    os.close(descriptor)
+                    raise ArchivoBloqueado(f"{ruta} bloqueado por otro proceso más de {self.timeout} s")
+                time.sleep(ESPERA_REINTENTO_BLOQUEO)
+
+    def _liberar_archivo(self):
+        descriptor, self._descriptor = self._descriptor, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(descriptor, fcntl.LOCK_UN)
+            else:
+                os.lseek(descriptor, 0, os.SEEK_SET)
+                msvcrt.locking(descriptor, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(descriptor)
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._profundidad == 0:
+            try:
+                self._bloquear_archivo()
+            except BaseException:
+                self._lock.release()
+                raise
+        self._profundidad += 1
+        return self
+
+    def __exit__(self, *excepcion):
+        self._profundidad -= 1
+        try:
+            if self._profundidad == 0:
+                self._liberar_archivo()
+        finally:
+            self._lock.release()
+        return False
+
+
+_bloqueos = {}
+_lock_bloqueos = threading.Lock()
+
+
+def bloqueo_de(archivo):
+    """BloqueoArchivo compartido por todo el proceso para ese archivo"""
+    with _lock_bloqueos:
+        bloqueo = _bloqueos.get(archivo)
+        if bloqueo is None:
+            bloqueo = _bloqueos[archivo] = BloqueoArchivo(archivo)
+        return bloqueo
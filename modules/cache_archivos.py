@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🗄️ modules/cache_archivos.py - CACHÉ EN DISCO DE ARCHIVOS GENERADOS
+===================================================================
+
+Base común de las cachés de gráficas (CacheGraficas) y de reportes PDF
+(CacheReportes). Un archivo se genera una sola vez por combinación de:
+
+- tipo ("cemento", "materiales"...)
+- datos o versión de los datos que contiene
+- opciones de generación (perfil, encabezado, versión de la plantilla...)
+
+La clave es el SHA-256 de esos tres valores. Los archivos se escriben de
+forma atómica (temporal + os.replace) porque se generan en procesos
+aparte. Se borran los que superan la antigüedad máxima y, si la carpeta
+pasa del tamaño máximo, los usados hace más tiempo.
+
+La antigüedad se mide desde que el archivo se generó (st_mtime, que no
+cambia al reutilizarlo); el último uso se anota en st_atime.
+
+Cada subclase fija DIRECTORIO, EXTENSIONES, MAX_MB y SEGUNDOS_MAX.
+"""
+
+import os
+import json
+import time
+import hashlib
+
+
+class CacheArchivos:
+    """Caché en disco de archivos por (tipo, datos, opciones)"""
+
+    DIRECTORIO = None
+    EXTENSIONES = ()
+    MAX_MB = 100
+    SEGUNDOS_MAX = 7 * 86400
+
+    @classmethod
+    def _extension(cls, opciones):
+        """Extensión del archivo para estas opciones (la primera de EXTENSIONES)"""
+        return cls.EXTENSIONES[0].lstrip(".")
+
+    @classmethod
+    def ruta(cls, tipo, datos, opciones):
+        """Ruta del archivo para esta combinación (exista o no)"""
+        contenido = json.dumps([tipo, datos, opciones], ensure_ascii=False, default=str, sort_keys=True)
+        clave = hashlib.sha256(contenido.encode('utf-8')).hexdigest()[:24]
+        return os.path.join(cls.DIRECTORIO, f"{tipo}_{clave}.{cls._extension(opciones)}")
+
+    @classmethod
+    def vigente(cls, ruta):
+        """Indica si el archivo ya está en caché y no venció; marca el uso"""
+        try:
+            info = os.stat(ruta)
+        except OSError:
+            return False
+        if time.time() - info.st_mtime > cls.SEGUNDOS_MAX:
+            return False
+        try:
+            # Solo el acceso: la fecha de creación (mtime) sigue contando para el vencimiento
+            os.utime(ruta, (time.time(), info.st_mtime))
+        except OSError:
+            pass
+        return True
+
+    @classmethod
+    def guardar(cls, ruta, escribir):
+        """Escribe el archivo con escribir(destino) y lo publica de forma atómica
+
+        Args:
+            ruta: Ruta obtenida con ruta()
+            escribir: Función que recibe la ruta temporal y guarda el archivo
+        """
+        os.makedirs(cls.DIRECTORIO, exist_ok=True)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        try:
+            escribir(temporal)
+            os.replace(temporal, ruta)
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+        cls.limpiar()
+        return ruta
+
+    @classmethod
+    def limpiar(cls):
+        """Borra archivos vencidos y los menos usados si la caché excede su tamaño"""
+        if not os.path.isdir(cls.DIRECTORIO):
+            return 0
+
+        ahora = time.time()
+        limite = cls.MAX_MB * 1024 * 1024
+        archivos = []
+        borrados = 0
+
+        for entrada in os.scandir(cls.DIRECTORIO):
+            if not entrada.name.endswith(cls.EXTENSIONES):
+                continue
+            try:
+                info = entrada.stat()
+            except OSError:
+                continue
+            if ahora - info.st_mtime > cls.SEGUNDOS_MAX:
+                borrados += cls._borrar(entrada.path)
+            else:
+                archivos.append((info.st_atime, info.st_size, entrada.path))
+
+        total = sum(tamano for _, tamano, _ in archivos)
+        for _, tamano, ruta in sorted(archivos):
+            if total <= limite:
+                break
+            borrados += cls._borrar(ruta)
+            total -= tamano
+
+        return borrados
+
+    @staticmethod
+    def _borrar(ruta):
+        try:
+            os.remove(ruta)
+            return 1
+        except OSError:
+            return 0  # Otro proceso ya lo borró
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🖼️ modules/cache_graficas.py - CACHÉ DE GRÁFICAS YA GENERADAS
+=============================================================
+
+Una gráfica se dibuja una sola vez por combinación de:
+
+- tipo de gráfica ("cemento", "combustibles", "stock_materiales"...)
+- datos que se dibujan (consumo por día, saldos, etc.)
+- opciones de dibujo (perfil, dpi, formato, versión de la plantilla)
+
+La clave es el SHA-256 de esos tres valores, así que si nadie registró
+movimientos nuevos, pedir la misma gráfica diez veces devuelve el mismo
+archivo de DIRECTORIO_CACHE_GRAFICAS sin volver a dibujarlo.
+
+Los archivos se escriben de forma atómica (temporal + os.replace) porque
+las gráficas se generan en procesos aparte. Se borran los que superan
+DIAS_MAX_CACHE_GRAFICAS y, si la carpeta pasa de MAX_MB_CACHE_GRAFICAS,
+los usados hace más tiempo (modules/cache_archivos.py).
+"""
+
+from .config import DIRECTORIO_CACHE_GRAFICAS, MAX_MB_CACHE_GRAFICAS, DIAS_MAX_CACHE_GRAFICAS
+from .cache_archivos import CacheArchivos
+
+# Formatos de imagen que puede contener la caché (según el perfil de dibujo)
+EXTENSIONES_GRAFICAS = (".png", ".jpg", ".webp")
+
+
+class CacheGraficas(CacheArchivos):
+    """Caché en disco de gráficas por (tipo, datos, opciones)"""
+
+    DIRECTORIO = DIRECTORIO_CACHE_GRAFICAS
+    EXTENSIONES = EXTENSIONES_GRAFICAS
+    MAX_MB = MAX_MB_CACHE_GRAFICAS
+    SEGUNDOS_MAX = DIAS_MAX_CACHE_GRAFICAS * 86400
+
+    @classmethod
+    def _extension(cls, opciones):
+        """La extensión sale de opciones["formato"] (png si no se indica)"""
+        return opciones.get("formato", "png") if isinstance(opciones, dict) else "png"
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🗃️ modules/cache_movimientos.py - CACHÉ COMPARTIDA DEL EXCEL DE MATERIALES
+==========================================================================
+
+Un solo análisis del Excel por versión del archivo, compartido por
+ExcelManager, GraphicsGenerator, PDFCreator y LibroStock. El análisis se
+hace con el lector en modo streaming (lector_movimientos) y se guardan
+solo los registros Movimiento ya tipados.
+
+La clave de la caché es (ruta, fecha de modificación, tamaño): si el
+archivo cambia, la siguiente lectura lo vuelve a analizar. Además, cuando
+el propio bot escribe el Excel llama a invalidar() para no depender de la
+resolución de la fecha de modificación.
+
+Para tareas en varios procesos (modules/cierre_dia.py), exportar() guarda
+los movimientos ya analizados en un archivo pickle y cada proceso los
+toma con precargar() en vez de volver a analizar el Excel.
+"""
+
+import os
+import pickle
+import threading
+
+from .config import ARCHIVO_EXCEL_MATERIALES
+from .lector_movimientos import iterar_movimientos
+from .metricas import Metricas
+
+
+class CacheMovimientos:
+    """Caché de movimientos del Excel de materiales para todo el proceso"""
+
+    _entradas = {}  # ruta absoluta -> (clave, movimientos)
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _clave(archivo):
+        info = os.stat(archivo)
+        return (os.path.abspath(archivo), info.st_mtime_ns, info.st_size)
+
+    @staticmethod
+    def obtener_movimientos(archivo=ARCHIVO_EXCEL_MATERIALES):
+        """Retorna la lista de Movimiento (filas de datos no vacías, en orden)
+
+        La lista es compartida: no debe modificarse. Retorna una lista vacía
+        si el archivo no existe.
+        """
+        if not os.path.exists(archivo):
+            return []
+
+        ruta = os.path.abspath(archivo)
+        with CacheMovimientos._lock:
+            clave = CacheMovimientos._clave(archivo)
+            entrada = CacheMovimientos._entradas.get(ruta)
+            if entrada and entrada[0] == clave:
+                Metricas.incrementar("plamph_cache_movimientos_total", resultado="acierto")
+                return entrada[1]
+
+            Metricas.incrementar("plamph_cache_movimientos_total", resultado="fallo")
+            with Metricas.cronometro("plamph_excel_lectura_segundos"):
+                movimientos = list(iterar_movimientos(archivo))
+            Metricas.incrementar("plamph_excel_filas_leidas_total", len(movimientos))
+
+            CacheMovimientos._entradas[ruta] = (clave, movimientos)
+            return movimientos
+
+    @staticmethod
+    def invalidar(archivo=None):
+        """Descarta la caché de un archivo (o de todos si archivo es None)"""
+        with CacheMovimientos._lock:
+            if archivo is None:
+                CacheMovimientos._entradas.clear()
+            else:
+                CacheMovimientos._entradas.pop(os.path.abspath(archivo), None)
+
+    @staticmethod
+    def exportar(destino, archivo=ARCHIVO_EXCEL_MATERIALES):
+        """Guarda los movimientos de la versión actual del Excel para otros procesos
+
+        Returns:
+            bool: True si se guardó la instantánea
+        """
+        if not os.path.exists(archivo):
+            return False
+        movimientos = CacheMovimientos.obtener_movimientos(archivo)
+        with CacheMovimientos._lock:
+            clave = CacheMovimientos._entradas[os.path.abspath(archivo)][0]
+        with open(destino, "wb") as f:
+            pickle.dump((clave, movimientos), f, protocol=pickle.HIGHEST_PROTOCOL)
+        return True
+
+    @staticmethod
+    def precargar(origen):
+        """Toma los movimientos de una instantánea de exportar()
+
+        Se descarta si el Excel cambió desde que se guardó (la siguiente
+        lectura lo vuelve a analizar).
+
+        Returns:
+            bool: True si la caché quedó con los movimientos de la instantánea
+        """
+        try:
+            with open(origen, "rb") as f:
+                clave, movimientos = pickle.load(f)
+            ruta = clave[0]
+            with CacheMovimientos._lock:
+                entrada = CacheMovimientos._entradas.get(ruta)
+                if entrada and entrada[0] == clave:
+                    return True
+                if CacheMovimientos._clave(ruta) != clave:
+                    return False
+                CacheMovimientos._entradas[ruta] = (clave, movimientos)
+            return True
+        except (OSError, pickle.PickleError, EOFError) as e:
+            print(f"⚠️ No se pudo precargar {origen}: {e}")
+            return False
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📑 modules/cache_reportes.py - CACHÉ DE REPORTES PDF YA GENERADOS
+=================================================================
+
+Un reporte PDF se arma una sola vez por combinación de:
+
+- tipo de reporte ("materiales", "combustibles")
+- versión de los datos: fecha de modificación y tamaño del Excel de
+  materiales y del diario de movimientos (version_datos)
+- opciones (encabezado, marca de agua, versión de la plantilla, imágenes
+  del membrete)
+
+Si nadie registró movimientos, pedir el mismo reporte varias veces en el
+turno devuelve el mismo archivo de DIRECTORIO_CACHE_REPORTES sin volver a
+armarlo (y, como el contenido es idéntico, el bot lo reenvía por file_id).
+
+Se borran los reportes con más de HORAS_MAX_CACHE_REPORTES y, si la
+carpeta pasa de MAX_MB_CACHE_REPORTES, los usados hace más tiempo.
+"""
+
+import os
+
+from .config import (ARCHIVO_EXCEL_MATERIALES, ARCHIVO_DIARIO_MATERIALES, DIRECTORIO_CACHE_REPORTES,
+                     MAX_MB_CACHE_REPORTES, HORAS_MAX_CACHE_REPORTES)
+from .cache_archivos import CacheArchivos
+
+
+def version_archivo(archivo):
+    """[fecha de modificación, tamaño] del archivo, o None si no existe"""
+    try:
+        info = os.stat(archivo)
+    except OSError:
+        return None
+    return [info.st_mtime_ns, info.st_size]
+
+
+class CacheReportes(CacheArchivos):
+    """Caché en disco de reportes PDF por (tipo, versión de datos, opciones)"""
+
+    DIRECTORIO = DIRECTORIO_CACHE_REPORTES
+    EXTENSIONES = (".pdf",)
+    MAX_MB = MAX_MB_CACHE_REPORTES
+    SEGUNDOS_MAX = HORAS_MAX_CACHE_REPORTES * 3600
+
+    @staticmethod
+    def version_datos():
+        """Versión de los datos de materiales (cambia con cada movimiento registrado o exportado)"""
+        return [version_archivo(ARCHIVO_EXCEL_MATERIALES), version_archivo(ARCHIVO_DIARIO_MATERIALES)]
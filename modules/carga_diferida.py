@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⚡ modules/carga_diferida.py - CARGA DIFERIDA DE MÓDULOS PESADOS
+===============================================================
+
+matplotlib, ReportLab, PIL, openpyxl y numpy tardan en importarse y el
+bot no los necesita para conectarse a Telegram. Con estos sustitutos el
+módulo real se importa recién la primera vez que se usa:
+
+    openpyxl = ModuloDiferido("openpyxl")
+    GraphicsGenerator = ObjetoDiferido("modules.graphics_generator", "GraphicsGenerator")
+
+MetodoDiferido hace lo mismo con un método, pero solo guarda nombres:
+se puede enviar al grupo de procesos y el módulo se importa en el
+trabajador, no en el bot.
+
+Además verificar_presupuesto_importacion() y medir_importacion() permiten
+comprobar que el arranque del bot sigue dentro de PRESUPUESTO_IMPORTACION_S
+y que ningún módulo pesado se cargó antes de tiempo.
+"""
+
+import os
+import sys
+import importlib
+import importlib.util
+import subprocess
+
+from .config import PRESUPUESTO_IMPORTACION_S
+
+# Bibliotecas que no deben cargarse al importar el bot
+MODULOS_PESADOS = ["matplotlib", "reportlab", "PIL", "openpyxl", "numpy"]
+
+
+class ModuloDiferido:
+    """Sustituto de un módulo que lo importa en el primer acceso a un atributo"""
+
+    def __init__(self, nombre):
+        self._nombre = nombre
+        self._modulo = None
+
+    def _cargar(self):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nombre)
+        return self._modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self._cargar(), atributo)
+
+    def __repr__(self):
+        estado = "cargado" if self._modulo is not None else "sin cargar"
+        return f"<ModuloDiferido {self._nombre} ({estado})>"
+
+
+class ObjetoDiferido:
+    """Sustituto de una clase o función de un módulo que se importa al primer uso"""
+
+    def __init__(self, modulo, nombre):
+        self._modulo = modulo
+        self._nombre = nombre
+        self._objeto = None
+
+    def _cargar(self):
+        if self._objeto is None:
+            self._objeto = getattr(importlib.import_module(self._modulo), self._nombre)
+        return self._objeto
+
+    def __getattr__(self, atributo):
+        return getattr(self._cargar(), atributo)
+
+    def __call__(self, *args, **kwargs):
+        return self._cargar()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<ObjetoDiferido {self._modulo}.{self._nombre}>"
+
+
+class MetodoDiferido:
+    """Método de una clase, por nombre, que se importa recién al llamarlo
+
+    Solo guarda nombres, así se envía al grupo de procesos sin importar el
+    módulo en el bot: matplotlib o ReportLab se cargan únicamente en el
+    proceso trabajador que lo ejecuta.
+    """
+
+    def __init__(self, modulo, clase, metodo):
+        self._modulo = modulo
+        self._clase = clase
+        self._metodo = metodo
+
+    def __call__(self, *args, **kwargs):
+        objeto = getattr(importlib.import_module(self._modulo), self._clase)
+        return getattr(objeto, self._metodo)(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self._clase}.{self._metodo}"
+
+    def __repr__(self):
+        return f"<MetodoDiferido {self._modulo}.{self._clase}.{self._metodo}>"
+
+
+def modulo_disponible(nombre):
+    """Indica si un módulo está instalado, sin importarlo"""
+    try:
+        return importlib.util.find_spec(nombre) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def modulos_pesados_cargados():
+    """Lista de MODULOS_PESADOS que ya están importados en este proceso"""
+    return [nombre for nombre in MODULOS_PESADOS if nombre in sys.modules]
+
+
+def verificar_presupuesto_importacion(segundos, limite=PRESUPUESTO_IMPORTACION_S, pesados=None):
+    """Informa el tiempo de importación y avisa si excede el presupuesto
+
+    Returns:
+        bool: True si el tiempo está dentro del límite y no se cargó
+              ningún módulo pesado
+    """
+    if pesados is None:
+        pesados = modulos_pesados_cargados()
+
+    dentro = segundos <= limite and not pesados
+    if dentro:
+        print(f"⚡ Módulos del bot cargados en {segundos:.2f} s (límite {limite:.2f} s)")
+    else:
+        print(f"⚠️ Arranque lento: {segundos:.2f} s (límite {limite:.2f} s)")
+        if pesados:
+            print(f"⚠️ Módulos pesados cargados al importar: {', '.join(pesados)}")
+    return dentro
+
+
+def medir_importacion(modulo="bot_modular"):
+    """Mide, en un proceso Python nuevo, cuánto tarda importar un módulo
+
+    Returns:
+        tuple: (segundos, lista de módulos pesados cargados) o (None, []) si falló
+    """
+    codigo = (
+        "import sys, time\n"
+        "inicio = time.perf_counter()\n"
+        f"import {modulo}\n"
+        "segundos = time.perf_counter() - inicio\n"
+        f"pesados = [m for m in {MODULOS_PESADOS!r} if m in sys.modules]\n"
+        "print('ARRANQUE|%.4f|%s' % (segundos, ','.join(pesados)))\n"
+    )
+    resultado = subprocess.run([sys.executable, "-c", codigo], capture_output=True,
+                               text=True, cwd=os.getcwd())
+
+    for linea in reversed(resultado.stdout.splitlines()):
+        if linea.startswith("ARRANQUE|"):
+            _, segundos, pesados = linea.split("|")
+            return float(segundos), [m for m in pesados.split(",") if m]
+
+    print(f"❌ No se pudo importar {modulo}: {resultado.stderr.strip()[-300:]}")
+    return None, []
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🌙 modules/cierre_dia.py - REPORTES DE CIERRE DE TURNO EN PARALELO
+=================================================================
+
+Al cerrar el turno se necesitan todas las gráficas y los reportes PDF de
+materiales y combustibles. Generados uno tras otro, cada uno vuelve a
+analizar el Excel y el tiempo crece con la cantidad de reportes.
+
+CierreDia los genera a la vez:
+
+1. Exporta el diario al Excel y analiza el Excel una sola vez; los
+   movimientos se guardan en una instantánea (CacheMovimientos.exportar).
+2. Cada gráfica y cada PDF se generan en un proceso aparte, que toma los
+   movimientos de la instantánea en lugar de leer el Excel.
+3. Los archivos se juntan en un zip o, si está pypdf, en un solo PDF.
+
+Desde la consola (python main_modular.py --cierre) usa un proceso por
+núcleo (PROCESOS_CIERRE_DIA). El bot (/cierre) usa el grupo de procesos
+de EjecutorTareas para no dejar sin trabajadores a los demás botones: no
+envía más de PROCESOS_EJECUTOR_RENDER archivos a la vez, reintenta si el
+ejecutor está lleno y todo el cierre tiene un solo tiempo máximo
+(TIMEOUT_CIERRE_DIA).
+"""
+
+import os
+import io
+import time
+import asyncio
+import zipfile
+import tempfile
+import importlib
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .config import (DIRECTORIO_REPORTES, PROCESOS_CIERRE_DIA, FORMATO_CIERRE_DIA, TIMEOUT_CIERRE_DIA,
+                     PROCESOS_EJECUTOR_RENDER, MAX_TAREAS_PENDIENTES)
+from .cache_movimientos import CacheMovimientos
+from .excel_manager import ExcelManager
+from .ejecutor_tareas import EjecutorTareas, TareaExcedioTiempo, EjecutorOcupado
+from .metricas import Metricas
+
+# pypdf es opcional: sin él, el cierre se entrega como zip
+try:
+    from pypdf import PdfWriter
+    UNION_PDF_DISPONIBLE = True
+except ImportError:
+    UNION_PDF_DISPONIBLE = False
+
+# (nombre en el paquete, módulo, clase, método, argumentos) en el orden del paquete
+TAREAS_CIERRE = [
+    ("reporte_materiales", "pdf_creator", "PDFCreator", "generar_pdf_materiales", ()),
+    ("reporte_combustibles", "pdf_creator", "PDFCreator", "generar_pdf_combustibles", ()),
+    ("grafica_stock_materiales", "graphics_generator", "GraphicsGenerator",
+     "generar_grafica_stock_materiales", ("print",)),
+    ("grafica_combustibles", "graphics_generator", "GraphicsGenerator",
+     "generar_grafica_combustibles", ("print",)),
+    ("grafica_cemento", "graphics_generator", "GraphicsGenerator",
+     "generar_grafica_cemento", ("print",)),
+]
+
+FORMATOS_CIERRE = ("zip", "pdf")
+
+# Pausa antes de reenviar un archivo del cierre si el ejecutor está lleno
+ESPERA_REINTENTO_CIERRE = 1
+
+
+def _ejecutar_tarea(instantanea, modulo, clase, metodo, args):
+    """Corre en el proceso trabajador: toma los movimientos y genera el archivo"""
+    if instantanea:
+        CacheMovimientos.precargar(instantanea)
+    objeto = getattr(importlib.import_module(f".{modulo}", __package__), clase)
+    return getattr(objeto, metodo)(*args)
+
+
+def _pagina_imagen(ruta):
+    """PDF de una página con la gráfica centrada (para unirla al PDF del cierre)"""
+    # ReportLab se importa aquí: el bot importa este módulo sin cargarlo
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.pdfgen import canvas
+
+    ancho, alto = landscape(letter)
+    margen = 36
+    memoria = io.BytesIO()
+    lienzo = canvas.Canvas(memoria, pagesize=(ancho, alto))
+    lienzo.drawImage(ruta, margen, margen, ancho - 2 * margen, alto - 2 * margen,
+                     preserveAspectRatio=True, anchor='c')
+    lienzo.showPage()
+    lienzo.save()
+    memoria.seek(0)
+    return memoria
+
+
+def armar_cierre(resultados, formato=FORMATO_CIERRE_DIA, destino=None):
+    """Junta los archivos generados en un zip o en un solo PDF
+
+    Args:
+        resultados: {nombre de la tarea: ruta generada o None}
+        formato: "zip" o "pdf"
+        destino: Ruta del archivo (por defecto en DIRECTORIO_REPORTES)
+
+    Returns:
+        str: Ruta del archivo armado, o None si no hay nada que juntar
+    """
+    archivos = [(nombre, resultados.get(nombre)) for nombre, *_ in TAREAS_CIERRE]
+    archivos = [(nombre, ruta) for nombre, ruta in archivos if ruta and os.path.exists(ruta)]
+    if not archivos:
+        print("❌ No se generó ningún archivo para el cierre")
+        return None
+
+    if formato == "pdf" and not UNION_PDF_DISPONIBLE:
+        print("⚠️ pypdf no está instalado: el cierre se entrega como zip")
+        formato = "zip"
+
+    if destino is None:
+        os.makedirs(DIRECTORIO_REPORTES, exist_ok=True)
+        marca = datetime.now().strftime('%Y%m%d_%H%M%S')
+        destino = os.path.join(DIRECTORIO_REPORTES, f"cierre_{marca}.{formato}")
+
+    try:
+        if formato == "pdf":
+            union = PdfWriter()
+            for _, ruta in archivos:
+                union.append(ruta if ruta.endswith(".pdf") else _pagina_imagen(ruta))
+            with open(destino, "wb") as f:
+                union.write(f)
+        else:
+            # PDFs e imágenes ya vienen comprimidos: se guardan tal cual
+            with zipfile.ZipFile(destino, "w", zipfile.ZIP_STORED) as paquete:
+                for nombre, ruta in archivos:
+                    paquete.write(ruta, nombre + os.path.splitext(ruta)[1])
+    except Exception as e:
+        print(f"❌ Error armando el cierre: {e}")
+        return None
+
+    print(f"✅ Cierre armado: {destino} ({len(archivos)} de {len(TAREAS_CIERRE)} archivos)")
+    return destino
+
+
+class CierreDia:
+    """Genera todas las gráficas y reportes del turno en procesos paralelos"""
+
+    # ===============================
+    # INSTANTÁNEA DE MOVIMIENTOS
+    # ===============================
+
+    @staticmethod
+    def _preparar():
+        """Exporta el diario y guarda los movimientos analizados para los procesos
+
+        Returns:
+            str: Ruta de la instantánea, o None si no hay Excel de materiales
+        """
+        ExcelManager.sincronizar_diario()
+        descriptor, instantanea = tempfile.mkstemp(prefix="plamph_movimientos_", suffix=".pickle")
+        os.close(descriptor)
+        if CacheMovimientos.exportar(instantanea):
+            return instantanea
+        CierreDia._descartar(instantanea)
+        return None
+
+    @staticmethod
+    def _descartar(instantanea):
+        if instantanea and os.path.exists(instantanea):
+            os.remove(instantanea)
+
+    # ===============================
+    # CONSOLA: UN PROCESO POR NÚCLEO
+    # ===============================
+
+    @staticmethod
+    def generar(formato=FORMATO_CIERRE_DIA, procesos=PROCESOS_CIERRE_DIA):
+        """Genera el cierre completo con un grupo de procesos propio
+
+        Args:
+            formato: "zip" o "pdf"
+            procesos: Procesos a usar (None: uno por núcleo)
+
+        Returns:
+            str: Ruta del zip o PDF del cierre, o None si falló
+        """
+        inicio = time.perf_counter()
+        procesos = min(procesos or os.cpu_count() or 1, len(TAREAS_CIERRE))
+        print(f"🌙 Generando {len(TAREAS_CIERRE)} archivos de cierre en {procesos} procesos...")
+
+        instantanea = CierreDia._preparar()
+        resultados = {}
+        try:
+            # "spawn": igual que EjecutorTareas, los procesos no heredan estado del padre
+            with ProcessPoolExecutor(max_workers=procesos,
+                                     mp_context=multiprocessing.get_context("spawn")) as grupo:
+                futuros = {
+                    grupo.submit(_ejecutar_tarea, instantanea, modulo, clase, metodo, args): nombre
+                    for nombre, modulo, clase, metodo, args in TAREAS_CIERRE
+                }
+                for futuro in as_completed(futuros):
+                    nombre = futuros[futuro]
+                    try:
+                        resultados[nombre] = futuro.result()
+                    except Exception as e:
+                        print(f"❌ {nombre} no se generó: {e}")
+                        resultados[nombre] = None
+        finally:
+            CierreDia._descartar(instantanea)
+
+        ruta = armar_cierre(resultados, formato)
+        print(f"⏱️ Cierre en {time.perf_counter() - inicio:.1f} s")
+        return ruta
+
+    # ===============================
+    # BOT: GRUPO DE PROCESOS COMPARTIDO
+    # ===============================
+
+    @staticmethod
+    async def _render(limite, funcion, *args):
+        """Ejecuta una tarea del cierre en el grupo de procesos antes del límite
+
+        Si el ejecutor está lleno espera y reintenta: los archivos ya
+        generados no se descartan por un rechazo momentáneo.
+        """
+        while True:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                raise TareaExcedioTiempo(f"el cierre excedió {TIMEOUT_CIERRE_DIA} s")
+            try:
+                return await EjecutorTareas.ejecutar_render(funcion, *args, timeout=restante)
+            except EjecutorOcupado:
+                await asyncio.sleep(ESPERA_REINTENTO_CIERRE)
+
+    @staticmethod
+    async def generar_en_ejecutor(formato=FORMATO_CIERRE_DIA):
+        """Genera el cierre con los trabajadores de EjecutorTareas (desde el bot)
+
+        Returns:
+            str: Ruta del zip o PDF del cierre, o None si falló
+
+        Raises:
+            EjecutorOcupado: si no hay lugar para el cierre al empezar
+            TareaExcedioTiempo: si no terminó dentro de TIMEOUT_CIERRE_DIA
+        """
+        # Antes de exportar y analizar el Excel: sin lugar, no se empieza
+        if EjecutorTareas.tareas_pendientes() + PROCESOS_EJECUTOR_RENDER > MAX_TAREAS_PENDIENTES:
+            raise EjecutorOcupado(f"{EjecutorTareas.tareas_pendientes()} tareas pendientes")
+
+        limite = time.monotonic() + TIMEOUT_CIERRE_DIA
+        # Un archivo por trabajador: cada tarea se envía cuando hay uno libre,
+        # así su tiempo no corre mientras espera detrás de las otras del cierre
+        trabajadores = asyncio.Semaphore(PROCESOS_EJECUTOR_RENDER)
+
+        async def generar_archivo(modulo, clase, metodo, args):
+            async with trabajadores:
+                return await CierreDia._render(limite, _ejecutar_tarea, instantanea, modulo, clase, metodo, args)
+
+        with Metricas.cronometro("plamph_cierre_segundos", formato=formato):
+            instantanea = await EjecutorTareas.ejecutar_io(CierreDia._preparar)
+            try:
+                rutas = await asyncio.gather(*(
+                    generar_archivo(modulo, clase, metodo, args)
+                    for _, modulo, clase, metodo, args in TAREAS_CIERRE
+                ), return_exceptions=True)
+            finally:
+                await EjecutorTareas.ejecutar_io(CierreDia._descartar, instantanea)
+
+            resultados = {}
+            for (nombre, *_), ruta in zip(TAREAS_CIERRE, rutas):
+                if isinstance(ruta, TareaExcedioTiempo):
+                    raise ruta  # Un cierre incompleto no sirve: avisar y reintentar
+                if isinstance(ruta, Exception):
+                    print(f"❌ {nombre} no se generó: {ruta}")
+                    ruta = None
+                resultados[nombre] = ruta
+
+            return await CierreDia._render(limite, armar_cierre, resultados, formato)
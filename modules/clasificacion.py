@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🏷️ modules/clasificacion.py - ÍNDICE DE CLASIFICACIÓN DE MATERIALES Y MOVIMIENTOS
+================================================================================
+
+Un solo lugar para decidir qué material es cada texto del Excel o del
+diario y qué tipo de movimiento es cada "📈 Entrada" / "📉 Salida".
+
+Materiales: el texto se normaliza (minúsculas, sin tildes ni emojis) y se
+busca el primer material de MATERIALES_VALIDOS cuyo nombre o sinónimo
+(SINONIMOS_MATERIALES) aparece en él. El resultado es un código entero:
+la posición del material en MATERIALES_VALIDOS, o SIN_CATEGORIA.
+
+    id_material("⛽ Nafta súper") == MATERIAL_GASOLINA
+
+Movimientos: clasificar_movimiento(tipo) -> (dirección, ¿cuenta como consumo?).
+
+Cada texto distinto se interpreta una sola vez por proceso; las
+agregaciones (tabla de movimientos, libro de stock, consumo diario)
+trabajan después con los códigos.
+"""
+
+import unicodedata
+from functools import lru_cache
+
+from .config import MATERIALES_VALIDOS, SINONIMOS_MATERIALES
+
+DIRECCION_ENTRADA = 1
+DIRECCION_SALIDA = -1
+DIRECCION_OTRO = 0
+
+SIN_CATEGORIA = -1
+
+# Textos distintos que se recuerdan por proceso (materiales y tipos de movimiento)
+MAX_TEXTOS_CLASIFICADOS = 4096
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes, sin emojis ni signos y con espacios simples"""
+    descompuesto = unicodedata.normalize("NFKD", str(texto or "").lower())
+    letras = [c if c.isalnum() else " " for c in descompuesto if not unicodedata.combining(c)]
+    return " ".join("".join(letras).split())
+
+
+# Palabras clave de cada material, en el orden de MATERIALES_VALIDOS
+# (el primero que aparece en el texto gana: "gasolina" antes que "diesel")
+CATEGORIAS = [normalizar(material) for material in MATERIALES_VALIDOS]
+_PALABRAS_CLAVE = [
+    (codigo, [normalizar(palabra) for palabra in [material] + SINONIMOS_MATERIALES.get(material, [])])
+    for codigo, material in enumerate(MATERIALES_VALIDOS)
+]
+
+
+def categoria(nombre):
+    """Código de un material de MATERIALES_VALIDOS ("Cemento" -> su posición)"""
+    return CATEGORIAS.index(normalizar(nombre))
+
+
+MATERIAL_CEMENTO = categoria("Cemento")
+MATERIAL_GASOLINA = categoria("Gasolina")
+MATERIAL_DIESEL = categoria("Diesel")
+
+
+@lru_cache(maxsize=MAX_TEXTOS_CLASIFICADOS)
+def id_material(texto):
+    """Código del material de un texto del Excel o del diario (SIN_CATEGORIA si no se reconoce)"""
+    normalizado = normalizar(texto)
+    if not normalizado:
+        return SIN_CATEGORIA
+    for codigo, palabras in _PALABRAS_CLAVE:
+        if any(palabra in normalizado for palabra in palabras):
+            return codigo
+    return SIN_CATEGORIA
+
+
+@lru_cache(maxsize=MAX_TEXTOS_CLASIFICADOS)
+def clasificar_movimiento(tipo):
+    """Interpreta el tipo de movimiento: (dirección, ¿cuenta como consumo?)"""
+    texto = str(tipo or "")
+    normalizado = normalizar(texto)
+    if "📈" in texto or "entrada" in normalizado:
+        direccion = DIRECCION_ENTRADA
+    elif "📉" in texto or "salida" in normalizado:
+        direccion = DIRECCION_SALIDA
+    else:
+        direccion = DIRECCION_OTRO
+
+    # Regla de la gráfica de cemento: salidas y registros de consumo/uso
+    consumo = ("📉" in texto or "salida" in normalizado or
+               "consumo" in normalizado or "uso" in normalizado)
+    return direccion, consumo
+
+
+def es_material(texto, codigo):
+    """Indica si el texto corresponde al material con ese código"""
+    return id_material(texto) == codigo
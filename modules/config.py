@@ -21,25 +21,73 @@ UBICACION = "Planta Municipal de Premoldeados"
 # Directorio base para datos
 DIRECTORIO_DATOS = "datos"
 
-# Crear directorio si no existe
-if not os.path.exists(DIRECTORIO_DATOS):
-    os.makedirs(DIRECTORIO_DATOS)
-    print(f"📁 Directorio creado: {DIRECTORIO_DATOS}")
-
 # Archivos Excel principales
 ARCHIVO_EXCEL_MATERIALES = os.path.join(DIRECTORIO_DATOS, "inventario_materiales.xlsx")
 ARCHIVO_EXCEL_EQUIPOS = os.path.join(DIRECTORIO_DATOS, "inventario_equipos.xlsx") 
 ARCHIVO_EXCEL_PRODUCCION = os.path.join(DIRECTORIO_DATOS, "registro_produccion.xlsx")
 
+# Diario de movimientos (solo agregar): es la ruta de escritura de materiales.
+# El Excel se actualiza desde aquí en lote (bajo demanda o periódicamente).
+ARCHIVO_DIARIO_MATERIALES = os.path.join(DIRECTORIO_DATOS, "diario_materiales.jsonl")
+ARCHIVO_DIARIO_EXPORTADO = os.path.join(DIRECTORIO_DATOS, "diario_materiales_exportado.json")
+INTERVALO_EXPORTACION_EXCEL = 300  # Segundos entre exportaciones automáticas del bot
+
+# Bloqueos del diario y del Excel de materiales entre procesos (bot, consola, scripts)
+TIMEOUT_BLOQUEO_ARCHIVOS = 30   # Segundos máximos de espera por otro proceso
+MAX_LOTE_ESCRITURA = 200        # Movimientos por escritura del escritor único del bot
+
+# Libro de saldos de stock por material (se reconstruye si el Excel cambia fuera del bot)
+ARCHIVO_LIBRO_STOCK = os.path.join(DIRECTORIO_DATOS, "libro_stock.json")
+
+# Consumo por material y día (gráficas de consumo sin recorrer el historial)
+ARCHIVO_CONSUMO_DIARIO = os.path.join(DIRECTORIO_DATOS, "consumo_diario.json")
+
+# file_id de Telegram por hash de contenido (reenviar sin volver a subir el archivo)
+ARCHIVO_IDS_TELEGRAM = os.path.join(DIRECTORIO_DATOS, "archivos_telegram.json")
+MAX_IDS_TELEGRAM = 500
+
 # Configuración de gráficas
 DIRECTORIO_GRAFICAS = "graficas"
-if not os.path.exists(DIRECTORIO_GRAFICAS):
-    os.makedirs(DIRECTORIO_GRAFICAS)
+
+# Caché de gráficas ya generadas (se reutilizan mientras los datos no cambien)
+DIRECTORIO_CACHE_GRAFICAS = os.path.join(DIRECTORIO_GRAFICAS, "cache")
+MAX_MB_CACHE_GRAFICAS = 100     # Tamaño máximo de la caché
+DIAS_MAX_CACHE_GRAFICAS = 7     # Antigüedad máxima de una gráfica en caché
 
 # Configuración de reportes
 DIRECTORIO_REPORTES = "reportes"
-if not os.path.exists(DIRECTORIO_REPORTES):
-    os.makedirs(DIRECTORIO_REPORTES)
+
+# Caché de reportes PDF ya generados (se reutilizan mientras los datos no cambien)
+DIRECTORIO_CACHE_REPORTES = os.path.join(DIRECTORIO_REPORTES, "cache")
+MAX_MB_CACHE_REPORTES = 50      # Tamaño máximo de la caché
+HORAS_MAX_CACHE_REPORTES = 8    # Antigüedad máxima de un reporte en caché (un turno)
+
+# Historial completo en PDF (modules/pdf_historial.py): alto fijo de cada fila
+# en puntos; los movimientos se leen del Excel de a una página por vez
+ALTO_FILA_HISTORIAL_PDF = 13
+
+# Cierre de turno (modules/cierre_dia.py): todas las gráficas y reportes a la vez
+PROCESOS_CIERRE_DIA = None      # Procesos en la consola (None: uno por núcleo)
+FORMATO_CIERRE_DIA = "zip"      # "zip" o "pdf" (un solo PDF, requiere pypdf)
+TIMEOUT_CIERRE_DIA = 600        # Segundos máximos del cierre completo desde el bot
+
+# Reporte fotográfico (modules/almacen_fotos.py): al recibir cada foto se guarda
+# una copia reducida para el PDF y se anota en el manifiesto de su día
+CARPETA_FOTOS = "fotos_planta"
+LADO_MINIATURA_FOTOS = 420      # Píxeles del lado mayor (~150 dpi en la grilla del PDF)
+CALIDAD_MINIATURA_FOTOS = 70    # Calidad JPEG de la copia reducida
+DIAS_REPORTE_FOTOS = 7          # Período por defecto del reporte con fotos
+MAX_MB_DOCUMENTO_TELEGRAM = 50  # Tamaño máximo de un documento enviado por el bot
+
+def asegurar_directorios():
+    """Crea los directorios de datos, gráficas y reportes si no existen
+
+    Se llama al iniciar el bot o la aplicación (no al importar este módulo).
+    """
+    for directorio in (DIRECTORIO_DATOS, DIRECTORIO_GRAFICAS, DIRECTORIO_REPORTES):
+        if not os.path.exists(directorio):
+            os.makedirs(directorio, exist_ok=True)
+            print(f"📁 Directorio creado: {directorio}")
 
 # ============================================================================
 # CONFIGURACIÓN DE TELEGRAM (OPCIONAL)
@@ -48,6 +96,33 @@ if not os.path.exists(DIRECTORIO_REPORTES):
 # Se lee desde la variable de entorno BOT_TOKEN para evitar exponerlo en el código
 TOKEN = os.getenv("BOT_TOKEN", "")
 
+# Ejecutor de tareas pesadas del bot (gráficas, PDFs, Excel) fuera del bucle async
+HILOS_EJECUTOR_IO = 4          # Hilos para lectura/escritura de archivos
+PROCESOS_EJECUTOR_RENDER = 2   # Procesos para matplotlib y ReportLab
+MAX_TAREAS_PENDIENTES = 8      # Tareas en cola antes de rechazar nuevas
+TIMEOUT_TAREA_IO = 30          # Segundos máximos por tarea de E/S
+TIMEOUT_TAREA_RENDER = 180     # Segundos máximos por gráfica o PDF
+
+# Estados de conversación: segundos que se agrupan los cambios antes de escribir el archivo
+RETARDO_GUARDADO_ESTADOS = 2
+
+# Tiempo máximo aceptable para importar el bot (módulos pesados se cargan al usarse)
+PRESUPUESTO_IMPORTACION_S = 0.8
+
+# Métricas de rendimiento en formato Prometheus (textfile collector de node_exporter)
+ARCHIVO_METRICAS = os.path.join(DIRECTORIO_DATOS, "metricas.prom")
+INTERVALO_METRICAS = 60  # Segundos entre escrituras del archivo de métricas
+
+# Pre-dibujo de las gráficas del menú: segundos sin movimientos nuevos antes de dibujarlas
+RETARDO_PRERENDER_GRAFICAS = 20
+
+# Traza de extracción de datos (modules/traza.py): eventos máximos por captura
+MAX_EVENTOS_TRAZA = 2000
+
+# Reportes PDF: resolución máxima de las imágenes de encabezado y pie
+# (se reducen una vez por proceso y se dibujan como form XObject en cada página)
+DPI_MEMBRETE_PDF = 150
+
 # ============================================================================
 # CONFIGURACIÓN DE MATERIALES
 # ============================================================================
@@ -66,6 +141,12 @@ MATERIALES_VALIDOS = [
     "Otros"
 ]
 
+# Otros nombres con que se registran algunos materiales (modules/clasificacion.py)
+SINONIMOS_MATERIALES = {
+    "Gasolina": ["gasoline", "nafta", "bencina"],
+    "Diesel": ["diésel", "gasoil", "petróleo"],
+}
+
 # Tipos de movimientos
 TIPOS_MOVIMIENTO = [
     "📈 Entrada",
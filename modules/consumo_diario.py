@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📆 modules/consumo_diario.py - CONSUMO DIARIO ACUMULADO POR MATERIAL
+===================================================================
+
+Mantiene en ARCHIVO_CONSUMO_DIARIO el consumo de cada material por día
+(salidas y registros de consumo/uso, la misma regla de la gráfica de
+cemento). Las gráficas de consumo leen esta serie pequeña en lugar de
+recorrer todo el historial de movimientos:
+
+    ConsumoDiario.serie(lambda nombre: es_material(nombre, MATERIAL_CEMENTO),
+                        desde=date(2025, 1, 1), hasta=date(2025, 1, 31))
+
+- Se llena una sola vez desde el historial (Excel + diario pendiente).
+- Cada movimiento nuevo del diario se suma al registrarse.
+- Igual que LibroStock, guarda la firma del Excel de materiales: si el
+  Excel cambia fuera del bot, se vuelve a llenar desde cero.
+
+Los días se guardan como "AAAA-MM-DD"; los movimientos sin fecha válida
+se acumulan en "S/F".
+"""
+
+import os
+import json
+
+from .config import ARCHIVO_EXCEL_MATERIALES, ARCHIVO_DIARIO_MATERIALES, ARCHIVO_CONSUMO_DIARIO, asegurar_directorios
+from .carga_diferida import ModuloDiferido
+from .diario_movimientos import DiarioMovimientos, CAMPOS_MOVIMIENTO
+from .libro_stock import calcular_firma, firma_vigente
+from .lector_movimientos import convertir_cantidad, clave_dia, fecha_iso, SIN_FECHA
+from .clasificacion import clasificar_movimiento
+
+# NumPy y la tabla de movimientos se importan al primer uso (ExcelManager,
+# y con él este módulo, se importa al arrancar el bot)
+np = ModuloDiferido("numpy")
+tabla_movimientos = ModuloDiferido(f"{__package__}.tabla_movimientos")
+
+
+def aplicar_consumo(consumo, material, tipo_movimiento, cantidad, fecha):
+    """Suma un movimiento al consumo por material y día - MISMA REGLA QUE LA TABLA"""
+    if not (material and tipo_movimiento and cantidad):
+        return
+    cantidad_num = convertir_cantidad(cantidad)
+    if not cantidad_num or not clasificar_movimiento(str(tipo_movimiento))[1]:
+        return
+
+    dias = consumo.setdefault(str(material).strip(), {})
+    dia = clave_dia(fecha)
+    dias[dia] = dias.get(dia, 0) + cantidad_num
+
+
+class ConsumoDiario:
+    """Consumo por material y día, actualizado de forma incremental"""
+
+    # Copia en memoria del acumulado persistido y versión del archivo leída
+    _acumulado = None
+    _version_archivo = None
+
+    # ===============================
+    # PERSISTENCIA
+    # ===============================
+
+    @staticmethod
+    def _version():
+        """(fecha de modificación, tamaño) del archivo del acumulado, o None"""
+        try:
+            info = os.stat(ARCHIVO_CONSUMO_DIARIO)
+            return (info.st_mtime_ns, info.st_size)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _cargar():
+        """Carga el acumulado desde disco
+
+        Se vuelve a leer solo si otro proceso lo guardó (las gráficas se
+        dibujan en el grupo de procesos y el bot lo actualiza en el principal).
+        """
+        version = ConsumoDiario._version()
+        if version is not None and version != ConsumoDiario._version_archivo:
+            try:
+                with open(ARCHIVO_CONSUMO_DIARIO, 'r', encoding='utf-8') as f:
+                    ConsumoDiario._acumulado = json.load(f)
+                ConsumoDiario._version_archivo = version
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Consumo diario dañado, se reconstruirá: {e}")
+                ConsumoDiario._acumulado = None
+        return ConsumoDiario._acumulado
+
+    @staticmethod
+    def _guardar(acumulado):
+        """Guarda el acumulado de forma atómica"""
+        ConsumoDiario._acumulado = acumulado
+        if not os.path.exists(ARCHIVO_CONSUMO_DIARIO):
+            asegurar_directorios()
+        temporal = ARCHIVO_CONSUMO_DIARIO + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(acumulado, f, ensure_ascii=False)
+        os.replace(temporal, ARCHIVO_CONSUMO_DIARIO)
+        ConsumoDiario._version_archivo = ConsumoDiario._version()
+
+    @staticmethod
+    def firma_valida():
+        """Verifica que el acumulado corresponde al Excel actual"""
+        acumulado = ConsumoDiario._cargar()
+        if acumulado is None:
+            return False
+
+        vigente, actualizada = firma_vigente(acumulado.get("firma"))
+        if actualizada:
+            ConsumoDiario._guardar(acumulado)
+        return vigente
+
+    # ===============================
+    # RECONSTRUCCIÓN E INCREMENTOS
+    # ===============================
+
+    @staticmethod
+    def _consumo_excel():
+        """Agrupa el consumo del Excel por material y día (solo al reconstruir)"""
+        tabla = tabla_movimientos.MovimientosTable.desde_excel(ARCHIVO_EXCEL_MATERIALES)
+        mascara = tabla.consumo
+        consumo = {}
+        if not mascara.any():
+            return consumo
+
+        # Pares (material, día) distintos; NaT queda como el menor entero
+        pares = np.stack([tabla.codigos[mascara].astype(np.int64),
+                          tabla.fechas[mascara].astype(np.int64)])
+        distintos, inverso = np.unique(pares, axis=1, return_inverse=True)
+        totales = np.bincount(inverso.ravel(), weights=tabla.cantidades_brutas[mascara])
+
+        nat = np.datetime64("NaT", "D").astype(np.int64)
+        for (codigo, dia), total in zip(distintos.T, totales):
+            clave = SIN_FECHA if dia == nat else str(np.datetime64(int(dia), "D"))
+            dias = consumo.setdefault(tabla.materiales[codigo], {})
+            dias[clave] = dias.get(clave, 0) + float(total)
+        return consumo
+
+    @staticmethod
+    def reconstruir():
+        """Recalcula el acumulado desde el Excel y los pendientes del diario"""
+        print("📆 Reconstruyendo consumo diario desde el Excel...")
+        firma = calcular_firma()
+        consumo = ConsumoDiario._consumo_excel()
+
+        filas, offset = DiarioMovimientos.leer_pendientes()
+        for fila in filas:
+            registro = dict(zip(CAMPOS_MOVIMIENTO, fila))
+            aplicar_consumo(consumo, registro["material"], registro["tipo"],
+                            registro["cantidad"], registro["fecha"])
+
+        acumulado = {"firma": firma, "offset_diario": offset, "consumo": consumo}
+        ConsumoDiario._guardar(acumulado)
+        return acumulado
+
+    @staticmethod
+    def _aplicar_diario(acumulado):
+        """Suma al acumulado las líneas del diario que aún no contiene"""
+        if not os.path.exists(ARCHIVO_DIARIO_MATERIALES):
+            return
+        if os.path.getsize(ARCHIVO_DIARIO_MATERIALES) <= acumulado["offset_diario"]:
+            return
+
+        offset = acumulado["offset_diario"]
+        with open(ARCHIVO_DIARIO_MATERIALES, 'rb') as f:
+            f.seek(offset)
+            for linea in f:
+                if not linea.endswith(b"\n"):
+                    break
+                offset += len(linea)
+                try:
+                    registro = json.loads(linea.decode('utf-8'))
+                except ValueError:
+                    continue
+                aplicar_consumo(acumulado["consumo"], registro.get("material"), registro.get("tipo"),
+                                registro.get("cantidad"), registro.get("fecha"))
+
+        acumulado["offset_diario"] = offset
+        ConsumoDiario._guardar(acumulado)
+
+    @staticmethod
+    def actualizar():
+        """Deja el acumulado al día y lo retorna (reconstruye solo si el Excel cambió)"""
+        acumulado = ConsumoDiario._cargar()
+
+        # Diario reemplazado o truncado: el offset guardado ya no sirve
+        tamano_diario = os.path.getsize(ARCHIVO_DIARIO_MATERIALES) if os.path.exists(ARCHIVO_DIARIO_MATERIALES) else 0
+        if acumulado is None or acumulado["offset_diario"] > tamano_diario or not ConsumoDiario.firma_valida():
+            return ConsumoDiario.reconstruir()
+
+        ConsumoDiario._aplicar_diario(acumulado)
+        return acumulado
+
+    @staticmethod
+    def confirmar_exportacion():
+        """Actualiza la firma después de que el propio bot escribió el Excel
+
+        Se llama solo si el acumulado era válido antes de exportar; los
+        movimientos exportados ya estaban sumados.
+        """
+        acumulado = ConsumoDiario._cargar()
+        if acumulado is None:
+            return
+        ConsumoDiario._aplicar_diario(acumulado)
+        acumulado["firma"] = calcular_firma()
+        ConsumoDiario._guardar(acumulado)
+
+    # ===============================
+    # CONSULTAS
+    # ===============================
+
+    @staticmethod
+    def serie(predicado, desde=None, hasta=None):
+        """Consumo por día de los materiales cuyo nombre cumple el predicado
+
+        Args:
+            predicado: Función nombre -> bool (se evalúa una vez por material)
+            desde, hasta: Límites de la ventana (date o texto de fecha, inclusive);
+                          con ventana no se incluyen los movimientos sin fecha
+
+        Returns:
+            dict: {"dd/mm": cantidad} en orden cronológico; los movimientos sin
+            fecha válida van al final con la etiqueta "S/F"
+        """
+        desde, hasta = fecha_iso(desde), fecha_iso(hasta)
+        con_ventana = desde is not None or hasta is not None
+
+        por_dia = {}
+        for material, dias in ConsumoDiario.actualizar()["consumo"].items():
+            if not predicado(material):
+                continue
+            for dia, cantidad in dias.items():
+                if dia == SIN_FECHA:
+                    if con_ventana:
+                        continue
+                elif (desde is not None and dia < desde) or (hasta is not None and dia > hasta):
+                    continue
+                por_dia[dia] = por_dia.get(dia, 0) + cantidad
+
+        serie = {}
+        for dia in sorted(por_dia, key=lambda d: (d == SIN_FECHA, d)):
+            etiqueta = dia if dia == SIN_FECHA else f"{dia[8:10]}/{dia[5:7]}"
+            serie[etiqueta] = serie.get(etiqueta, 0) + por_dia[dia]
+        return serie
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📒 modules/diario_movimientos.py - DIARIO DE MOVIMIENTOS DE MATERIALES
+======================================================================
+
+Registro durable de solo agregar (una línea JSON por movimiento).
+Registrar un movimiento cuesta lo mismo sin importar el tamaño del
+historial: no se abre ni se reescribe el Excel.
+
+El Excel de materiales se actualiza en lote desde este diario con
+ExcelManager.exportar_excel_materiales(). El archivo
+ARCHIVO_DIARIO_EXPORTADO guarda hasta qué byte del diario ya fue
+copiado al Excel; todo lo que viene después está pendiente.
+"""
+
+import os
+import json
+
+from .config import ARCHIVO_DIARIO_MATERIALES, ARCHIVO_DIARIO_EXPORTADO, asegurar_directorios
+
+# Mismo orden que las columnas del Excel de materiales (A-G)
+CAMPOS_MOVIMIENTO = ["fecha", "hora", "material", "proveedor", "tipo", "cantidad", "observaciones"]
+
+
+class DiarioMovimientos:
+    """Diario de movimientos de materiales de solo agregar"""
+
+    @staticmethod
+    def registrar(fecha, hora, material, proveedor, tipo_movimiento, cantidad, observaciones):
+        """Agrega un movimiento al final del diario y lo fuerza a disco"""
+        datos = [fecha, hora, material, proveedor, tipo_movimiento, cantidad, observaciones]
+        return DiarioMovimientos.registrar_lote([datos]) == 1
+
+    @staticmethod
+    def registrar_lote(movimientos):
+        """Agrega varios movimientos con una sola escritura y un solo fsync
+
+        Args:
+            movimientos: Filas [fecha, hora, material, proveedor, tipo, cantidad, observaciones]
+
+        Returns:
+            int: Número de movimientos agregados
+        """
+        lineas = [json.dumps(dict(zip(CAMPOS_MOVIMIENTO, datos)), ensure_ascii=False, default=str) + "\n"
+                  for datos in movimientos]
+        if not lineas:
+            return 0
+
+        if not os.path.exists(ARCHIVO_DIARIO_MATERIALES):
+            asegurar_directorios()
+        
+        with open(ARCHIVO_DIARIO_MATERIALES, 'a+b') as f:
+            # Si una escritura anterior quedó cortada, cerrar esa línea primero
+            # para no pegarle el registro nuevo
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            f.write("".join(lineas).encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+
+        return len(lineas)
+
+    @staticmethod
+    def obtener_offset_exportado():
+        """Retorna el byte del diario hasta el cual ya se exportó al Excel"""
+        try:
+            with open(ARCHIVO_DIARIO_EXPORTADO, 'r', encoding='utf-8') as f:
+                offset = int(json.load(f).get("offset", 0))
+        except (OSError, ValueError, AttributeError):
+            return 0
+
+        # Si el diario fue reemplazado por uno más corto, empezar de nuevo
+        if not os.path.exists(ARCHIVO_DIARIO_MATERIALES) or offset > os.path.getsize(ARCHIVO_DIARIO_MATERIALES):
+            return 0
+        return offset
+
+    @staticmethod
+    def marcar_exportado(offset):
+        """Guarda (de forma atómica) hasta qué byte se exportó el diario"""
+        temporal = ARCHIVO_DIARIO_EXPORTADO + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({"offset": offset}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ARCHIVO_DIARIO_EXPORTADO)
+
+    @staticmethod
+    def hay_pendientes():
+        """Indica si hay movimientos en el diario que aún no están en el Excel"""
+        if not os.path.exists(ARCHIVO_DIARIO_MATERIALES):
+            return False
+        return os.path.getsize(ARCHIVO_DIARIO_MATERIALES) > DiarioMovimientos.obtener_offset_exportado()
+
+    @staticmethod
+    def leer_pendientes():
+        """Lee los movimientos aún no exportados
+
+        Returns:
+            tuple: (lista de filas [fecha, hora, material, proveedor, tipo, cantidad,
+                   observaciones], offset del diario después de la última fila leída)
+        """
+        inicio = DiarioMovimientos.obtener_offset_exportado()
+        if not os.path.exists(ARCHIVO_DIARIO_MATERIALES):
+            return [], inicio
+
+        filas = []
+        offset = inicio
+        with open(ARCHIVO_DIARIO_MATERIALES, 'rb') as f:
+            f.seek(inicio)
+            for linea in f:
+                # Una línea sin salto final es una escritura en curso o cortada
+                if not linea.endswith(b"\n"):
+                    break
+                offset += len(linea)
+                if not linea.strip():
+                    continue
+                try:
+                    registro = json.loads(linea.decode('utf-8'))
+                except ValueError:
+                    print(f"⚠️ Línea dañada en el diario (byte {offset - len(linea)}), se omite")
+                    continue
+                filas.append([registro.get(campo) for campo in CAMPOS_MOVIMIENTO])
+
+        return filas, offset
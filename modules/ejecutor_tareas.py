@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⚙️ modules/ejecutor_tareas.py - EJECUTOR DE TAREAS PESADAS DEL BOT
+==================================================================
+
+Los handlers del bot son async: si llaman directamente a funciones
+bloqueantes (render de matplotlib a 300 dpi, armado de un PDF con
+ReportLab, lectura/escritura de Excel) congelan todo el bucle de
+Application.run_polling y los demás operadores esperan.
+
+Este módulo ofrece dos grupos de trabajadores acotados:
+
+- Hilos (ejecutar_io): lectura/escritura de archivos, Excel, fotos.
+- Procesos (ejecutar_render): gráficas de matplotlib y PDFs de ReportLab,
+  que usan CPU y no liberan el GIL.
+
+Cada tarea tiene un tiempo máximo. Si se excede, el handler recibe
+TareaExcedioTiempo y puede avisar al usuario; el bot sigue atendiendo.
+Si ya hay demasiadas tareas en cola, se rechaza la nueva con
+EjecutorOcupado en lugar de acumular trabajo sin límite.
+
+Los procesos de render son de GrupoProcesos y no de ProcessPoolExecutor:
+cada trabajador tiene su propia conexión, así un render que excede su
+tiempo (o un proceso que se cae) se detiene y se reemplaza solo, sin
+afectar los renders de los demás operadores.
+"""
+
+import time
+import queue
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .config import (HILOS_EJECUTOR_IO, PROCESOS_EJECUTOR_RENDER, MAX_TAREAS_PENDIENTES,
+                     TIMEOUT_TAREA_IO, TIMEOUT_TAREA_RENDER)
+from .metricas import Metricas
+
+
+class TareaExcedioTiempo(Exception):
+    """La tarea no terminó dentro de su tiempo máximo"""
+
+
+class EjecutorOcupado(Exception):
+    """Hay demasiadas tareas pendientes para aceptar una nueva"""
+
+
+def _ejecutar_con_metricas(funcion, *args):
+    """Corre en el proceso trabajador: devuelve el resultado y las métricas acumuladas"""
+    resultado = funcion(*args)
+    return resultado, Metricas.extraer()
+
+
+def _trabajador_render(conexion):
+    """Proceso trabajador: ejecuta las tareas que llegan por la conexión hasta recibir None"""
+    while True:
+        try:
+            tarea = conexion.recv()
+        except EOFError:
+            return
+        except Exception as e:
+            # La tarea llegó pero no se pudo reconstruir (módulo o función inexistente)
+            conexion.send((False, e))
+            continue
+        if tarea is None:
+            return
+
+        funcion, args = tarea
+        try:
+            respuesta = (True, funcion(*args))
+        except Exception as e:
+            respuesta = (False, e)
+        try:
+            conexion.send(respuesta)
+        except Exception as e:
+            # Resultado o excepción que no se puede serializar
+            conexion.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class _Puesto:
+    """Un trabajador de GrupoProcesos: su proceso, su conexión y la tarea en curso"""
+
+    def __init__(self):
+        self.proceso = None
+        self.conexion = None
+        self.futuro = None
+        self.descartar = False
+
+
+class GrupoProcesos:
+    """Procesos trabajadores que se reemplazan de a uno
+
+    Misma interfaz que ProcessPoolExecutor para EjecutorTareas (submit y
+    shutdown), más terminar(futuro): detiene solo el proceso que ejecuta
+    esa tarea. Cada puesto tiene un hilo en este proceso que le pasa las
+    tareas de la cola; su proceso se crea con la primera tarea y se
+    conserva (con matplotlib y ReportLab ya importados) para las siguientes.
+    """
+
+    def __init__(self, max_workers, mp_context):
+        self._contexto = mp_context
+        self._cola = queue.Queue()
+        self._lock = threading.Lock()
+        self._cerrado = False
+        self._puestos = [_Puesto() for _ in range(max_workers)]
+        self._hilos = [threading.Thread(target=self._atender, args=(puesto,), daemon=True,
+                                        name=f"bot-render-{numero}")
+                       for numero, puesto in enumerate(self._puestos, 1)]
+        for hilo in self._hilos:
+            hilo.start()
+
+    def submit(self, funcion, *args):
+        futuro = Future()
+        with self._lock:
+            if self._cerrado:
+                raise RuntimeError("El grupo de procesos está cerrado")
+            self._cola.put((futuro, funcion, args))
+        return futuro
+
+    def terminar(self, futuro):
+        """Detiene el proceso que está ejecutando futuro (los demás siguen)
+
+        Returns:
+            bool: True si la tarea estaba en un proceso y se detuvo
+        """
+        with self._lock:
+            for puesto in self._puestos:
+                if puesto.futuro is futuro:
+                    puesto.descartar = True
+                    puesto.proceso.terminate()
+                    return True
+        return False
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        with self._lock:
+            self._cerrado = True
+        if cancel_futures:
+            while True:
+                try:
+                    trabajo = self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if trabajo is not None:
+                    trabajo[0].cancel()
+        for _ in self._hilos:
+            self._cola.put(None)
+        if wait:
+            for hilo in self._hilos:
+                hilo.join()
+
+    # ===============================
+    # PUESTOS (un hilo por trabajador)
+    # ===============================
+
+    def _iniciar(self, puesto):
+        if puesto.descartar or (puesto.proceso is not None and not puesto.proceso.is_alive()):
+            self._detener(puesto)
+        if puesto.proceso is None:
+            propia, del_trabajador = self._contexto.Pipe()
+            proceso = self._contexto.Process(target=_trabajador_render, args=(del_trabajador,), daemon=True)
+            proceso.start()
+            del_trabajador.close()
+            puesto.proceso, puesto.conexion = proceso, propia
+
+    def _detener(self, puesto, espera=0):
+        """Cierra la conexión y espera (o detiene) el proceso del puesto"""
+        if puesto.proceso is not None:
+            if espera:
+                puesto.proceso.join(espera)
+            if puesto.proceso.is_alive():
+                puesto.proceso.terminate()
+            puesto.proceso.join()
+            puesto.conexion.close()
+        puesto.proceso = puesto.conexion = None
+        puesto.descartar = False
+
+    def _atender(self, puesto):
+        while True:
+            trabajo = self._cola.get()
+            if trabajo is None:
+                break
+            futuro, funcion, args = trabajo
+            if not futuro.set_running_or_notify_cancel():
+                continue  # Cancelada mientras esperaba en la cola
+
+            try:
+                self._iniciar(puesto)
+                with self._lock:
+                    puesto.futuro = futuro
+                puesto.conexion.send((funcion, args))
+                exito, valor = puesto.conexion.recv()
+            except (EOFError, OSError) as e:
+                # El proceso se detuvo (tiempo excedido) o se cayó: se reemplaza en la próxima tarea
+                puesto.descartar = True
+                exito, valor = False, BrokenProcessPool(f"El proceso de render terminó: {e!r}")
+            except Exception as e:
+                exito, valor = False, e  # La tarea no se pudo enviar (argumentos no serializables)
+
+            # Primero se libera el puesto: terminar() ya no puede alcanzar a este proceso
+            with self._lock:
+                puesto.futuro = None
+            if exito:
+                futuro.set_result(valor)
+            else:
+                futuro.set_exception(valor)
+
+        if puesto.conexion is not None:
+            try:
+                puesto.conexion.send(None)
+            except OSError:
+                pass
+        self._detener(puesto, espera=5)
+
+
+class EjecutorTareas:
+    """Grupos de hilos y procesos compartidos por todos los handlers"""
+
+    _hilos = None
+    _procesos = None
+    _pendientes = 0
+    _lock = threading.Lock()
+
+    # ===============================
+    # GRUPOS DE TRABAJADORES
+    # ===============================
+
+    @staticmethod
+    def _obtener_hilos():
+        with EjecutorTareas._lock:
+            if EjecutorTareas._hilos is None:
+                EjecutorTareas._hilos = ThreadPoolExecutor(
+                    max_workers=HILOS_EJECUTOR_IO, thread_name_prefix="bot-io"
+                )
+            return EjecutorTareas._hilos
+
+    @staticmethod
+    def _obtener_procesos():
+        with EjecutorTareas._lock:
+            if EjecutorTareas._procesos is None:
+                # "spawn": los procesos no heredan los hilos ni el bucle del bot
+                EjecutorTareas._procesos = GrupoProcesos(
+                    max_workers=PROCESOS_EJECUTOR_RENDER,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return EjecutorTareas._procesos
+
+    # ===============================
+    # EJECUCIÓN CON TIEMPO MÁXIMO
+    # ===============================
+
+    @staticmethod
+    async def _ejecutar(ejecutor, grupo, funcion, args, timeout):
+        nombre = getattr(funcion, "__qualname__", str(funcion))
+        with EjecutorTareas._lock:
+            if EjecutorTareas._pendientes >= MAX_TAREAS_PENDIENTES:
+                Metricas.incrementar("plamph_tareas_total", grupo=grupo, resultado="rechazada")
+                raise EjecutorOcupado(f"{EjecutorTareas._pendientes} tareas pendientes")
+            EjecutorTareas._pendientes += 1
+
+        inicio = time.perf_counter()
+        resultado_tarea = "error"
+        try:
+            if grupo == "render":
+                futuro = ejecutor.submit(_ejecutar_con_metricas, funcion, *args)
+            else:
+                futuro = ejecutor.submit(funcion, *args)
+            try:
+                resultado = await asyncio.wait_for(asyncio.wrap_future(futuro), timeout)
+            except asyncio.TimeoutError:
+                # Si aún no empezó se cancela. Si está corriendo, un hilo termina
+                # solo; un proceso se detiene y se reemplaza (los demás siguen)
+                if not futuro.cancel() and grupo == "render" and ejecutor.terminar(futuro):
+                    print(f"⚠️ Se detuvo el proceso que ejecutaba {nombre}")
+                resultado_tarea = "tiempo_excedido"
+                print(f"⏱️ Tarea {nombre} excedió {timeout} s")
+                raise TareaExcedioTiempo(f"{nombre} excedió {timeout} s")
+            if grupo == "render":
+                resultado, metricas_proceso = resultado
+                Metricas.combinar(metricas_proceso)
+            resultado_tarea = "ok"
+            return resultado
+        finally:
+            with EjecutorTareas._lock:
+                EjecutorTareas._pendientes -= 1
+            Metricas.observar("plamph_tarea_segundos", time.perf_counter() - inicio, grupo=grupo, tarea=nombre)
+            Metricas.incrementar("plamph_tareas_total", grupo=grupo, resultado=resultado_tarea)
+
+    @staticmethod
+    async def ejecutar_io(funcion, *args, timeout=TIMEOUT_TAREA_IO):
+        """Ejecuta una función bloqueante de E/S en el grupo de hilos"""
+        return await EjecutorTareas._ejecutar(EjecutorTareas._obtener_hilos(), "io", funcion, args, timeout)
+
+    @staticmethod
+    async def ejecutar_render(funcion, *args, timeout=TIMEOUT_TAREA_RENDER):
+        """Ejecuta una gráfica o un PDF en el grupo de procesos
+
+        La función debe poder importarse desde un módulo y retornar datos
+        simples, normalmente la ruta del archivo generado. Con un
+        MetodoDiferido (por ejemplo GraphicsGenerator.generar_grafica_cemento
+        por nombre) el módulo se importa solo en el proceso trabajador.
+        """
+        # Si el proceso se cae, esta tarea recibe BrokenProcessPool y el
+        # grupo lo reemplaza: no hace falta descartar el grupo entero
+        return await EjecutorTareas._ejecutar(EjecutorTareas._obtener_procesos(), "render",
+                                              funcion, args, timeout)
+
+    @staticmethod
+    def tareas_pendientes():
+        """Número de tareas en cola o en ejecución"""
+        return EjecutorTareas._pendientes
+
+    @staticmethod
+    def cerrar():
+        """Detiene los trabajadores (al apagar el bot)"""
+        with EjecutorTareas._lock:
+            hilos, EjecutorTareas._hilos = EjecutorTareas._hilos, None
+            procesos, EjecutorTareas._procesos = EjecutorTareas._procesos, None
+        for ejecutor in (hilos, procesos):
+            if ejecutor is not None:
+                ejecutor.shutdown(wait=True, cancel_futures=True)
+
+
+# Profundidad de la cola, leída cada vez que se exportan las métricas
+Metricas.establecer("plamph_tareas_pendientes", EjecutorTareas.tareas_pendientes)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+✍️ modules/escritor_movimientos.py - ESCRITOR ÚNICO DE MOVIMIENTOS DEL BOT
+=========================================================================
+
+Todos los handlers del bot registran movimientos a través de una cola
+asyncio con un solo escritor:
+
+    exito = await escritor_movimientos.registrar(fecha, hora, material, ...)
+
+El escritor toma de la cola todos los movimientos que esperan (hasta
+MAX_LOTE_ESCRITURA) y los guarda con una sola llamada a
+ExcelManager.guardar_materiales_lote en el grupo de hilos: una escritura
+del diario, un fsync y una actualización del libro de stock y del consumo
+diario para todo el lote. Si varios operadores confirman a la vez, sus
+movimientos se agrupan en vez de competir por el archivo.
+
+Entre procesos (bot, consola, scripts) el orden lo garantiza el bloqueo
+de archivo de ExcelManager (modules/bloqueo_archivos.py).
+"""
+
+import asyncio
+
+from .config import MAX_LOTE_ESCRITURA
+from .excel_manager import ExcelManager
+from .ejecutor_tareas import EjecutorTareas, EjecutorOcupado
+from .metricas import Metricas
+
+# Pausa antes de reintentar un lote si el grupo de hilos está lleno
+ESPERA_REINTENTO_ESCRITURA = 0.5
+
+
+class EscritorMovimientos:
+    """Cola de movimientos con un único escritor que los guarda por lotes"""
+
+    def __init__(self, maximo=MAX_LOTE_ESCRITURA):
+        """
+        Args:
+            maximo: Movimientos como máximo por lote
+        """
+        self._maximo = maximo
+        self._cola = None
+        self._tarea = None
+        self._cerrando = False
+
+    def iniciar(self):
+        """Se llama desde el bucle del bot; arranca el escritor"""
+        self._cola = asyncio.Queue()
+        self._cerrando = False
+        self._tarea = asyncio.get_running_loop().create_task(self._escribir())
+
+    async def registrar(self, fecha, hora, material, proveedor, tipo_movimiento, cantidad, observaciones):
+        """Encola un movimiento y espera a que quede guardado
+
+        Returns:
+            bool: True si el movimiento se guardó
+        """
+        if self._tarea is None or self._tarea.done() or self._cerrando:
+            # Sin escritor (por ejemplo fuera del bot): guardar directamente
+            return await EjecutorTareas.ejecutar_io(
+                ExcelManager.guardar_material,
+                fecha, hora, material, proveedor, tipo_movimiento, cantidad, observaciones,
+                timeout=None
+            )
+
+        futuro = asyncio.get_running_loop().create_future()
+        self._cola.put_nowait(((fecha, hora, material, proveedor, tipo_movimiento, cantidad, observaciones), futuro))
+        return await futuro
+
+    async def detener(self):
+        """Guarda lo que quede en la cola y detiene el escritor"""
+        if self._tarea is None:
+            return
+        self._cerrando = True
+        self._cola.put_nowait(None)
+        await self._tarea
+        self._tarea = None
+
+    # ===============================
+    # ESCRITOR (en el bucle del bot)
+    # ===============================
+
+    def _tomar_lote(self, primero):
+        """El primer pedido y los que ya esperan en la cola, hasta el máximo"""
+        lote = [primero]
+        while len(lote) < self._maximo and not self._cola.empty():
+            lote.append(self._cola.get_nowait())
+        return lote
+
+    async def _guardar(self, filas):
+        while True:
+            try:
+                # Sin límite de tiempo: un hilo no se puede cancelar y el movimiento
+                # podría guardarse después de informarlo como fallido. La espera ya
+                # está acotada por el bloqueo del diario (TIMEOUT_BLOQUEO_ARCHIVOS)
+                return await EjecutorTareas.ejecutar_io(ExcelManager.guardar_materiales_lote, filas, False,
+                                                        timeout=None)
+            except EjecutorOcupado:
+                # Un movimiento confirmado no se descarta: esperar a que haya lugar
+                await asyncio.sleep(ESPERA_REINTENTO_ESCRITURA)
+
+    async def _escribir(self):
+        terminar = False
+        while not terminar:
+            lote = self._tomar_lote(await self._cola.get())
+            if None in lote:
+                terminar = True
+                lote = [pedido for pedido in lote if pedido is not None]
+            if not lote:
+                continue
+
+            try:
+                registrados = await self._guardar([movimiento for movimiento, _ in lote])
+                exito = registrados == len(lote)
+            except Exception as e:
+                print(f"❌ Error guardando lote de {len(lote)} movimientos: {e}")
+                exito = False
+
+            Metricas.incrementar("plamph_escrituras_total", resultado="ok" if exito else "error")
+            Metricas.incrementar("plamph_movimientos_escritos_total", len(lote))
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_result(exito)
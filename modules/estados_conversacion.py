@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+💬 modules/estados_conversacion.py - ESTADOS DE CONVERSACIÓN EN MEMORIA
+======================================================================
+
+Los estados de conversación (qué material eligió cada operador, qué
+cantidad falta, etc.) viven en memoria; el archivo JSON es solo una copia
+para sobrevivir a un reinicio del bot.
+
+- Se lee el archivo una vez, al iniciar.
+- Cada cambio de un usuario serializa solo la entrada de ese usuario.
+- Un guardado diferido agrupa los cambios de RETARDO_GUARDADO_ESTADOS
+  segundos y escribe el archivo de forma atómica (temporal + os.replace).
+
+Así el costo en disco por mensaje no crece con el número de operadores.
+"""
+
+import os
+import json
+import threading
+
+from .config import RETARDO_GUARDADO_ESTADOS
+
+
+class EstadosConversacion:
+    """Estados de conversación por usuario con guardado diferido y atómico
+
+    Se usa como un diccionario {user_id: estado}. Asignar o borrar un
+    usuario lo marca como modificado; si el estado se cambia en el lugar
+    (estado["cantidad"] = ...) hay que llamar a marcar_modificado(user_id).
+    """
+
+    def __init__(self, archivo, retardo=RETARDO_GUARDADO_ESTADOS):
+        self.archivo = archivo
+        self.retardo = retardo
+        self._estados = {}
+        self._fragmentos = {}      # user_id -> '"user_id": {...}' ya serializado
+        self._modificados = set()  # usuarios cambiados desde el último guardado
+        self._temporizador = None
+        self._lock = threading.Lock()
+        self._lock_escritura = threading.Lock()  # un solo guardado a la vez
+
+    # ===============================
+    # ACCESO TIPO DICCIONARIO
+    # ===============================
+
+    def __contains__(self, user_id):
+        return user_id in self._estados
+
+    def __getitem__(self, user_id):
+        return self._estados[user_id]
+
+    def __setitem__(self, user_id, estado):
+        self._estados[user_id] = estado
+        self.marcar_modificado(user_id)
+
+    def __delitem__(self, user_id):
+        del self._estados[user_id]
+        self.marcar_modificado(user_id)
+
+    def __len__(self):
+        return len(self._estados)
+
+    def get(self, user_id, defecto=None):
+        return self._estados.get(user_id, defecto)
+
+    def eliminar(self, user_id):
+        """Borra el estado del usuario si existe"""
+        if user_id in self._estados:
+            del self[user_id]
+
+    # ===============================
+    # PERSISTENCIA
+    # ===============================
+
+    def cargar(self):
+        """Lee el archivo (solo al iniciar); un archivo dañado deja los estados vacíos"""
+        estados = {}
+        try:
+            if os.path.exists(self.archivo):
+                with open(self.archivo, 'r', encoding='utf-8') as f:
+                    estados = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Estados de conversación no legibles ({self.archivo}): {e}")
+            estados = {}
+
+        with self._lock:
+            self._estados = estados
+            self._fragmentos = {user_id: self._serializar(user_id, estado)
+                                for user_id, estado in estados.items()}
+            self._modificados.clear()
+
+    @staticmethod
+    def _serializar(user_id, estado):
+        return json.dumps(str(user_id)) + ": " + json.dumps(estado, ensure_ascii=False)
+
+    def marcar_modificado(self, user_id):
+        """Registra el cambio de un usuario y programa el guardado diferido"""
+        with self._lock:
+            if user_id in self._estados:
+                self._fragmentos[user_id] = self._serializar(user_id, self._estados[user_id])
+            else:
+                self._fragmentos.pop(user_id, None)
+            self._modificados.add(user_id)
+
+            if self._temporizador is None:
+                self._temporizador = threading.Timer(self.retardo, self.guardar)
+                self._temporizador.daemon = True
+                self._temporizador.start()
+
+    def pendientes(self):
+        """Número de usuarios con cambios aún no escritos"""
+        return len(self._modificados)
+
+    def guardar(self):
+        """Escribe los cambios pendientes (no hace nada si no hay)"""
+        with self._lock_escritura:
+            return self._escribir()
+
+    def _escribir(self):
+        with self._lock:
+            self._temporizador = None
+            if not self._modificados:
+                return True
+            contenido = "{" + ",\n".join(self._fragmentos.values()) + "}\n"
+            modificados = self._modificados
+            self._modificados = set()
+
+        try:
+            temporal = self.archivo + ".tmp"
+            with open(temporal, 'w', encoding='utf-8') as f:
+                f.write(contenido)
+            os.replace(temporal, self.archivo)
+            return True
+        except Exception as e:
+            print(f"Error guardando estados ({self.archivo}): {e}")
+            # Reintentar en el próximo guardado
+            with self._lock:
+                self._modificados |= modificados
+            return False
+
+    def cerrar(self):
+        """Cancela el guardado diferido y escribe lo pendiente (al apagar el bot)"""
+        with self._lock:
+            temporizador, self._temporizador = self._temporizador, None
+        if temporizador is not None:
+            temporizador.cancel()
+        return self.guardar()
@@ -4,11 +4,38 @@
 📊 modules/excel_manager.py - GESTIÓN DE ARCHIVOS EXCEL
 """
 
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
 from datetime import datetime
 import os
+import time
 from .config import *
+from .carga_diferida import ModuloDiferido
+from .diario_movimientos import DiarioMovimientos, CAMPOS_MOVIMIENTO
+from .libro_stock import LibroStock
+from .consumo_diario import ConsumoDiario
+from .clasificacion import id_material, MATERIAL_GASOLINA, MATERIAL_DIESEL
+from .cache_movimientos import CacheMovimientos
+from .metricas import Metricas
+from .bloqueo_archivos import bloqueo_de, ArchivoBloqueado
+
+# openpyxl se importa al primer uso (registrar un movimiento solo escribe el diario)
+openpyxl = ModuloDiferido("openpyxl")
+
+# Dos bloqueos entre hilos del bot y entre procesos (bot, consola, scripts):
+# - del diario: agregar movimientos y actualizar libro de stock y consumo
+#   diario; se tiene solo unos milisegundos
+# - del Excel: cargar, escribir y guardar el libro de materiales (segundos)
+# La exportación toma el del Excel y, solo para leer los pendientes y para
+# publicar el archivo nuevo, el del diario; nunca al revés
+_lock_diario = bloqueo_de(ARCHIVO_DIARIO_MATERIALES)
+_lock_materiales = bloqueo_de(ARCHIVO_EXCEL_MATERIALES)
+
+# Propiedad personalizada del Excel de materiales con el byte del diario
+# exportado en su último guardado (ver reconciliar_diario)
+PROPIEDAD_DIARIO_EXPORTADO = "plamph_diario_exportado"
+
+# Funciones a llamar después de cada movimiento registrado (por ejemplo el
+# pre-dibujo de gráficas del bot); se ejecutan en el hilo que lo registró
+_oyentes_movimientos = []
 
 class ExcelManager:
     """
@@ -19,6 +46,8 @@ class ExcelManager:
     @staticmethod
     def verificar_y_crear_archivos():
         """Verifica y crea archivos Excel si no existen - EXACTAMENTE TU LÓGICA"""
+        asegurar_directorios()
+        
         archivos = [
             (ARCHIVO_EXCEL_MATERIALES, ExcelManager.crear_estructura_materiales),
             (ARCHIVO_EXCEL_EQUIPOS, ExcelManager.crear_estructura_equipos),
@@ -26,15 +55,20 @@ class ExcelManager:
         ]
         
         for archivo, funcion_crear in archivos:
-            if not os.path.exists(archivo):
-                print(f"📄 Creando archivo: {archivo}")
-                funcion_crear(archivo)
-            else:
-                print(f"✅ Archivo existe: {archivo}")
+            with bloqueo_de(archivo):
+                if not os.path.exists(archivo):
+                    print(f"📄 Creando archivo: {archivo}")
+                    funcion_crear(archivo)
+                else:
+                    print(f"✅ Archivo existe: {archivo}")
+        
+        ExcelManager.reconciliar_diario()
     
     @staticmethod
     def crear_estructura_materiales(archivo):
         """Crea estructura del archivo de materiales - EXACTAMENTE TU LÓGICA"""
+        from openpyxl.styles import Font, PatternFill, Alignment
+        
         libro = openpyxl.Workbook()
         hoja = libro.active
         hoja.title = "Inventario Materiales"
@@ -61,11 +95,14 @@ class ExcelManager:
         titulo.alignment = Alignment(horizontal="center", vertical="center")
         
         libro.save(archivo)
+        CacheMovimientos.invalidar(archivo)
         print(f"✅ Estructura de materiales creada: {archivo}")
     
     @staticmethod
     def crear_estructura_equipos(archivo):
         """Crea estructura del archivo de equipos"""
+        from openpyxl.styles import Font, PatternFill, Alignment
+        
         libro = openpyxl.Workbook()
         hoja = libro.active
         hoja.title = "Inventario Equipos"
@@ -94,6 +131,8 @@ class ExcelManager:
     @staticmethod
     def crear_estructura_produccion(archivo):
         """Crea estructura del archivo de producción"""
+        from openpyxl.styles import Font, PatternFill, Alignment
+        
         libro = openpyxl.Workbook()
         hoja = libro.active
         hoja.title = "Registro Producción"
@@ -121,9 +160,116 @@ class ExcelManager:
     
     @staticmethod
     def guardar_material(fecha, hora, material, proveedor, tipo_movimiento, cantidad, observaciones):
-        """Guarda un material en Excel - EXACTAMENTE TU LÓGICA ACTUAL"""
+        """Registra un movimiento de material en el diario (costo constante)
+
+        El Excel se actualiza en lote con exportar_excel_materiales(), que se
+        ejecuta antes de cada lectura y periódicamente desde el bot.
+        """
+        try:
+            with _lock_diario:
+                DiarioMovimientos.registrar(
+                    fecha, hora, material, proveedor, tipo_movimiento, cantidad, observaciones
+                )
+                ExcelManager._actualizar_acumulados()
+        except Exception as e:
+            print(f"Error guardando material: {e}")
+            return False
+        
+        ExcelManager._notificar_movimientos()
+        return True
+    
+    @staticmethod
+    def guardar_materiales_lote(movimientos, exportar=True):
+        """Registra varios movimientos de una vez
+        
+        Todo el lote se agrega al diario con una sola escritura, el libro de
+        stock y el consumo diario se actualizan una vez y, si exportar es
+        True, el Excel se abre y guarda una sola vez para todo el lote.
+        
+        Args:
+            movimientos: Iterable de filas (fecha, hora, material, proveedor,
+                         tipo_movimiento, cantidad, observaciones) o de
+                         diccionarios con las claves de CAMPOS_MOVIMIENTO
+            exportar: Copiar el lote al Excel antes de retornar
+        
+        Returns:
+            int: Número de movimientos registrados (0 si hubo un error)
+        """
+        filas = [[mov.get(campo) for campo in CAMPOS_MOVIMIENTO] if isinstance(mov, dict) else list(mov)
+                 for mov in movimientos]
+        if not filas:
+            return 0
+        
+        try:
+            with _lock_diario:
+                registrados = DiarioMovimientos.registrar_lote(filas)
+                ExcelManager._actualizar_acumulados()
+        except Exception as e:
+            print(f"Error guardando lote de materiales: {e}")
+            return 0
+        
+        # El lote ya es durable en el diario: si el Excel está ocupado se exporta después
+        if exportar:
+            ExcelManager.exportar_excel_materiales()
+        
+        ExcelManager._notificar_movimientos()
+        return registrados
+    
+    @staticmethod
+    def _actualizar_acumulados():
+        """Aplica los movimientos nuevos del diario al libro de stock y al consumo diario"""
+        # Los movimientos ya son durables; un fallo aquí solo obliga a reconstruir
+        try:
+            LibroStock.actualizar()
+        except Exception as e:
+            print(f"⚠️ Error actualizando libro de stock: {e}")
+        try:
+            ConsumoDiario.actualizar()
+        except Exception as e:
+            print(f"⚠️ Error actualizando consumo diario: {e}")
+    
+    @staticmethod
+    def _notificar_movimientos():
+        for oyente in _oyentes_movimientos:
+            try:
+                oyente()
+            except Exception as e:
+                print(f"⚠️ Error notificando movimiento: {e}")
+    
+    @staticmethod
+    def suscribir_movimientos(funcion):
+        """Registra funcion() para que se llame después de cada movimiento guardado"""
+        if funcion not in _oyentes_movimientos:
+            _oyentes_movimientos.append(funcion)
+    
+    @staticmethod
+    def exportar_excel_materiales():
+        """Copia al Excel los movimientos pendientes del diario con una sola carga y guardado
+        
+        Returns:
+            int: Número de movimientos exportados
+        """
+        try:
+            with _lock_materiales:
+                return ExcelManager._exportar_pendientes()
+        except ArchivoBloqueado as e:
+            print(f"⚠️ Exportación postergada: {e}")
+            return 0
+    
+    @staticmethod
+    def _exportar_pendientes():
+        """Se llama con el bloqueo del Excel tomado"""
+        with _lock_diario:
+            filas, offset = DiarioMovimientos.leer_pendientes()
+            if not filas:
+                if offset != DiarioMovimientos.obtener_offset_exportado():
+                    DiarioMovimientos.marcar_exportado(offset)  # Solo había líneas dañadas
+                return 0
+        
+        inicio = time.perf_counter()
         try:
             if not os.path.exists(ARCHIVO_EXCEL_MATERIALES):
+                asegurar_directorios()
                 ExcelManager.crear_estructura_materiales(ARCHIVO_EXCEL_MATERIALES)
             
             libro = openpyxl.load_workbook(ARCHIVO_EXCEL_MATERIALES)
@@ -134,112 +280,180 @@ class ExcelManager:
             while hoja.cell(row=fila, column=1).value is not None:
                 fila += 1
             
-            # Guardar datos
-            datos = [fecha, hora, material, proveedor, tipo_movimiento, cantidad, observaciones]
+            for datos in filas:
+                for col, dato in enumerate(datos, 1):
+                    hoja.cell(row=fila, column=col, value=dato)
+                fila += 1
+            
+            # El offset va en el mismo guardado que las filas: si el proceso se corta
+            # antes de marcar_exportado, reconciliar_diario lo recupera del Excel
+            ExcelManager._anotar_offset_exportado(libro, offset)
             
-            for col, dato in enumerate(datos, 1):
-                hoja.cell(row=fila, column=col, value=dato)
+            # Guardar en un temporal y reemplazar: quien lee el Excel desde otro
+            # proceso nunca ve un archivo a medio escribir
+            temporal = ARCHIVO_EXCEL_MATERIALES + ".tmp.xlsx"
+            libro.save(temporal)
             
-            libro.save(ARCHIVO_EXCEL_MATERIALES)
-            return True
+            # Publicar el Excel, avanzar el offset y confirmar los acumulados juntos:
+            # quien registre en ese momento nunca ve el Excel nuevo con el offset viejo
+            with _lock_diario:
+                # Si el libro de stock estaba al día, seguirá al día después de exportar
+                libro_stock_valido = LibroStock.firma_valida()
+                consumo_valido = ConsumoDiario.firma_valida()
+                os.replace(temporal, ARCHIVO_EXCEL_MATERIALES)
+                CacheMovimientos.invalidar(ARCHIVO_EXCEL_MATERIALES)
+                DiarioMovimientos.marcar_exportado(offset)
+                if libro_stock_valido:
+                    LibroStock.confirmar_exportacion()
+                if consumo_valido:
+                    ConsumoDiario.confirmar_exportacion()
+            Metricas.observar("plamph_exportacion_excel_segundos", time.perf_counter() - inicio)
+            Metricas.incrementar("plamph_movimientos_exportados_total", len(filas))
+            return len(filas)
             
         except Exception as e:
-            print(f"Error guardando material: {e}")
-            return False
+            print(f"Error exportando diario a Excel: {e}")
+            return 0
     
     @staticmethod
-    def obtener_stock_materiales():
-        """Obtiene el stock actual de materiales - EXACTAMENTE TU LÓGICA"""
+    def _anotar_offset_exportado(libro, offset):
+        """Guarda en las propiedades del libro hasta qué byte del diario contiene"""
+        from openpyxl.packaging.custom import StringProperty
+        
+        propiedades = libro.custom_doc_props
+        propiedades.props = [p for p in propiedades.props if p.name != PROPIEDAD_DIARIO_EXPORTADO]
+        # Como texto: vt:i4 no alcanza para un diario de más de 2 GB
+        propiedades.append(StringProperty(name=PROPIEDAD_DIARIO_EXPORTADO, value=str(offset)))
+    
+    @staticmethod
+    def _offset_en_excel():
+        """Byte del diario anotado en el Excel de materiales, o None si no lo tiene"""
         if not os.path.exists(ARCHIVO_EXCEL_MATERIALES):
-            return {}
+            return None
+        # read_only: solo se leen las propiedades, no las hojas
+        libro = openpyxl.load_workbook(ARCHIVO_EXCEL_MATERIALES, read_only=True)
+        try:
+            for propiedad in libro.custom_doc_props.props:
+                if propiedad.name == PROPIEDAD_DIARIO_EXPORTADO:
+                    return int(propiedad.value)
+            return None
+        finally:
+            libro.close()
+    
+    @staticmethod
+    def reconciliar_diario():
+        """Corrige el offset exportado del diario con el que quedó en el Excel (al iniciar)
+        
+        Si un proceso se cortó entre reemplazar el Excel y anotar el offset en
+        ARCHIVO_DIARIO_EXPORTADO, esos movimientos se volverían a copiar al
+        Excel y a sumar en el libro de stock. El Excel lleva el offset de su
+        último guardado: si va más adelante, se toma ese y se reconstruyen
+        el libro de stock y el consumo diario.
         
+        Returns:
+            bool: True si hubo que corregir el offset
+        """
         try:
-            libro = openpyxl.load_workbook(ARCHIVO_EXCEL_MATERIALES)
-            hoja = libro.active
-            
-            stock = {}
-            
-            # Leer todos los movimientos
-            for fila in range(5, hoja.max_row + 1):
-                material = hoja.cell(row=fila, column=3).value
-                tipo_movimiento = hoja.cell(row=fila, column=5).value
-                cantidad = hoja.cell(row=fila, column=6).value
+            with _lock_materiales:
+                offset_excel = ExcelManager._offset_en_excel()
+                if offset_excel is None:
+                    return False
                 
-                if material and tipo_movimiento and cantidad:
-                    try:
-                        cantidad_num = float(str(cantidad).replace(",", "."))
-                        
-                        if material not in stock:
-                            stock[material] = 0
-                        
-                        if "Entrada" in str(tipo_movimiento):
-                            stock[material] += cantidad_num
-                        elif "Salida" in str(tipo_movimiento):
-                            stock[material] -= cantidad_num
-                            
-                    except (ValueError, TypeError):
-                        continue
-            
-            return stock
+                with _lock_diario:
+                    anterior = DiarioMovimientos.obtener_offset_exportado()
+                    # Un diario más corto que el offset es otro diario: no se toca
+                    if (offset_excel <= anterior or not os.path.exists(ARCHIVO_DIARIO_MATERIALES)
+                            or offset_excel > os.path.getsize(ARCHIVO_DIARIO_MATERIALES)):
+                        return False
+                    
+                    print(f"⚠️ Exportación interrumpida: offset del diario {anterior} -> {offset_excel} (según el Excel)")
+                    DiarioMovimientos.marcar_exportado(offset_excel)
+                    LibroStock.reconstruir()
+                    ConsumoDiario.reconstruir()
+                    return True
+        except Exception as e:
+            print(f"⚠️ No se pudo reconciliar el diario con el Excel: {e}")
+            return False
+    
+    @staticmethod
+    def sincronizar_diario():
+        """Exporta los movimientos pendientes del diario antes de leer el Excel"""
+        if DiarioMovimientos.hay_pendientes():
+            ExcelManager.exportar_excel_materiales()
+    
+    @staticmethod
+    def obtener_stock_materiales():
+        """Obtiene el stock actual de materiales desde el libro de saldos
+        
+        El libro se actualiza con cada movimiento registrado y solo se
+        reconstruye (recorriendo el Excel) si el archivo cambió fuera del bot.
+        """
+        try:
+            with _lock_diario:
+                return LibroStock.obtener_stock()
             
         except Exception as e:
             print(f"Error obteniendo stock: {e}")
             return {}
     
+    @staticmethod
+    def obtener_consumo_diario(predicado, desde=None, hasta=None):
+        """Consumo por día de los materiales que cumplen el predicado
+
+        Lee el acumulado por material y día (ConsumoDiario), que se actualiza
+        con cada movimiento; no recorre el historial del Excel.
+
+        Returns:
+            dict: {"dd/mm": cantidad} en orden cronológico
+        """
+        try:
+            with _lock_diario:
+                return ConsumoDiario.serie(predicado, desde, hasta)
+            
+        except Exception as e:
+            print(f"Error obteniendo consumo diario: {e}")
+            return {}
+    
     @staticmethod
     def obtener_datos_combustibles():
         """Obtiene datos específicos de combustibles - CORREGIDO: SIN DATOS FALSOS"""
         stock = ExcelManager.obtener_stock_materiales()
         
-        combustibles = {}
+        # CORRECCIÓN: Si no hay datos, devolver ceros (no datos falsos)
+        combustibles = {"gasolina": 0.0, "diesel": 0.0}
         
-        # Buscar gasolina y diesel en el stock REAL
+        # Buscar gasolina y diesel en el stock REAL (todos los nombres con que se registran)
+        claves = {MATERIAL_GASOLINA: "gasolina", MATERIAL_DIESEL: "diesel"}
         for material, cantidad in stock.items():
-            material_lower = material.lower()
-            if "gasolina" in material_lower:
-                combustibles["gasolina"] = max(0, cantidad)  # No permitir negativos
-            elif "diesel" in material_lower:
-                combustibles["diesel"] = max(0, cantidad)    # No permitir negativos
+            clave = claves.get(id_material(material))
+            if clave:
+                combustibles[clave] += cantidad
         
-        # CORRECCIÓN: Si no hay datos, devolver ceros (no datos falsos)
-        if "gasolina" not in combustibles:
-            combustibles["gasolina"] = 0.0
-        if "diesel" not in combustibles:
-            combustibles["diesel"] = 0.0
-        
-        return combustibles
+        # No permitir negativos
+        return {clave: max(0, cantidad) for clave, cantidad in combustibles.items()}
     
     @staticmethod
     def obtener_ultimos_movimientos(cantidad=10):
         """Obtiene los últimos movimientos registrados"""
+        ExcelManager.sincronizar_diario()
         if not os.path.exists(ARCHIVO_EXCEL_MATERIALES):
             return []
         
         try:
-            libro = openpyxl.load_workbook(ARCHIVO_EXCEL_MATERIALES)
-            hoja = libro.active
+            registros = CacheMovimientos.obtener_movimientos(ARCHIVO_EXCEL_MATERIALES)
             
             movimientos = []
             
-            # Leer desde la última fila hacia arriba
-            for fila in range(max(5, hoja.max_row - cantidad + 1), hoja.max_row + 1):
-                fecha = hoja.cell(row=fila, column=1).value
-                hora = hoja.cell(row=fila, column=2).value
-                material = hoja.cell(row=fila, column=3).value
-                proveedor = hoja.cell(row=fila, column=4).value
-                tipo = hoja.cell(row=fila, column=5).value
-                cantidad = hoja.cell(row=fila, column=6).value
-                observaciones = hoja.cell(row=fila, column=7).value
-                
-                if material and tipo and cantidad:
+            for mov in registros[-cantidad:] if cantidad > 0 else []:
+                if mov.material and mov.tipo and mov.cantidad:
                     movimientos.append({
-                        "fecha": str(fecha) if fecha else "",
-                        "hora": str(hora) if hora else "",
-                        "material": str(material),
-                        "proveedor": str(proveedor) if proveedor else "",
-                        "tipo": str(tipo),
-                        "cantidad": float(str(cantidad).replace(",", ".")) if cantidad else 0,
-                        "observaciones": str(observaciones) if observaciones else ""
+                        "fecha": str(mov.fecha) if mov.fecha else "",
+                        "hora": mov.hora or "",
+                        "material": mov.material,
+                        "proveedor": mov.proveedor or "",
+                        "tipo": mov.tipo,
+                        "cantidad": mov.cantidad,
+                        "observaciones": mov.observaciones or ""
                     })
             
             return list(reversed(movimientos))  # Más recientes primero
@@ -251,20 +465,15 @@ class ExcelManager:
     @staticmethod
     def contar_registros_materiales():
         """Cuenta el total de registros en materiales"""
+        ExcelManager.sincronizar_diario()
         if not os.path.exists(ARCHIVO_EXCEL_MATERIALES):
             return 0
         
         try:
-            libro = openpyxl.load_workbook(ARCHIVO_EXCEL_MATERIALES)
-            hoja = libro.active
-            
-            # Contar filas con datos (empezando desde fila 5)
-            contador = 0
-            for fila in range(5, hoja.max_row + 1):
-                if hoja.cell(row=fila, column=3).value:  # Si hay material
-                    contador += 1
+            movimientos = CacheMovimientos.obtener_movimientos(ARCHIVO_EXCEL_MATERIALES)
             
-            return contador
+            # Contar filas con datos
+            return sum(1 for mov in movimientos if mov.material)  # Si hay material
             
         except Exception as e:
             print(f"Error contando registros: {e}")
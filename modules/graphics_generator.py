@@ -16,8 +16,7 @@ Versión: 2.1 CORREGIDA
 
 import os
 import sys
-from datetime import datetime, timedelta
-import openpyxl
+import time
 
 # Importar configuración
 try:
@@ -29,13 +28,46 @@ except ImportError:
         # Configuración de respaldo
         ARCHIVO_EXCEL_MATERIALES = "datos/inventario_materiales.xlsx"
 
-# Verificar matplotlib
+# Gestor de Excel (para volcar el diario de movimientos antes de leer)
+# y tabla columnar de movimientos (NumPy)
+try:
+    from .excel_manager import ExcelManager
+    from .tabla_movimientos import MovimientosTable
+    from .cache_graficas import CacheGraficas
+    from .metricas import Metricas
+    from .traza import Traza, NIVEL_RESUMEN, NIVEL_FILA
+    from .clasificacion import es_material, MATERIAL_CEMENTO, MATERIAL_GASOLINA, MATERIAL_DIESEL
+except ImportError:
+    from modules.excel_manager import ExcelManager
+    from modules.tabla_movimientos import MovimientosTable
+    from modules.cache_graficas import CacheGraficas
+    from modules.metricas import Metricas
+    from modules.traza import Traza, NIVEL_RESUMEN, NIVEL_FILA
+    from modules.clasificacion import es_material, MATERIAL_CEMENTO, MATERIAL_GASOLINA, MATERIAL_DIESEL
+
+# Versión del diseño de las gráficas: forma parte de la clave de la caché
+# (subirla al cambiar el diseño de una gráfica invalida las anteriores)
+PLANTILLA_GRAFICAS = 2
+
+# Perfiles de dibujo según el destino de la gráfica
+# - "telegram": ancho fijo en píxeles (Telegram reduce las fotos a ~1280 px),
+#   sin la segunda pasada de bbox_inches='tight' (ya se usa tight_layout) y
+#   PNG optimizado: ~5 veces menos píxeles y menos tiempo de dibujo y envío
+# - "print": 300 dpi con recorte ajustado, para PDFs e impresión
+PERFILES_RENDER = {
+    "telegram": {"ancho_px": 1280, "bbox": None, "formato": "png", "optimizar": True},
+    "print": {"dpi": 300, "bbox": "tight", "formato": "png", "optimizar": False},
+}
+PERFIL_PREDETERMINADO = "print"
+
+# Verificar matplotlib (las gráficas usan plantillas con la API orientada a objetos)
 try:
     import matplotlib
     matplotlib.use('Agg')
-    import matplotlib.pyplot as plt
-    import matplotlib.dates as mdates
-    from matplotlib.patches import Patch
+    try:
+        from .plantillas_graficas import PlantillasGraficas, COLOR_OPTIMO, COLOR_BAJO, COLOR_CRITICO
+    except ImportError:
+        from modules.plantillas_graficas import PlantillasGraficas, COLOR_OPTIMO, COLOR_BAJO, COLOR_CRITICO
     GRAFICOS_DISPONIBLES = True
     print("✅ Matplotlib cargado para gráficos")
 except ImportError:
@@ -50,9 +82,58 @@ class GraphicsGenerator:
         """Verifica si matplotlib está disponible"""
         return GRAFICOS_DISPONIBLES
     
+    @staticmethod
+    def _opciones(perfil):
+        """Opciones de dibujo del perfil (también forman la clave de la caché)"""
+        if perfil not in PERFILES_RENDER:
+            print(f"⚠️ Perfil de gráfica desconocido: {perfil}, se usa {PERFIL_PREDETERMINADO}")
+            perfil = PERFIL_PREDETERMINADO
+        return dict(PERFILES_RENDER[perfil], perfil=perfil, plantilla=PLANTILLA_GRAFICAS)
+    
+    @staticmethod
+    def _guardar_imagen(plantilla, destino, opciones):
+        """Guarda la plantilla según el perfil (formato explícito: el destino es temporal)"""
+        if "ancho_px" in opciones:
+            dpi = opciones["ancho_px"] / plantilla.figura.get_figwidth()
+        else:
+            dpi = opciones["dpi"]
+        extra = {"pil_kwargs": {"optimize": True}} if opciones["optimizar"] else {}
+        plantilla.guardar(destino, format=opciones["formato"], dpi=dpi, bbox_inches=opciones["bbox"], **extra)
+    
+    @staticmethod
+    def _renderizar(tipo, ruta_cache, opciones, etiquetas, cantidades, colores, textos, nota=""):
+        """Dibuja la gráfica con su plantilla y la guarda en la caché"""
+        inicio_render = time.perf_counter()
+        plantilla = PlantillasGraficas.obtener(tipo)
+        with plantilla.lock:
+            plantilla.dibujar(etiquetas, cantidades, colores, textos, nota)
+            nombre_archivo = CacheGraficas.guardar(
+                ruta_cache, lambda destino: GraphicsGenerator._guardar_imagen(plantilla, destino, opciones))
+        GraphicsGenerator._registrar_render(tipo, inicio_render, opciones)
+        return nombre_archivo
+    
+    @staticmethod
+    def _registrar_render(tipo, inicio, opciones):
+        """Registra en las métricas el tiempo de dibujo de una gráfica"""
+        Metricas.observar("plamph_render_segundos", time.perf_counter() - inicio,
+                          grafica=tipo, perfil=opciones["perfil"])
+        Metricas.incrementar("plamph_graficas_total", grafica=tipo, resultado="render")
+    
+    @staticmethod
+    def _trazar_filas(tabla, codigos, categoria, solo_consumo=False):
+        """Un evento de traza por cada fila del Excel que suma al resultado"""
+        cantidades = tabla.cantidades_brutas if solo_consumo else tabla.cantidades
+        for i in tabla.indices(codigos, solo_consumo):
+            Traza.evento(NIVEL_FILA, "fila", categoria=categoria, fila=int(tabla.filas[i]),
+                         material=tabla.materiales[tabla.codigos[i]], fecha=str(tabla.fechas[i]),
+                         cantidad=float(cantidades[i]))
+    
     @staticmethod
     def _buscar_archivo_materiales():
         """Busca el archivo de materiales en diferentes ubicaciones"""
+        # Los movimientos nuevos viven en el diario hasta que se exportan
+        ExcelManager.sincronizar_diario()
+        
         ubicaciones = [
             "datos/inventario_materiales.xlsx",
             "inventario_materiales.xlsx",
@@ -61,7 +142,6 @@ class GraphicsGenerator:
         
         for ubicacion in ubicaciones:
             if os.path.exists(ubicacion):
-                print(f"📁 Usando archivo: {ubicacion}")
                 return ubicacion
         
         print("❌ No se encontró archivo de materiales")
@@ -78,77 +158,25 @@ class GraphicsGenerator:
             return {"gasolina": 0, "diesel": 0}
         
         try:
-            libro = openpyxl.load_workbook(archivo)
-            hoja = libro.active
-            
-            print(f"📊 Leyendo archivo con {hoja.max_row} filas")
-            
-            stock_gasolina = 0
-            stock_diesel = 0
-            
-            # Leer desde fila 5 (después de encabezados)
-            for row in range(5, hoja.max_row + 1):
-                try:
-                    material = hoja.cell(row=row, column=3).value    # Columna C: Material
-                    movimiento = hoja.cell(row=row, column=5).value  # Columna E: Movimiento  
-                    cantidad = hoja.cell(row=row, column=6).value    # Columna F: Cantidad
-                    
-                    if not material or not movimiento or not cantidad:
-                        continue
-                    
-                    # Convertir a texto y limpiar
-                    material_texto = str(material).lower().strip()
-                    movimiento_texto = str(movimiento).strip()
-                    
-                    # Convertir cantidad a número
-                    try:
-                        cantidad_num = float(str(cantidad).replace(",", "."))
-                    except:
-                        continue
-                    
-                    # CORRECCIÓN: Buscar combustibles en material
-                    es_gasolina = any(palabra in material_texto for palabra in 
-                                    ['gasolina', 'gasoline', 'nafta', 'bencina'])
-                    es_diesel = any(palabra in material_texto for palabra in 
-                                  ['diesel', 'diésel', 'gasoil', 'petróleo'])
-                    
-                    if not (es_gasolina or es_diesel):
-                        continue
-                    
-                    # CORRECCIÓN: Detectar tipo de movimiento con emojis
-                    es_entrada = ("📈" in movimiento_texto or 
-                                "entrada" in movimiento_texto.lower() or
-                                "Entrada" in movimiento_texto)
-                    
-                    es_salida = ("📉" in movimiento_texto or 
-                               "salida" in movimiento_texto.lower() or
-                               "Salida" in movimiento_texto)
-                    
-                    # Aplicar movimiento al stock
-                    if es_gasolina:
-                        if es_entrada:
-                            stock_gasolina += cantidad_num
-                            print(f"   ⛽ Gasolina +{cantidad_num} (Total: {stock_gasolina})")
-                        elif es_salida:
-                            stock_gasolina -= cantidad_num
-                            print(f"   ⛽ Gasolina -{cantidad_num} (Total: {stock_gasolina})")
-                    
-                    elif es_diesel:
-                        if es_entrada:
-                            stock_diesel += cantidad_num
-                            print(f"   ⛽ Diesel +{cantidad_num} (Total: {stock_diesel})")
-                        elif es_salida:
-                            stock_diesel -= cantidad_num
-                            print(f"   ⛽ Diesel -{cantidad_num} (Total: {stock_diesel})")
-                            
-                except Exception as e:
-                    continue
+            tabla = MovimientosTable.desde_excel(archivo)
+            
+            # CORRECCIÓN: Buscar combustibles por material reconocido (nombres y sinónimos)
+            # Entradas suman y salidas restan (columna con signo de la tabla)
+            codigos_gasolina = tabla.codigos_categoria(MATERIAL_GASOLINA)
+            codigos_diesel = tabla.codigos_categoria(MATERIAL_DIESEL)
+            stock_gasolina = tabla.saldo(codigos_gasolina)
+            stock_diesel = tabla.saldo(codigos_diesel)
+            
+            if Traza.activa(NIVEL_FILA):
+                GraphicsGenerator._trazar_filas(tabla, codigos_gasolina, "gasolina")
+                GraphicsGenerator._trazar_filas(tabla, codigos_diesel, "diesel")
             
             # Asegurar valores positivos
             stock_gasolina = max(0, stock_gasolina)
             stock_diesel = max(0, stock_diesel)
             
-            print(f"📊 Stock final - Gasolina: {stock_gasolina}L, Diesel: {stock_diesel}L")
+            Traza.evento(NIVEL_RESUMEN, "combustibles", archivo=archivo, movimientos=len(tabla),
+                         gasolina=stock_gasolina, diesel=stock_diesel)
             
             return {
                 "gasolina": stock_gasolina,
@@ -160,10 +188,12 @@ class GraphicsGenerator:
             return {"gasolina": 0, "diesel": 0}
     
     @staticmethod
-    def generar_grafica_combustibles():
+    def generar_grafica_combustibles(perfil=PERFIL_PREDETERMINADO):
         """
         Genera gráfica de stock actual de combustibles
         CORREGIDO: Usa datos reales del Excel
+
+        perfil: "telegram" para enviar por chat, "print" para PDFs e impresión
         """
         if not GRAFICOS_DISPONIBLES:
             print("❌ Matplotlib no disponible")
@@ -184,47 +214,23 @@ class GraphicsGenerator:
                 gasolina = 50
                 diesel = 75
             
-            # Crear gráfica
-            plt.figure(figsize=(10, 6))
+            opciones = GraphicsGenerator._opciones(perfil)
+            ruta_cache = CacheGraficas.ruta("combustibles", [gasolina, diesel], opciones)
+            if CacheGraficas.vigente(ruta_cache):
+                Metricas.incrementar("plamph_graficas_total", grafica="combustibles", resultado="cache")
+                print(f"♻️ Gráfica de combustibles desde caché: {ruta_cache}")
+                return ruta_cache
             
-            combustibles = ['Gasolina', 'Diesel']
             cantidades = [gasolina, diesel]
-            colores = ['#FF6B6B', '#4ECDC4']
-            
-            # Crear gráfica de barras
-            barras = plt.bar(combustibles, cantidades, color=colores, alpha=0.8, edgecolor='black')
-            
-            # Personalizar gráfica
-            plt.title('⛽ STOCK ACTUAL DE COMBUSTIBLES\nPlanta Municipal de Premoldeados - Tupiza', 
-                     fontsize=14, fontweight='bold', pad=20)
-            plt.ylabel('Cantidad (Litros)', fontsize=12)
-            plt.grid(True, alpha=0.3, axis='y')
-            
-            # Agregar valores en las barras
-            for barra, cantidad in zip(barras, cantidades):
-                altura = barra.get_height()
-                plt.text(barra.get_x() + barra.get_width()/2., altura + max(cantidades)*0.02,
-                        f'{cantidad:.0f}L', ha='center', va='bottom', fontweight='bold', fontsize=12)
-            
-            # Agregar líneas de referencia
-            plt.axhline(y=100, color='orange', linestyle='--', alpha=0.7, label='Nivel mínimo (100L)')
-            plt.axhline(y=200, color='green', linestyle='--', alpha=0.7, label='Nivel óptimo (200L)')
-            plt.legend()
-            
-            # Información adicional
             total = gasolina + diesel
-            plt.figtext(0.02, 0.02, f'Total combustible: {total:.0f} litros', 
-                       fontsize=10, style='italic')
-            
-            plt.tight_layout()
-            
-            # Crear directorio si no existe
-            os.makedirs("graficas", exist_ok=True)
-            
-            # Guardar gráfica
-            nombre_archivo = f"graficas/combustibles_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-            plt.savefig(nombre_archivo, dpi=300, bbox_inches='tight', facecolor='white')
-            plt.close()
+            nombre_archivo = GraphicsGenerator._renderizar(
+                "combustibles", ruta_cache, opciones,
+                etiquetas=['Gasolina', 'Diesel'],
+                cantidades=cantidades,
+                colores=['#FF6B6B', '#4ECDC4'],
+                textos=[f'{cantidad:.0f}L' for cantidad in cantidades],
+                nota=f'Total combustible: {total:.0f} litros'
+            )
             
             print(f"✅ Gráfica de combustibles generada: {nombre_archivo}")
             return nombre_archivo
@@ -236,78 +242,28 @@ class GraphicsGenerator:
             return None
     
     @staticmethod
-    def obtener_datos_cemento():
+    def obtener_datos_cemento(desde=None, hasta=None):
         """
         Obtiene datos de consumo de cemento - CORREGIDO PARA TU ARCHIVO
+
+        Lee el consumo acumulado por material y día (ConsumoDiario) en lugar
+        de recorrer el historial; desde/hasta limitan la ventana de fechas.
         """
-        archivo = GraphicsGenerator._buscar_archivo_materiales()
-        if not archivo:
-            return {}
-        
         try:
-            libro = openpyxl.load_workbook(archivo)
-            hoja = libro.active
-            
-            print(f"📊 Buscando cemento desde fila 4 hasta fila {hoja.max_row}...")
-            
-            consumo_por_fecha = {}
-            
-            # CORREGIDO: Empezar desde fila 4 (donde están tus datos)
-            for row in range(4, hoja.max_row + 1):
-                try:
-                    fecha = hoja.cell(row=row, column=1).value      # Columna A: Fecha
-                    material = hoja.cell(row=row, column=3).value   # Columna C: Material
-                    movimiento = hoja.cell(row=row, column=5).value # Columna E: Movimiento
-                    cantidad = hoja.cell(row=row, column=6).value   # Columna F: Cantidad
-                    
-                    if not material or not movimiento or not cantidad:
-                        continue
-                    
-                    # CORREGIDO: Buscar cemento (más flexible)
-                    material_texto = str(material).lower().strip()
-                    if "cemento" not in material_texto:
-                        continue
-                    
-                    print(f"   📦 Cemento encontrado en fila {row}: {material}")
-                    
-                    # CORREGIDO: Buscar salidas (más flexible)
-                    movimiento_texto = str(movimiento).strip()
-                    es_salida = (
-                        "📉" in movimiento_texto or 
-                        "salida" in movimiento_texto.lower() or
-                        "consumo" in movimiento_texto.lower() or
-                        "uso" in movimiento_texto.lower()
-                    )
-                    
-                    print(f"      Movimiento: '{movimiento_texto}' -> ¿Es salida? {es_salida}")
-                    
-                    if not es_salida:
-                        continue
-                    
-                    # Convertir cantidad a número
-                    try:
-                        cantidad_num = float(str(cantidad).replace(",", "."))
-                    except:
-                        print(f"      ❌ Error con cantidad: {cantidad}")
-                        continue
-                    
-                    # Procesar fecha
-                    if isinstance(fecha, datetime):
-                        fecha_str = fecha.strftime("%d/%m")
-                    else:
-                        fecha_str = str(fecha)[-5:] if fecha else "S/F"
-                    
-                    # Acumular consumo por fecha
-                    if fecha_str not in consumo_por_fecha:
-                        consumo_por_fecha[fecha_str] = 0
-                    
-                    consumo_por_fecha[fecha_str] += cantidad_num
-                    print(f"      ✅ Registrado: {fecha_str} = +{cantidad_num} bolsas")
-                    
-                except Exception as e:
-                    continue
-            
-            print(f"\n📊 Días con consumo de cemento: {len(consumo_por_fecha)}")
+            # CORREGIDO: Buscar cemento (más flexible) y sumar salidas/consumos por día
+            def es_cemento(nombre):
+                return es_material(nombre, MATERIAL_CEMENTO)
+            
+            consumo_por_fecha = ExcelManager.obtener_consumo_diario(es_cemento, desde, hasta)
+            
+            if Traza.activa(NIVEL_FILA):
+                archivo = GraphicsGenerator._buscar_archivo_materiales()
+                if archivo:
+                    tabla = MovimientosTable.desde_excel(archivo)
+                    GraphicsGenerator._trazar_filas(tabla, tabla.codigos_categoria(MATERIAL_CEMENTO),
+                                                    "cemento", solo_consumo=True)
+            Traza.evento(NIVEL_RESUMEN, "cemento", origen="consumo_diario", desde=desde, hasta=hasta,
+                         dias=len(consumo_por_fecha), total=sum(consumo_por_fecha.values()))
             return consumo_por_fecha
             
         except Exception as e:
@@ -315,10 +271,13 @@ class GraphicsGenerator:
             return {}
     
     @staticmethod
-    def generar_grafica_cemento():
+    def generar_grafica_cemento(perfil=PERFIL_PREDETERMINADO, desde=None, hasta=None):
         """
         Genera gráfica de consumo de cemento
         CORREGIDO: Usa datos reales del Excel
+
+        perfil: "telegram" para enviar por chat, "print" para PDFs e impresión
+        desde, hasta: ventana de fechas opcional (inclusive)
         """
         if not GRAFICOS_DISPONIBLES:
             print("❌ Matplotlib no disponible")
@@ -326,61 +285,36 @@ class GraphicsGenerator:
         
         try:
             # Obtener datos reales de cemento
-            consumo_cemento = GraphicsGenerator.obtener_datos_cemento()
+            consumo_cemento = GraphicsGenerator.obtener_datos_cemento(desde, hasta)
             
             if not consumo_cemento:
                 print("❌ No hay datos de consumo de cemento")
                 print("💡 Registra algunas salidas de cemento para generar la gráfica")
                 return None
             
-            # Preparar datos para gráfica
-            fechas = sorted(consumo_cemento.keys())
+            # Preparar datos para gráfica (ya vienen en orden cronológico)
+            fechas = list(consumo_cemento.keys())
             cantidades = [consumo_cemento[f] for f in fechas]
             
-            print(f"📊 Generando gráfica con {len(fechas)} días de datos")
-            
-            # Crear gráfica
-            plt.figure(figsize=(12, 6))
-            
-            # Gráfica de barras
-            barras = plt.bar(range(len(fechas)), cantidades, 
-                           color='#8E44AD', alpha=0.8, edgecolor='black')
-            
-            # Personalizar gráfica
-            plt.title('🏗️ CONSUMO DIARIO DE CEMENTO\nPlanta Municipal de Premoldeados - Tupiza', 
-                     fontsize=14, fontweight='bold', pad=20)
-            plt.xlabel('Fecha', fontsize=12)
-            plt.ylabel('Bolsas Consumidas', fontsize=12)
+            opciones = GraphicsGenerator._opciones(perfil)
+            ruta_cache = CacheGraficas.ruta("cemento", list(consumo_cemento.items()), opciones)
+            if CacheGraficas.vigente(ruta_cache):
+                Metricas.incrementar("plamph_graficas_total", grafica="cemento", resultado="cache")
+                print(f"♻️ Gráfica de cemento desde caché: {ruta_cache}")
+                return ruta_cache
             
-            # Configurar eje X
-            plt.xticks(range(len(fechas)), fechas, rotation=45)
-            plt.grid(True, alpha=0.3, axis='y')
-            
-            # Agregar valores en las barras
-            for i, (barra, cantidad) in enumerate(zip(barras, cantidades)):
-                if cantidad > 0:
-                    plt.text(barra.get_x() + barra.get_width()/2, 
-                            barra.get_height() + max(cantidades)*0.02,
-                            f'{cantidad:.0f}', ha='center', va='bottom', 
-                            fontweight='bold', fontsize=10)
+            print(f"📊 Generando gráfica con {len(fechas)} días de datos")
             
-            # Información adicional
             total_consumo = sum(cantidades)
             promedio_diario = total_consumo / len(cantidades) if cantidades else 0
-            
-            plt.figtext(0.02, 0.02, 
-                       f'Total consumido: {total_consumo:.0f} bolsas | Promedio: {promedio_diario:.1f} bolsas/día', 
-                       fontsize=10, style='italic')
-            
-            plt.tight_layout()
-            
-            # Crear directorio si no existe
-            os.makedirs("graficas", exist_ok=True)
-            
-            # Guardar gráfica
-            nombre_archivo = f"graficas/cemento_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-            plt.savefig(nombre_archivo, dpi=300, bbox_inches='tight', facecolor='white')
-            plt.close()
+            nombre_archivo = GraphicsGenerator._renderizar(
+                "cemento", ruta_cache, opciones,
+                etiquetas=fechas,
+                cantidades=cantidades,
+                colores=['#8E44AD'] * len(cantidades),
+                textos=[f'{cantidad:.0f}' if cantidad > 0 else "" for cantidad in cantidades],
+                nota=f'Total consumido: {total_consumo:.0f} bolsas | Promedio: {promedio_diario:.1f} bolsas/día'
+            )
             
             print(f"✅ Gráfica de cemento generada: {nombre_archivo}")
             return nombre_archivo
@@ -392,10 +326,12 @@ class GraphicsGenerator:
             return None
     
     @staticmethod
-    def generar_grafica_stock_materiales():
+    def generar_grafica_stock_materiales(perfil=PERFIL_PREDETERMINADO):
         """
         Genera gráfica de stock general de materiales
         CORREGIDO: Cálculo mejorado de stock
+
+        perfil: "telegram" para enviar por chat, "print" para PDFs e impresión
         """
         if not GRAFICOS_DISPONIBLES:
             print("❌ Matplotlib no disponible")
@@ -406,51 +342,10 @@ class GraphicsGenerator:
             if not archivo:
                 return None
             
-            libro = openpyxl.load_workbook(archivo)
-            hoja = libro.active
-            
             print(f"📊 Calculando stock de materiales...")
             
-            stock_materiales = {}
-            
-            # Leer desde fila 5 (después de encabezados)
-            for row in range(5, hoja.max_row + 1):
-                try:
-                    material = hoja.cell(row=row, column=3).value   # Columna C: Material
-                    movimiento = hoja.cell(row=row, column=5).value # Columna E: Movimiento
-                    cantidad = hoja.cell(row=row, column=6).value   # Columna F: Cantidad
-                    
-                    if not material or not movimiento or not cantidad:
-                        continue
-                    
-                    # Limpiar nombres de materiales
-                    material_nombre = str(material).strip()
-                    movimiento_texto = str(movimiento).strip()
-                    
-                    # Convertir cantidad a número
-                    try:
-                        cantidad_num = float(str(cantidad).replace(",", "."))
-                    except:
-                        continue
-                    
-                    # Inicializar material si no existe
-                    if material_nombre not in stock_materiales:
-                        stock_materiales[material_nombre] = 0
-                    
-                    # CORRECCIÓN: Detectar tipo de movimiento con emojis
-                    es_entrada = ("📈" in movimiento_texto or 
-                                "entrada" in movimiento_texto.lower())
-                    es_salida = ("📉" in movimiento_texto or 
-                               "salida" in movimiento_texto.lower())
-                    
-                    # Aplicar movimiento al stock
-                    if es_entrada:
-                        stock_materiales[material_nombre] += cantidad_num
-                    elif es_salida:
-                        stock_materiales[material_nombre] -= cantidad_num
-                        
-                except Exception as e:
-                    continue
+            # Libro de saldos: se actualiza con cada movimiento, no relee el Excel
+            stock_materiales = ExcelManager.obtener_stock_materiales()
             
             # Filtrar materiales con stock positivo
             stock_filtrado = {k: max(0, v) for k, v in stock_materiales.items() if v != 0}
@@ -459,6 +354,13 @@ class GraphicsGenerator:
                 print("❌ No hay datos de stock para mostrar")
                 return None
             
+            opciones = GraphicsGenerator._opciones(perfil)
+            ruta_cache = CacheGraficas.ruta("stock_materiales", list(stock_filtrado.items()), opciones)
+            if CacheGraficas.vigente(ruta_cache):
+                Metricas.incrementar("plamph_graficas_total", grafica="stock_materiales", resultado="cache")
+                print(f"♻️ Gráfica de stock desde caché: {ruta_cache}")
+                return ruta_cache
+            
             # Preparar datos para gráfica
             materiales = list(stock_filtrado.keys())
             cantidades = list(stock_filtrado.values())
@@ -467,47 +369,19 @@ class GraphicsGenerator:
             colores = []
             for cantidad in cantidades:
                 if cantidad > 50:
-                    colores.append('#2ECC71')  # Verde - Óptimo
+                    colores.append(COLOR_OPTIMO)
                 elif cantidad > 10:
-                    colores.append('#F39C12')  # Naranja - Bajo
+                    colores.append(COLOR_BAJO)
                 else:
-                    colores.append('#E74C3C')  # Rojo - Crítico
-            
-            # Crear gráfica
-            plt.figure(figsize=(14, 8))
-            
-            barras = plt.bar(materiales, cantidades, color=colores, alpha=0.8, edgecolor='black')
-            
-            plt.title('📦 STOCK ACTUAL DE MATERIALES\nPlanta Municipal de Premoldeados - Tupiza', 
-                     fontsize=14, fontweight='bold', pad=20)
-            plt.xlabel('Material', fontsize=12)
-            plt.ylabel('Cantidad', fontsize=12)
-            plt.xticks(rotation=45, ha='right')
-            plt.grid(True, alpha=0.3, axis='y')
-            
-            # Agregar valores en las barras
-            for barra, cantidad in zip(barras, cantidades):
-                altura = barra.get_height()
-                plt.text(barra.get_x() + barra.get_width()/2, altura + max(cantidades)*0.01,
-                        f'{cantidad:.0f}', ha='center', va='bottom', fontsize=9, fontweight='bold')
-            
-            # Leyenda de colores
-            leyenda = [
-                Patch(color='#2ECC71', label='Óptimo (>50)'),
-                Patch(color='#F39C12', label='Bajo (10-50)'),
-                Patch(color='#E74C3C', label='Crítico (<10)')
-            ]
-            plt.legend(handles=leyenda, loc='upper right')
-            
-            plt.tight_layout()
-            
-            # Crear directorio si no existe
-            os.makedirs("graficas", exist_ok=True)
-            
-            # Guardar gráfica
-            nombre_archivo = f"graficas/stock_materiales_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-            plt.savefig(nombre_archivo, dpi=300, bbox_inches='tight', facecolor='white')
-            plt.close()
+                    colores.append(COLOR_CRITICO)
+            
+            nombre_archivo = GraphicsGenerator._renderizar(
+                "stock_materiales", ruta_cache, opciones,
+                etiquetas=materiales,
+                cantidades=cantidades,
+                colores=colores,
+                textos=[f'{cantidad:.0f}' for cantidad in cantidades]
+            )
             
             print(f"✅ Gráfica de stock generada: {nombre_archivo}")
             return nombre_archivo
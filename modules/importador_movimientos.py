@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📥 modules/importador_movimientos.py - IMPORTACIÓN MASIVA DE MOVIMIENTOS
+=======================================================================
+
+Carga de una sola vez los movimientos de materiales anotados en papel
+(por ejemplo, el cierre de mes) desde un CSV o un Excel:
+
+    python main_modular.py --importar cierre_junio.csv
+
+Columnas, en el mismo orden que el Excel de materiales (la primera fila
+puede ser la de encabezados; cualquier otra fila se valida):
+
+    Fecha, Hora, Material, Proveedor/Destino, Tipo Movimiento, Cantidad, Observaciones
+
+- Fecha: dd/mm/aaaa (o una celda de fecha en Excel)
+- Tipo Movimiento: cualquier texto que diga entrada o salida ("📈 Entrada", "SALIDA"...)
+- Cantidad: número mayor que cero (se acepta coma decimal)
+
+Primero se validan todas las filas; si alguna tiene errores no se importa
+nada (así el archivo corregido se puede volver a importar sin duplicar).
+Las filas válidas se registran con ExcelManager.guardar_materiales_lote.
+"""
+
+import os
+import csv
+from datetime import datetime, date
+
+from .config import TIPOS_MOVIMIENTO
+from .clasificacion import clasificar_movimiento, DIRECCION_ENTRADA, DIRECCION_SALIDA
+from .lector_movimientos import convertir_cantidad
+from .excel_manager import ExcelManager
+from .carga_diferida import ModuloDiferido
+
+# openpyxl se importa al primer uso
+openpyxl = ModuloDiferido("openpyxl")
+
+# Formatos de fecha aceptados en el archivo y formato con que se registran
+FORMATOS_FECHA_IMPORTACION = ["%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y", "%Y-%m-%d", "%Y-%m-%d %H:%M:%S"]
+FORMATO_FECHA_REGISTRO = "%d/%m/%Y"
+
+EXTENSIONES_EXCEL = (".xlsx", ".xlsm")
+
+TIPO_POR_DIRECCION = {
+    DIRECCION_ENTRADA: TIPOS_MOVIMIENTO[0],
+    DIRECCION_SALIDA: TIPOS_MOVIMIENTO[1],
+}
+
+
+def _texto(valor):
+    return str(valor).strip() if valor is not None else ""
+
+
+def _es_encabezado(valores):
+    return bool(valores) and _texto(valores[0]).lower() == "fecha"
+
+
+def _sin_encabezado(filas):
+    """Omite la primera fila no vacía si es la de encabezados; el resto se valida"""
+    primera = True
+    for numero, valores in filas:
+        if not any(_texto(valor) for valor in valores):
+            continue
+        if primera and _es_encabezado(valores):
+            primera = False
+            continue
+        primera = False
+        yield numero, (list(valores) + [None] * 7)[:7]
+
+
+def _fecha(valor):
+    """Fecha del archivo en el formato del registro (None si no se puede interpretar)"""
+    if isinstance(valor, (datetime, date)):
+        return valor.strftime(FORMATO_FECHA_REGISTRO)
+    texto = _texto(valor)
+    for formato in FORMATOS_FECHA_IMPORTACION:
+        try:
+            return datetime.strptime(texto, formato).strftime(FORMATO_FECHA_REGISTRO)
+        except ValueError:
+            continue
+    return None
+
+
+class ImportadorMovimientos:
+    """Importación de movimientos de materiales desde CSV o Excel"""
+
+    # ===============================
+    # LECTURA
+    # ===============================
+
+    @staticmethod
+    def _filas_csv(archivo):
+        """(número de línea, valores) de cada fila no vacía del CSV"""
+        with open(archivo, 'r', encoding='utf-8-sig', newline='') as f:
+            muestra = f.read(4096)
+            f.seek(0)
+            try:
+                dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")
+            except csv.Error:
+                dialecto = csv.excel
+            yield from _sin_encabezado(enumerate(csv.reader(f, dialecto), 1))
+
+    @staticmethod
+    def _filas_excel(archivo):
+        """(número de fila, valores) de cada fila no vacía del Excel, desde la fila 1
+
+        No usa el lector del inventario: ese empieza en la fila 5 si no
+        encuentra encabezados, y aquí los encabezados son opcionales.
+        """
+        libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+        try:
+            filas = libro.active.iter_rows(min_row=1, max_col=7, values_only=True)
+            yield from _sin_encabezado(enumerate(filas, 1))
+        finally:
+            libro.close()
+
+    @staticmethod
+    def leer(archivo):
+        """Lee y valida todas las filas del archivo
+
+        Returns:
+            tuple: (movimientos válidos listos para registrar, lista de errores
+                   "fila N: motivo")
+        """
+        if archivo.lower().endswith(EXTENSIONES_EXCEL):
+            filas = ImportadorMovimientos._filas_excel(archivo)
+        else:
+            filas = ImportadorMovimientos._filas_csv(archivo)
+
+        movimientos, errores = [], []
+        for numero, (fecha, hora, material, proveedor, tipo, cantidad, observaciones) in filas:
+            fecha_registro = _fecha(fecha)
+            material = _texto(material)
+            tipo_registro = TIPO_POR_DIRECCION.get(clasificar_movimiento(_texto(tipo))[0])
+            cantidad_num = convertir_cantidad(cantidad)
+
+            motivos = []
+            if fecha_registro is None:
+                motivos.append(f"fecha no válida ({_texto(fecha) or 'vacía'})")
+            if not material:
+                motivos.append("falta el material")
+            if tipo_registro is None:
+                motivos.append(f"tipo de movimiento no reconocido ({_texto(tipo) or 'vacío'})")
+            if cantidad_num is None or cantidad_num <= 0:
+                motivos.append(f"cantidad no válida ({_texto(cantidad) or 'vacía'})")
+
+            if motivos:
+                errores.append(f"fila {numero}: {', '.join(motivos)}")
+                continue
+
+            movimientos.append((fecha_registro, _texto(hora), material, _texto(proveedor),
+                                tipo_registro, cantidad_num, _texto(observaciones)))
+
+        return movimientos, errores
+
+    # ===============================
+    # IMPORTACIÓN
+    # ===============================
+
+    @staticmethod
+    def importar(archivo, exportar=True):
+        """Valida el archivo y registra todos sus movimientos en un solo lote
+
+        Returns:
+            dict: {"importados": int, "errores": [str]}; si hay errores no se
+            importa ninguna fila
+        """
+        if not os.path.exists(archivo):
+            return {"importados": 0, "errores": [f"no existe el archivo {archivo}"]}
+
+        try:
+            movimientos, errores = ImportadorMovimientos.leer(archivo)
+        except Exception as e:
+            return {"importados": 0, "errores": [f"no se pudo leer {archivo}: {e}"]}
+
+        if errores:
+            return {"importados": 0, "errores": errores}
+        if not movimientos:
+            return {"importados": 0, "errores": [f"{archivo} no tiene movimientos"]}
+
+        importados = ExcelManager.guardar_materiales_lote(movimientos, exportar=exportar)
+        if importados != len(movimientos):
+            return {"importados": importados, "errores": ["no se pudo registrar el lote"]}
+        return {"importados": importados, "errores": []}
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📖 modules/lector_movimientos.py - LECTOR DE MOVIMIENTOS EN MODO STREAMING
+=========================================================================
+
+Recorre el Excel de materiales en modo solo lectura (read_only=True,
+values_only=True) y entrega cada fila como un registro Movimiento con la
+cantidad ya convertida a número.
+
+La fila de encabezados ("Fecha", ..., "Material", ...) se detecta en el
+propio archivo, así todos los módulos empiezan a leer en la misma fila.
+"""
+
+import itertools
+from collections import namedtuple
+from datetime import datetime, date
+
+from .carga_diferida import ModuloDiferido
+
+# openpyxl se importa al primer uso
+openpyxl = ModuloDiferido("openpyxl")
+
+# Fila de encabezados de la estructura creada por ExcelManager
+FILA_ENCABEZADO_MATERIALES = 4
+
+# Filas revisadas para buscar el encabezado antes de usar el valor por defecto
+FILAS_BUSQUEDA_ENCABEZADO = 10
+
+# Formatos de fecha aceptados cuando la celda es texto
+FORMATOS_FECHA = ["%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%y", "%Y-%m-%d %H:%M:%S"]
+
+# Día de los movimientos cuya fecha no se puede interpretar
+SIN_FECHA = "S/F"
+
+Movimiento = namedtuple("Movimiento", [
+    "fila",           # Número de fila en el Excel
+    "fecha",          # datetime o texto, tal como está en la celda
+    "hora",
+    "material",       # Texto o None
+    "proveedor",
+    "tipo",           # Texto del tipo de movimiento o None
+    "cantidad",       # float o None si la celda no es numérica
+    "observaciones"
+])
+
+
+def convertir_cantidad(valor):
+    """Convierte una cantidad (número o texto con coma decimal) a float; None si no se puede"""
+    if valor is None or valor == "":
+        return None
+    try:
+        return float(str(valor).replace(",", "."))
+    except (ValueError, TypeError):
+        return None
+
+
+def clave_dia(valor):
+    """Día de la celda Fecha como "AAAA-MM-DD" (SIN_FECHA si no se puede interpretar)"""
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    texto = str(valor or "").strip()
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, formato).date().isoformat()
+        except ValueError:
+            continue
+    return SIN_FECHA
+
+
+def fecha_iso(valor):
+    """Límite de una ventana de fechas como "AAAA-MM-DD" (None si no hay límite)
+
+    Raises:
+        ValueError: si el texto no es una fecha en alguno de FORMATOS_FECHA
+    """
+    if valor is None:
+        return None
+    dia = clave_dia(valor)
+    if dia == SIN_FECHA:
+        raise ValueError(f"Fecha no válida: {valor}")
+    return dia
+
+
+def _texto(valor):
+    return str(valor) if valor is not None else None
+
+
+def _es_encabezado(valores):
+    return (len(valores) >= 3 and
+            str(valores[0] or "").strip().lower() == "fecha" and
+            str(valores[2] or "").strip().lower() == "material")
+
+
+def iterar_movimientos(archivo):
+    """Genera un Movimiento por cada fila de datos no vacía del Excel de materiales"""
+    libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        hoja = libro.active
+        filas = hoja.iter_rows(min_row=1, max_col=7, values_only=True)
+
+        # Buscar la fila de encabezados; las primeras filas se guardan por si no aparece
+        primeras = []
+        inicio_datos = None
+        for numero, valores in enumerate(filas, 1):
+            primeras.append((numero, valores))
+            if _es_encabezado(valores):
+                inicio_datos = numero + 1
+                break
+            if numero >= FILAS_BUSQUEDA_ENCABEZADO:
+                break
+
+        if inicio_datos is None:
+            inicio_datos = FILA_ENCABEZADO_MATERIALES + 1
+            pendientes = [(n, v) for n, v in primeras if n >= inicio_datos]
+        else:
+            pendientes = []
+
+        siguiente = primeras[-1][0] + 1 if primeras else 1
+        for numero, valores in itertools.chain(pendientes, enumerate(filas, siguiente)):
+            valores = tuple(valores) + (None,) * (7 - len(valores))
+            if all(valor is None or valor == "" for valor in valores):
+                continue
+            fecha, hora, material, proveedor, tipo, cantidad, observaciones = valores[:7]
+            yield Movimiento(
+                numero, fecha, _texto(hora), _texto(material), _texto(proveedor),
+                _texto(tipo), convertir_cantidad(cantidad), _texto(observaciones)
+            )
+    finally:
+        libro.close()
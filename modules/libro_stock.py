@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📗 modules/libro_stock.py - LIBRO DE SALDOS DE STOCK POR MATERIAL
+=================================================================
+
+Mantiene el saldo acumulado de cada material en ARCHIVO_LIBRO_STOCK para
+que consultar el stock no obligue a recorrer todo el historial.
+
+- Cada movimiento nuevo del diario se aplica al saldo al registrarse.
+- El libro guarda una firma (tamaño, fecha de modificación y SHA-256) del
+  Excel de materiales. Si el Excel cambia fuera del bot (edición manual,
+  limpiar_excel.py), el libro se reconstruye desde cero.
+
+Saldo = movimientos del Excel + movimientos del diario aún no exportados.
+"""
+
+import os
+import json
+import hashlib
+
+from .config import ARCHIVO_EXCEL_MATERIALES, ARCHIVO_DIARIO_MATERIALES, ARCHIVO_LIBRO_STOCK, asegurar_directorios
+from .diario_movimientos import DiarioMovimientos, CAMPOS_MOVIMIENTO
+from .cache_movimientos import CacheMovimientos
+from .clasificacion import clasificar_movimiento
+
+
+def aplicar_movimiento(stock, material, tipo_movimiento, cantidad):
+    """Aplica un movimiento al diccionario de stock - MISMA REGLA QUE LA TABLA"""
+    if not (material and tipo_movimiento and cantidad):
+        return
+    try:
+        cantidad_num = float(str(cantidad).replace(",", "."))
+    except (ValueError, TypeError):
+        return
+
+    material = str(material)
+    if material not in stock:
+        stock[material] = 0
+
+    stock[material] += cantidad_num * clasificar_movimiento(str(tipo_movimiento))[0]
+
+
+def calcular_sha256(archivo):
+    """Suma SHA-256 del contenido del archivo"""
+    suma = hashlib.sha256()
+    with open(archivo, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            suma.update(bloque)
+    return suma.hexdigest()
+
+
+def calcular_firma(archivo=ARCHIVO_EXCEL_MATERIALES):
+    """Firma del Excel de materiales (None si no existe)"""
+    if not os.path.exists(archivo):
+        return None
+    info = os.stat(archivo)
+    return {
+        "tamano": info.st_size,
+        "mtime_ns": info.st_mtime_ns,
+        "sha256": calcular_sha256(archivo)
+    }
+
+
+def firma_vigente(firma, archivo=ARCHIVO_EXCEL_MATERIALES):
+    """Verifica que una firma guardada corresponde al Excel actual
+
+    Compara primero tamaño y fecha; solo si difieren calcula el SHA-256
+    (un Excel tocado pero idéntico no obliga a reconstruir). En ese caso
+    actualiza la fecha de la firma: quien la guardó debe volver a persistirla.
+
+    Returns:
+        tuple: (¿vigente?, ¿se actualizó la firma?)
+    """
+    if not os.path.exists(archivo):
+        return firma is None, False
+    if firma is None:
+        return False, False
+
+    info = os.stat(archivo)
+    if info.st_size == firma["tamano"] and info.st_mtime_ns == firma["mtime_ns"]:
+        return True, False
+    if info.st_size != firma["tamano"]:
+        return False, False
+
+    if calcular_sha256(archivo) != firma["sha256"]:
+        return False, False
+
+    firma["mtime_ns"] = info.st_mtime_ns
+    return True, True
+
+
+class LibroStock:
+    """Saldos de stock por material, actualizados de forma incremental"""
+
+    # Copia en memoria del libro persistido y versión del archivo leída
+    _libro = None
+    _version_archivo = None
+
+    # ===============================
+    # FIRMA DEL EXCEL
+    # ===============================
+
+    @staticmethod
+    def firma_valida():
+        """Verifica que el libro corresponde al Excel actual"""
+        libro = LibroStock._cargar()
+        if libro is None:
+            return False
+
+        vigente, actualizada = firma_vigente(libro.get("firma"))
+        if actualizada:
+            LibroStock._guardar(libro)
+        return vigente
+
+    # ===============================
+    # PERSISTENCIA
+    # ===============================
+
+    @staticmethod
+    def _version():
+        """(fecha de modificación, tamaño) del archivo del libro, o None"""
+        try:
+            info = os.stat(ARCHIVO_LIBRO_STOCK)
+            return (info.st_mtime_ns, info.st_size)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _cargar():
+        """Carga el libro desde disco
+
+        Se vuelve a leer solo si otro proceso lo guardó (el bot y la consola
+        registran movimientos en el mismo libro).
+        """
+        version = LibroStock._version()
+        if version is not None and version != LibroStock._version_archivo:
+            try:
+                with open(ARCHIVO_LIBRO_STOCK, 'r', encoding='utf-8') as f:
+                    LibroStock._libro = json.load(f)
+                LibroStock._version_archivo = version
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Libro de stock dañado, se reconstruirá: {e}")
+                LibroStock._libro = None
+        return LibroStock._libro
+
+    @staticmethod
+    def _guardar(libro):
+        """Guarda el libro de forma atómica"""
+        LibroStock._libro = libro
+        if not os.path.exists(ARCHIVO_LIBRO_STOCK):
+            asegurar_directorios()
+        temporal = ARCHIVO_LIBRO_STOCK + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(libro, f, ensure_ascii=False)
+        os.replace(temporal, ARCHIVO_LIBRO_STOCK)
+        LibroStock._version_archivo = LibroStock._version()
+
+    # ===============================
+    # RECONSTRUCCIÓN E INCREMENTOS
+    # ===============================
+
+    @staticmethod
+    def _stock_excel():
+        """Suma todos los movimientos del Excel (solo al reconstruir)"""
+        stock = {}
+        for mov in CacheMovimientos.obtener_movimientos(ARCHIVO_EXCEL_MATERIALES):
+            aplicar_movimiento(stock, mov.material, mov.tipo, mov.cantidad)
+        return stock
+
+    @staticmethod
+    def reconstruir():
+        """Recalcula el libro desde el Excel y los pendientes del diario"""
+        print("📗 Reconstruyendo libro de stock desde el Excel...")
+        firma = calcular_firma()
+        stock = LibroStock._stock_excel()
+
+        filas, offset = DiarioMovimientos.leer_pendientes()
+        for fila in filas:
+            registro = dict(zip(CAMPOS_MOVIMIENTO, fila))
+            aplicar_movimiento(stock, registro["material"], registro["tipo"], registro["cantidad"])
+
+        libro = {"firma": firma, "offset_diario": offset, "stock": stock}
+        LibroStock._guardar(libro)
+        return libro
+
+    @staticmethod
+    def _aplicar_diario(libro):
+        """Aplica al libro las líneas del diario que aún no contiene"""
+        if not os.path.exists(ARCHIVO_DIARIO_MATERIALES):
+            return
+        if os.path.getsize(ARCHIVO_DIARIO_MATERIALES) <= libro["offset_diario"]:
+            return
+
+        offset = libro["offset_diario"]
+        with open(ARCHIVO_DIARIO_MATERIALES, 'rb') as f:
+            f.seek(offset)
+            for linea in f:
+                if not linea.endswith(b"\n"):
+                    break
+                offset += len(linea)
+                try:
+                    registro = json.loads(linea.decode('utf-8'))
+                except ValueError:
+                    continue
+                aplicar_movimiento(libro["stock"], registro.get("material"),
+                                   registro.get("tipo"), registro.get("cantidad"))
+
+        libro["offset_diario"] = offset
+        LibroStock._guardar(libro)
+
+    @staticmethod
+    def actualizar():
+        """Deja el libro al día y lo retorna (reconstruye solo si el Excel cambió)"""
+        libro = LibroStock._cargar()
+
+        # Diario reemplazado o truncado: el offset guardado ya no sirve
+        tamano_diario = os.path.getsize(ARCHIVO_DIARIO_MATERIALES) if os.path.exists(ARCHIVO_DIARIO_MATERIALES) else 0
+        if libro is None or libro["offset_diario"] > tamano_diario or not LibroStock.firma_valida():
+            return LibroStock.reconstruir()
+
+        LibroStock._aplicar_diario(libro)
+        return libro
+
+    @staticmethod
+    def confirmar_exportacion():
+        """Actualiza la firma después de que el propio bot escribió el Excel
+
+        Se llama solo si el libro era válido antes de exportar; los movimientos
+        exportados ya estaban aplicados, así que el saldo no cambia.
+        """
+        libro = LibroStock._cargar()
+        if libro is None:
+            return
+        LibroStock._aplicar_diario(libro)
+        libro["firma"] = calcular_firma()
+        LibroStock._guardar(libro)
+
+    @staticmethod
+    def obtener_stock():
+        """Retorna una copia del stock actual por material"""
+        return dict(LibroStock.actualizar()["stock"])
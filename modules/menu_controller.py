@@ -212,6 +212,7 @@ class MenuController:
                     MenuController.mostrar_informacion_sistema()
                 elif opcion == "6":
                     print("🚪 Saliendo del sistema...")
+                    ExcelManager.exportar_excel_materiales()
                     break
                 else:
                     print("❌ Opción no válida. Intenta de nuevo.")
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📈 modules/metricas.py - MÉTRICAS DE RENDIMIENTO (FORMATO PROMETHEUS)
+====================================================================
+
+Contadores, histogramas de tiempos y medidores en memoria, exportados
+periódicamente a ARCHIVO_METRICAS en formato de texto de Prometheus
+(compatible con el "textfile collector" de node_exporter).
+
+    with Metricas.cronometro("plamph_render_segundos", grafica="cemento"):
+        ...
+    Metricas.incrementar("plamph_excel_filas_leidas_total", 1500)
+
+Las gráficas y PDFs se generan en procesos aparte (EjecutorTareas): cada
+proceso acumula sus métricas y las devuelve junto con el resultado
+(extraer / combinar), así todo termina en el mismo archivo.
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+from .config import ARCHIVO_METRICAS
+
+# Límites de los histogramas de tiempo (segundos)
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Texto de ayuda de cada métrica (línea HELP del formato Prometheus)
+DESCRIPCIONES = {
+    "plamph_handler_segundos": "Tiempo de atención de cada botón o estado del bot",
+    "plamph_excel_lectura_segundos": "Tiempo de lectura completa del Excel de materiales",
+    "plamph_excel_filas_leidas_total": "Filas de movimientos leídas del Excel",
+    "plamph_cache_movimientos_total": "Consultas a la caché de movimientos por resultado",
+    "plamph_exportacion_excel_segundos": "Tiempo de exportación del diario al Excel",
+    "plamph_movimientos_exportados_total": "Movimientos copiados del diario al Excel",
+    "plamph_render_segundos": "Tiempo de dibujo y guardado de cada gráfica",
+    "plamph_graficas_total": "Gráficas solicitadas por resultado (caché o dibujo)",
+    "plamph_pdf_segundos": "Tiempo de armado de cada reporte PDF",
+    "plamph_reportes_total": "Reportes PDF solicitados por resultado (caché o armado)",
+    "plamph_cierre_segundos": "Tiempo de generación del cierre de turno completo",
+    "plamph_envio_segundos": "Tiempo de envío de archivos a Telegram",
+    "plamph_tarea_segundos": "Tiempo total de cada tarea del ejecutor (incluye espera en cola)",
+    "plamph_tareas_total": "Tareas del ejecutor por resultado",
+    "plamph_tareas_pendientes": "Tareas en cola o en ejecución en el ejecutor",
+    "plamph_prerender_total": "Gráficas pre-dibujadas en segundo plano por resultado",
+    "plamph_escrituras_total": "Lotes guardados por el escritor único del bot por resultado",
+    "plamph_movimientos_escritos_total": "Movimientos recibidos por el escritor único del bot",
+}
+
+
+def _clave(nombre, etiquetas):
+    return (nombre, tuple(sorted((k, str(v)) for k, v in etiquetas.items())))
+
+
+class Metricas:
+    """Registro de métricas del proceso"""
+
+    _contadores = {}   # (nombre, etiquetas) -> valor
+    _histogramas = {}  # (nombre, etiquetas) -> [conteos por bucket..., +Inf, suma, cantidad]
+    _medidores = {}    # (nombre, etiquetas) -> valor o función sin argumentos
+    _lock = threading.Lock()
+
+    # ===============================
+    # REGISTRO
+    # ===============================
+
+    @staticmethod
+    def incrementar(nombre, valor=1, **etiquetas):
+        """Suma valor a un contador"""
+        clave = _clave(nombre, etiquetas)
+        with Metricas._lock:
+            Metricas._contadores[clave] = Metricas._contadores.get(clave, 0) + valor
+
+    @staticmethod
+    def observar(nombre, segundos, **etiquetas):
+        """Agrega una medición de tiempo a un histograma"""
+        clave = _clave(nombre, etiquetas)
+        with Metricas._lock:
+            datos = Metricas._histogramas.get(clave)
+            if datos is None:
+                datos = Metricas._histogramas[clave] = [0] * (len(BUCKETS_SEGUNDOS) + 3)
+            posicion = len(BUCKETS_SEGUNDOS)
+            for i, limite in enumerate(BUCKETS_SEGUNDOS):
+                if segundos <= limite:
+                    posicion = i
+                    break
+            datos[posicion] += 1
+            datos[-2] += segundos
+            datos[-1] += 1
+
+    @staticmethod
+    def establecer(nombre, valor, **etiquetas):
+        """Fija el valor de un medidor (valor numérico o función que lo calcula al exportar)"""
+        with Metricas._lock:
+            Metricas._medidores[_clave(nombre, etiquetas)] = valor
+
+    @staticmethod
+    @contextmanager
+    def cronometro(nombre, **etiquetas):
+        """Mide el tiempo del bloque y lo agrega al histograma"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            Metricas.observar(nombre, time.perf_counter() - inicio, **etiquetas)
+
+    # ===============================
+    # MÉTRICAS DE OTROS PROCESOS
+    # ===============================
+
+    @staticmethod
+    def extraer():
+        """Retorna y reinicia contadores e histogramas (para enviarlos al proceso principal)"""
+        with Metricas._lock:
+            delta = {"contadores": Metricas._contadores, "histogramas": Metricas._histogramas}
+            Metricas._contadores = {}
+            Metricas._histogramas = {}
+        return delta
+
+    @staticmethod
+    def combinar(delta):
+        """Suma las métricas extraídas en otro proceso"""
+        if not delta:
+            return
+        with Metricas._lock:
+            for clave, valor in delta["contadores"].items():
+                Metricas._contadores[clave] = Metricas._contadores.get(clave, 0) + valor
+            for clave, datos in delta["histogramas"].items():
+                actuales = Metricas._histogramas.get(clave)
+                if actuales is None:
+                    Metricas._histogramas[clave] = list(datos)
+                else:
+                    Metricas._histogramas[clave] = [a + b for a, b in zip(actuales, datos)]
+
+    # ===============================
+    # EXPORTACIÓN
+    # ===============================
+
+    @staticmethod
+    def _etiquetas_texto(etiquetas, extra=()):
+        pares = list(etiquetas) + list(extra)
+        if not pares:
+            return ""
+        texto = ",".join('%s="%s"' % (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                         for k, v in pares)
+        return "{" + texto + "}"
+
+    @staticmethod
+    def texto_prometheus():
+        """Todas las métricas en formato de texto de Prometheus"""
+        with Metricas._lock:
+            contadores = dict(Metricas._contadores)
+            histogramas = {clave: list(datos) for clave, datos in Metricas._histogramas.items()}
+            medidores = dict(Metricas._medidores)
+
+        lineas = []
+        encabezados = set()
+
+        def encabezado(nombre, tipo):
+            if nombre not in encabezados:
+                encabezados.add(nombre)
+                lineas.append(f"# HELP {nombre} {DESCRIPCIONES.get(nombre, nombre)}")
+                lineas.append(f"# TYPE {nombre} {tipo}")
+
+        for (nombre, etiquetas), valor in sorted(contadores.items()):
+            encabezado(nombre, "counter")
+            lineas.append(f"{nombre}{Metricas._etiquetas_texto(etiquetas)} {valor}")
+
+        for (nombre, etiquetas), valor in sorted(medidores.items(), key=lambda item: item[0]):
+            if callable(valor):
+                try:
+                    valor = valor()
+                except Exception:
+                    continue
+            encabezado(nombre, "gauge")
+            lineas.append(f"{nombre}{Metricas._etiquetas_texto(etiquetas)} {valor}")
+
+        for (nombre, etiquetas), datos in sorted(histogramas.items()):
+            encabezado(nombre, "histogram")
+            acumulado = 0
+            for limite, conteo in zip(list(BUCKETS_SEGUNDOS) + ["+Inf"], datos[:-2]):
+                acumulado += conteo
+                le = limite if limite == "+Inf" else repr(float(limite))
+                lineas.append(f"{nombre}_bucket{Metricas._etiquetas_texto(etiquetas, [('le', le)])} {acumulado}")
+            lineas.append(f"{nombre}_sum{Metricas._etiquetas_texto(etiquetas)} {datos[-2]:.6f}")
+            lineas.append(f"{nombre}_count{Metricas._etiquetas_texto(etiquetas)} {datos[-1]}")
+
+        return "\n".join(lineas) + "\n"
+
+    @staticmethod
+    def exportar(archivo=ARCHIVO_METRICAS):
+        """Escribe las métricas en el archivo de forma atómica"""
+        try:
+            directorio = os.path.dirname(archivo)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            temporal = archivo + ".tmp"
+            with open(temporal, 'w', encoding='utf-8') as f:
+                f.write(Metricas.texto_prometheus())
+            os.replace(temporal, archivo)
+            return True
+        except Exception as e:
+            print(f"⚠️ No se pudieron exportar las métricas: {e}")
+            return False
@@ -5,8 +5,12 @@ Versión mejorada con encabezado institucional con imagen y pie de página perso
 
 import os
 from datetime import datetime
+from functools import lru_cache
 from .config import *
 from .excel_manager import ExcelManager
+from .cache_movimientos import CacheMovimientos
+from .cache_reportes import CacheReportes, version_archivo
+from .metricas import Metricas
 
 try:
     from reportlab.lib.pagesizes import A4, letter
@@ -17,6 +21,7 @@ try:
     from reportlab.lib.units import inch, cm
     from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
     from reportlab.platypus.flowables import Flowable
+    from reportlab.lib.utils import ImageReader
     PDF_DISPONIBLE = True
     print("✅ ReportLab cargado correctamente")
 except ImportError as e:
@@ -24,12 +29,62 @@ except ImportError as e:
     print(f"⚠️ ReportLab no disponible: {e}")
     print("💡 Instala con: pip install reportlab")
 
+# Versión del diseño de los reportes: forma parte de la clave de la caché
+# (subirla al cambiar el contenido o el diseño de un reporte invalida los anteriores)
+PLANTILLA_REPORTES = 1
+
+# Nombres de los form XObject del membrete dentro de cada PDF
+FORMULARIO_ENCABEZADO = "membrete_encabezado"
+FORMULARIO_PIE = "membrete_pie"
+
+
+@lru_cache(maxsize=8)
+def _preparar_imagen_membrete(ruta, version, ancho, alto):
+    """Decodifica y reduce una imagen del membrete - UNA VEZ POR PROCESO
+
+    Args:
+        ruta: Archivo de imagen
+        version: (fecha de modificación, tamaño) del archivo; si la imagen se
+                 reemplaza cambia la clave y se vuelve a preparar
+        ancho, alto: Recuadro en puntos donde se dibuja (se preserva la proporción)
+
+    Returns:
+        tuple: (ImageReader, ancho, alto) del dibujo dentro del recuadro
+    """
+    from PIL import Image as PILImage
+
+    with PILImage.open(ruta) as original:
+        imagen = original.copy()
+
+    escala = min(ancho / imagen.width, alto / imagen.height)
+    ancho_dibujo, alto_dibujo = imagen.width * escala, imagen.height * escala
+
+    # Reducir a DPI_MEMBRETE_PDF: más píxeles no se ven impresos y solo agrandan el PDF
+    ancho_px = max(1, round(ancho_dibujo / 72 * DPI_MEMBRETE_PDF))
+    if imagen.width > ancho_px:
+        alto_px = max(1, round(imagen.height * ancho_px / imagen.width))
+        imagen = imagen.resize((ancho_px, alto_px), PILImage.LANCZOS)
+
+    # Aplanar la transparencia sobre el blanco de la página
+    if imagen.mode in ("RGBA", "LA", "P"):
+        imagen = imagen.convert("RGBA")
+        fondo = PILImage.new("RGB", imagen.size, "white")
+        fondo.paste(imagen, mask=imagen.getchannel("A"))
+        imagen = fondo
+    elif imagen.mode != "RGB":
+        imagen = imagen.convert("RGB")
+
+    return ImageReader(imagen), ancho_dibujo, alto_dibujo
+
+
 class EncabezadoPersonalizado:
     """Clase para agregar encabezado con imagen y pie de página en todas las páginas del PDF
     SOLUCIÓN A PROBLEMAS COMUNES:
     - ✅ Encabezado y pie en TODAS las páginas (no solo la primera)
     - ✅ MISMO tamaño en primera página y páginas siguientes 
     - ✅ Posiciones exactas y consistentes
+    - ✅ Cada imagen se decodifica una vez por proceso y se guarda una vez por
+      PDF (form XObject); cada página solo la referencia
     """
     
     def __init__(self, ruta_imagen="encabezado_tupiza.png", ruta_pie="pie_tupiza.png"):
@@ -46,74 +101,67 @@ class EncabezadoPersonalizado:
     
     def primera_pagina(self, canvas, doc):
         """Encabezado y pie para la primera página - MISMAS dimensiones que el resto"""
-        canvas.saveState()
-        try:
-            # ==========================================
-            # ENCABEZADO (parte superior) - COORDENADAS FIJAS
-            # ==========================================
-            if os.path.exists(self.ruta_imagen):
-                canvas.drawImage(self.ruta_imagen, 
-                               self.ENCABEZADO_X,  # CONSTANTE: Posición X fija
-                               doc.height + doc.topMargin - 15,  # CONSTANTE: Posición Y fija
-                               width=self.ENCABEZADO_WIDTH,    # CONSTANTE: Ancho fijo
-                               height=self.ENCABEZADO_HEIGHT,  # CONSTANTE: Alto fijo
-                               preserveAspectRatio=True)
-            else:
-                self._encabezado_texto(canvas, doc)
-            
-            # ==========================================
-            # PIE DE PÁGINA (parte inferior) - COORDENADAS FIJAS
-            # ==========================================
-            if os.path.exists(self.ruta_pie):
-                canvas.drawImage(self.ruta_pie, 
-                               self.PIE_X,      # CONSTANTE: Posición X fija
-                               self.PIE_Y,      # CONSTANTE: Posición Y fija
-                               width=self.PIE_WIDTH,   # CONSTANTE: Ancho fijo
-                               height=self.PIE_HEIGHT, # CONSTANTE: Alto fijo
-                               preserveAspectRatio=True)
-            else:
-                self._pie_texto(canvas, doc)
-                
-        except Exception as e:
-            print(f"Error en encabezado primera página: {e}")
-        finally:
-            canvas.restoreState()
+        self._dibujar(canvas, doc, "primera página")
     
     def paginas_siguientes(self, canvas, doc):
         """Encabezado y pie para páginas siguientes - EXACTAMENTE IGUALES a primera página"""
+        self._dibujar(canvas, doc, "páginas siguientes")
+    
+    def _dibujar(self, canvas, doc, pagina):
+        """Dibuja encabezado y pie en la página actual - COORDENADAS FIJAS"""
         canvas.saveState()
         try:
             # ==========================================
-            # ENCABEZADO (parte superior) - MISMAS COORDENADAS QUE PRIMERA PÁGINA
+            # ENCABEZADO (parte superior)
             # ==========================================
-            if os.path.exists(self.ruta_imagen):
-                canvas.drawImage(self.ruta_imagen, 
-                               self.ENCABEZADO_X,  # MISMA posición X que primera página
-                               doc.height + doc.topMargin - 15,  # MISMA posición Y que primera página
-                               width=self.ENCABEZADO_WIDTH,    # MISMO ancho que primera página
-                               height=self.ENCABEZADO_HEIGHT,  # MISMA altura que primera página
-                               preserveAspectRatio=True)
-            else:
+            if not self._dibujar_formulario(canvas, FORMULARIO_ENCABEZADO, self.ruta_imagen,
+                                            self.ENCABEZADO_X,
+                                            doc.height + doc.topMargin - 15,
+                                            self.ENCABEZADO_WIDTH, self.ENCABEZADO_HEIGHT):
                 self._encabezado_texto(canvas, doc)
             
             # ==========================================
-            # PIE DE PÁGINA (parte inferior) - MISMAS COORDENADAS QUE PRIMERA PÁGINA
+            # PIE DE PÁGINA (parte inferior)
             # ==========================================
-            if os.path.exists(self.ruta_pie):
-                canvas.drawImage(self.ruta_pie, 
-                               self.PIE_X,      # MISMA posición X que primera página
-                               self.PIE_Y,      # MISMA posición Y que primera página
-                               width=self.PIE_WIDTH,   # MISMO ancho que primera página
-                               height=self.PIE_HEIGHT, # MISMA altura que primera página
-                               preserveAspectRatio=True)
-            else:
+            if not self._dibujar_formulario(canvas, FORMULARIO_PIE, self.ruta_pie,
+                                            self.PIE_X, self.PIE_Y,
+                                            self.PIE_WIDTH, self.PIE_HEIGHT):
                 self._pie_texto(canvas, doc)
                 
         except Exception as e:
-            print(f"Error en encabezado páginas siguientes: {e}")
+            print(f"Error en encabezado {pagina}: {e}")
         finally:
             canvas.restoreState()
     
+    def _dibujar_formulario(self, canvas, nombre, ruta, x, y, ancho, alto):
+        """Dibuja la imagen del membrete por referencia al form XObject del PDF
+        
+        La primera vez en cada documento registra el formulario con la imagen
+        ya preparada; las páginas siguientes solo lo referencian.
+        
+        Returns:
+            bool: False si la imagen no existe (se usa el texto de respaldo)
+        """
+        if not canvas.hasForm(nombre):
+            try:
+                info = os.stat(ruta)
+            except OSError:
+                return False
+            lector, ancho_dibujo, alto_dibujo = _preparar_imagen_membrete(
+                ruta, (info.st_mtime_ns, info.st_size), ancho, alto)
+            
+            canvas.beginForm(nombre, 0, 0, ancho, alto)
+            # Centrada en el recuadro, como drawImage(..., preserveAspectRatio=True)
+            canvas.drawImage(lector, (ancho - ancho_dibujo) / 2, (alto - alto_dibujo) / 2,
+                             width=ancho_dibujo, height=alto_dibujo)
+            canvas.endForm()
+        
+        canvas.saveState()
+        canvas.translate(x, y)
+        canvas.doForm(nombre)
+        canvas.restoreState()
+        return True
+    
     def _encabezado_texto(self, canvas, doc):
         """Encabezado de texto como fallback - MISMA posición siempre"""
         canvas.setFont("Helvetica-Bold", 12)
@@ -168,6 +216,34 @@ class PDFCreator:
     Generador avanzado de reportes PDF con encabezado y pie de página institucional
     """
     
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _estilos():
+        """Estilos del reporte (se crean una vez por proceso)"""
+        return PDFCreator.crear_estilos()
+    
+    @staticmethod
+    def _opciones_reporte(con_encabezado, con_marca_agua):
+        """Opciones que forman parte de la clave de la caché de reportes"""
+        opciones = {
+            "plantilla": PLANTILLA_REPORTES,
+            "encabezado": con_encabezado,
+            "marca_agua": con_encabezado and con_marca_agua,
+        }
+        if con_encabezado:
+            # Si se reemplaza una imagen del membrete, los reportes se vuelven a armar
+            encabezado = EncabezadoPersonalizado()
+            opciones["membrete"] = [version_archivo(encabezado.ruta_imagen), version_archivo(encabezado.ruta_pie)]
+        return opciones
+    
+    @staticmethod
+    def _ultima_actualizacion():
+        """Fecha de la última modificación del Excel de materiales"""
+        try:
+            return datetime.fromtimestamp(os.path.getmtime(ARCHIVO_EXCEL_MATERIALES)).strftime('%d/%m/%Y %H:%M:%S')
+        except OSError:
+            return "S/F"
+    
     @staticmethod
     def crear_estilos():
         """Crea estilos personalizados para el PDF"""
@@ -243,13 +319,21 @@ class PDFCreator:
             return None
         
         try:
+            # Volcar al Excel los movimientos pendientes del diario
+            ExcelManager.sincronizar_diario()
+            
             # Verificar que existe el archivo
             if not os.path.exists(ARCHIVO_EXCEL_MATERIALES):
                 print(f"❌ No se encontró el archivo: {ARCHIVO_EXCEL_MATERIALES}")
                 return None
             
-            # Nombre del archivo PDF
-            nombre_pdf = f"reporte_materiales_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            # Reporte ya armado con los mismos datos y opciones
+            nombre_pdf = CacheReportes.ruta("materiales", CacheReportes.version_datos(),
+                                            PDFCreator._opciones_reporte(con_encabezado, con_marca_agua))
+            if CacheReportes.vigente(nombre_pdf):
+                Metricas.incrementar("plamph_reportes_total", reporte="materiales", resultado="cache")
+                print(f"♻️ Reporte de materiales desde caché: {nombre_pdf}")
+                return nombre_pdf
             
             # Configurar encabezado según parámetro
             if con_encabezado:
@@ -277,7 +361,7 @@ class PDFCreator:
                 )
             
             elementos = []
-            estilos = PDFCreator.crear_estilos()
+            estilos = PDFCreator._estilos()
             
             # Agregar marca de agua solo si se solicita específicamente
             if con_encabezado and con_marca_agua:
@@ -308,11 +392,13 @@ class PDFCreator:
             total_registros = ExcelManager.contar_registros_materiales()
             stock_actual = ExcelManager.obtener_stock_materiales()
             
+            actualizacion = PDFCreator._ultima_actualizacion()
+            
             resumen = f"""
             <b>Estado del Inventario:</b><br/>
             • Total de registros de movimientos: {total_registros}<br/>
             • Número de materiales diferentes: {len(stock_actual)}<br/>
-            • Fecha de última actualización: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}<br/>
+            • Fecha de última actualización: {actualizacion}<br/>
             • Status del sistema: Operativo
             """
             elementos.append(Paragraph(resumen, estilos['normal']))
@@ -357,30 +443,23 @@ class PDFCreator:
             elementos.append(Paragraph("3. ÚLTIMOS MOVIMIENTOS", estilos['subtitulo']))
             
             try:
-                import openpyxl
-                libro = openpyxl.load_workbook(ARCHIVO_EXCEL_MATERIALES)
-                hoja = libro.active
+                movimientos = CacheMovimientos.obtener_movimientos(ARCHIVO_EXCEL_MATERIALES)
                 
                 datos_movimientos = [['Fecha', 'Material', 'Tipo', 'Cantidad', 'Observaciones']]
                 
                 # Obtener últimos 10 registros
-                max_row = hoja.max_row
-                start_row = max(5, max_row - 9)  # Últimos 10 registros
-                
-                for row in range(start_row, max_row + 1):
-                    fecha = hoja.cell(row=row, column=1).value or ""
-                    material = hoja.cell(row=row, column=3).value or ""
-                    tipo = hoja.cell(row=row, column=5).value or ""
-                    cantidad = hoja.cell(row=row, column=6).value or 0
-                    observaciones = hoja.cell(row=row, column=7).value or ""
+                for mov in movimientos[-10:]:
+                    fecha = mov.fecha or ""
+                    material = mov.material or ""
+                    tipo = mov.tipo or ""
+                    cantidad = mov.cantidad or 0
+                    observaciones = mov.observaciones or ""
                     
                     datos_movimientos.append([
                         str(fecha), str(material), str(tipo), 
                         f"{cantidad:.2f}", str(observaciones)[:30] + "..." if len(str(observaciones)) > 30 else str(observaciones)
                     ])
                 
-                libro.close()
-                
                 tabla_movimientos = Table(datos_movimientos, colWidths=[1*inch, 1.5*inch, 1*inch, 1*inch, 2*inch])
                 tabla_movimientos.setStyle(TableStyle([
                     ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2e75b6')),
@@ -407,7 +486,7 @@ class PDFCreator:
             <b>INFORMACIÓN DEL SISTEMA:</b><br/>
             • Total de registros en el sistema: {total_registros}<br/>
             • Archivo de datos: {os.path.basename(ARCHIVO_EXCEL_MATERIALES)}<br/>
-            • Última actualización: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}<br/>
+            • Última actualización: {actualizacion}<br/>
             • Estado del sistema: Operativo<br/>
             <br/>
             <b>RECOMENDACIONES:</b><br/>
@@ -425,13 +504,22 @@ class PDFCreator:
             elementos.append(Paragraph(estadisticas, estilos['normal']))
             
             # Construir PDF con o sin encabezado según configuración
+            # Se escribe en un temporal y se publica en la caché de reportes
+            def escribir(destino):
+                doc.filename = destino
+                if con_encabezado:
+                    doc.build(elementos, 
+                             onFirstPage=encabezado_personalizado.primera_pagina,     # ✅ Encabezado en primera página
+                             onLaterPages=encabezado_personalizado.paginas_siguientes) # ✅ Encabezado en TODAS las páginas siguientes
+                else:
+                    doc.build(elementos)  # PDF simple sin encabezado
+            
+            with Metricas.cronometro("plamph_pdf_segundos", reporte="materiales"):
+                CacheReportes.guardar(nombre_pdf, escribir)
+            Metricas.incrementar("plamph_reportes_total", reporte="materiales", resultado="armado")
             if con_encabezado:
-                doc.build(elementos, 
-                         onFirstPage=encabezado_personalizado.primera_pagina,     # ✅ Encabezado en primera página
-                         onLaterPages=encabezado_personalizado.paginas_siguientes) # ✅ Encabezado en TODAS las páginas siguientes
                 print(f"✅ PDF CON ENCABEZADO generado exitosamente: {nombre_pdf}")
             else:
-                doc.build(elementos)  # PDF simple sin encabezado
                 print(f"✅ PDF SIMPLE generado exitosamente: {nombre_pdf}")
             
             return nombre_pdf
@@ -454,7 +542,16 @@ class PDFCreator:
             return None
         
         try:
-            nombre_pdf = f"reporte_combustibles_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            # Volcar al Excel los movimientos pendientes del diario
+            ExcelManager.sincronizar_diario()
+            
+            # Reporte ya armado con los mismos datos y opciones
+            nombre_pdf = CacheReportes.ruta("combustibles", CacheReportes.version_datos(),
+                                            PDFCreator._opciones_reporte(con_encabezado, con_marca_agua))
+            if CacheReportes.vigente(nombre_pdf):
+                Metricas.incrementar("plamph_reportes_total", reporte="combustibles", resultado="cache")
+                print(f"♻️ Reporte de combustibles desde caché: {nombre_pdf}")
+                return nombre_pdf
             
             # Configurar encabezado según parámetro
             if con_encabezado:
@@ -482,7 +579,7 @@ class PDFCreator:
                 )
             
             elementos = []
-            estilos = PDFCreator.crear_estilos()
+            estilos = PDFCreator._estilos()
             
             # Agregar marca de agua solo si se solicita específicamente
             if con_encabezado and con_marca_agua:
@@ -566,13 +663,22 @@ class PDFCreator:
                 elementos.append(Paragraph("No hay datos de combustibles disponibles.", estilos['normal']))
             
             # Construir PDF con o sin encabezado según configuración
+            # Se escribe en un temporal y se publica en la caché de reportes
+            def escribir(destino):
+                doc.filename = destino
+                if con_encabezado:
+                    doc.build(elementos,
+                             onFirstPage=encabezado_personalizado.primera_pagina,     # ✅ Encabezado en primera página
+                             onLaterPages=encabezado_personalizado.paginas_siguientes) # ✅ Encabezado en TODAS las páginas siguientes
+                else:
+                    doc.build(elementos)  # PDF simple sin encabezado
+            
+            with Metricas.cronometro("plamph_pdf_segundos", reporte="combustibles"):
+                CacheReportes.guardar(nombre_pdf, escribir)
+            Metricas.incrementar("plamph_reportes_total", reporte="combustibles", resultado="armado")
             if con_encabezado:
-                doc.build(elementos,
-                         onFirstPage=encabezado_personalizado.primera_pagina,     # ✅ Encabezado en primera página
-                         onLaterPages=encabezado_personalizado.paginas_siguientes) # ✅ Encabezado en TODAS las páginas siguientes
                 print(f"✅ PDF DE COMBUSTIBLES CON ENCABEZADO generado: {nombre_pdf}")
             else:
-                doc.build(elementos)  # PDF simple sin encabezado
                 print(f"✅ PDF DE COMBUSTIBLES SIMPLE generado: {nombre_pdf}")
             
             return nombre_pdf
@@ -581,6 +687,28 @@ class PDFCreator:
             print(f"❌ Error generando PDF de combustibles: {e}")
             return None
 
+    @staticmethod
+    def generar_pdf_historial(desde=None, hasta=None, con_encabezado=True):
+        """Genera el PDF con el historial COMPLETO de movimientos (modules/pdf_historial.py)
+        
+        Args:
+            desde, hasta: Período opcional (date o texto de fecha, inclusive)
+            con_encabezado (bool): Si True, incluye encabezado y pie institucional en TODAS las páginas
+        """
+        from .pdf_historial import HistorialPDF
+        return HistorialPDF.generar(desde=desde, hasta=hasta, con_encabezado=con_encabezado)
+
+    @staticmethod
+    def generar_pdf_fotos(desde=None, hasta=None, con_encabezado=True):
+        """Genera el reporte fotográfico con las copias reducidas de las fotos (modules/pdf_fotos.py)
+        
+        Args:
+            desde, hasta: Período opcional (date o texto de fecha, inclusive); sin período, la última semana
+            con_encabezado (bool): Si True, incluye encabezado y pie institucional en TODAS las páginas
+        """
+        from .pdf_fotos import ReporteFotosPDF
+        return ReporteFotosPDF.generar(desde=desde, hasta=hasta, con_encabezado=con_encabezado)
+
 # ============================================================================
 # FUNCIONES DE UTILIDAD PARA PDFS
 # ============================================================================
@@ -618,7 +746,7 @@ def crear_imagenes_ejemplo():
             
             img_pie.save("pie_tupiza.png")
             print("✅ Imagen de pie creada: pie_tupiza.png")
-        
+    
     except ImportError:
         print("⚠️ PIL no disponible para crear imágenes de ejemplo")
         print("💡 Las imágenes se crearán como texto si no existen")
@@ -651,7 +779,7 @@ if __name__ == "__main__":
         print("✅ Marca de agua opcional y segura (sin conflictos de tamaño)")
         print("✅ Método correcto para datos de combustibles")
         print("✅ Fallback a texto si las imágenes no existen")
-        
+    
     else:
         print("❌ ReportLab no disponible")
         print("💡 Instala con: pip install reportlab")
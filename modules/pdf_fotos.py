@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🖼️ modules/pdf_fotos.py - REPORTE FOTOGRÁFICO EN PDF
+===================================================
+
+    ruta = ReporteFotosPDF.generar(desde=date(2025, 3, 1), hasta=date(2025, 3, 31))
+
+Arma un PDF con las fotos de planta del período, agrupadas por día, en
+una grilla de FOTOS_POR_FILA columnas con la hora, el usuario y la
+descripción de cada foto. Sin período se incluyen los últimos
+DIAS_REPORTE_FOTOS días.
+
+- Usa las copias reducidas y los manifiestos de AlmacenFotos: no abre las
+  fotos originales.
+- ImagenDiferida ocupa su lugar con el tamaño anotado en el manifiesto y
+  recién lee el archivo al dibujarse. El JPEG se copia al PDF tal cual,
+  sin recodificar (ver _sin_ascii85).
+- El PDF se guarda en la caché de reportes (CacheReportes) con la versión
+  de los manifiestos del período: si no llegaron fotos nuevas, pedirlo
+  otra vez devuelve el mismo archivo.
+"""
+
+from contextlib import contextmanager
+from functools import lru_cache
+from datetime import date, timedelta
+from xml.sax.saxutils import escape
+
+from .config import DIAS_REPORTE_FOTOS
+from .almacen_fotos import AlmacenFotos
+from .cache_reportes import CacheReportes, version_archivo
+from .lector_movimientos import fecha_iso
+from .metricas import Metricas
+from .pdf_creator import PDF_DISPONIBLE, EncabezadoPersonalizado, PDFCreator
+
+if PDF_DISPONIBLE:
+    from reportlab import rl_config
+    from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Flowable,
+                                    CondPageBreak)
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib import colors
+
+    class ImagenDiferida(Flowable):
+        """Foto que se maqueta con su tamaño conocido y se lee recién al dibujarse
+
+        A diferencia de platypus.Image no abre el archivo para medirlo: el
+        tamaño en píxeles viene del manifiesto. La imagen se centra dentro
+        de la caja (ancho_caja x alto_caja) conservando su proporción.
+        """
+
+        def __init__(self, ruta, ancho_px, alto_px, ancho_caja, alto_caja):
+            Flowable.__init__(self)
+            self.ruta = ruta
+            self.ancho_caja = ancho_caja
+            self.alto_caja = alto_caja
+            escala = min(ancho_caja / max(ancho_px, 1), alto_caja / max(alto_px, 1))
+            self.ancho_dibujo = ancho_px * escala
+            self.alto_dibujo = alto_px * escala
+
+        def wrap(self, ancho_disponible, alto_disponible):
+            return self.ancho_caja, self.alto_caja
+
+        def draw(self):
+            self.canv.drawImage(self.ruta,
+                                (self.ancho_caja - self.ancho_dibujo) / 2,
+                                (self.alto_caja - self.alto_dibujo) / 2,
+                                self.ancho_dibujo, self.alto_dibujo)
+
+# Grilla de fotos: columnas por fila y caja de cada foto en puntos (4:3)
+FOTOS_POR_FILA = 2
+ANCHO_FOTO_PDF = 200
+ALTO_FOTO_PDF = 150
+SEPARACION_FOTOS = 12
+
+
+@contextmanager
+def _sin_ascii85():
+    """Guarda imágenes y páginas en binario mientras se arma el reporte
+
+    Con rl_config.useA85 ReportLab pasa cada JPEG a ASCII85 (en Python puro
+    si falta su acelerador en C): tarda y agrega un 25 % al tamaño.
+    """
+    anterior = rl_config.useA85
+    rl_config.useA85 = 0
+    try:
+        yield
+    finally:
+        rl_config.useA85 = anterior
+
+
+def _periodo(desde, hasta):
+    """Límites "AAAA-MM-DD" del reporte (por defecto, los últimos DIAS_REPORTE_FOTOS días)"""
+    if desde is None and hasta is None:
+        hoy = date.today()
+        return fecha_iso(hoy - timedelta(days=DIAS_REPORTE_FOTOS - 1)), fecha_iso(hoy)
+    return fecha_iso(desde), fecha_iso(hasta)
+
+
+def _fecha(dia):
+    """Convierte el día AAAA-MM-DD a DD/MM/AAAA"""
+    anio, mes, dia_mes = dia.split("-")
+    return f"{dia_mes}/{mes}/{anio}"
+
+
+class ReporteFotosPDF:
+    """Reporte PDF de las fotos de planta de un período"""
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _estilo_leyenda():
+        return ParagraphStyle(
+            'LeyendaFoto', fontName='Helvetica', fontSize=7.5, leading=9,
+            textColor=colors.HexColor('#333333')
+        )
+
+    @staticmethod
+    def _celda(dia, foto, estilo):
+        """Foto y su leyenda (hora, usuario y descripción)"""
+        detalle = foto["hora"]
+        if foto.get("usuario"):
+            detalle += f" - {foto['usuario']}"
+        leyenda = f"<b>{escape(detalle)}</b>"
+        if foto.get("descripcion"):
+            leyenda += f"<br/>{escape(foto['descripcion'])}"
+        return [
+            ImagenDiferida(AlmacenFotos.ruta_miniatura(dia, foto), foto["ancho"], foto["alto"],
+                           ANCHO_FOTO_PDF, ALTO_FOTO_PDF),
+            Paragraph(leyenda, estilo),
+        ]
+
+    @staticmethod
+    def _grilla(dia, fotos, estilo):
+        """Tabla de fotos del día; se corta entre filas al cambiar de página"""
+        celdas = [ReporteFotosPDF._celda(dia, foto, estilo) for foto in fotos]
+        filas = [celdas[i:i + FOTOS_POR_FILA] for i in range(0, len(celdas), FOTOS_POR_FILA)]
+        filas[-1] += [""] * (FOTOS_POR_FILA - len(filas[-1]))
+
+        tabla = Table(filas, colWidths=[ANCHO_FOTO_PDF + SEPARACION_FOTOS] * FOTOS_POR_FILA)
+        tabla.setStyle(TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), SEPARACION_FOTOS / 2),
+            ('RIGHTPADDING', (0, 0), (-1, -1), SEPARACION_FOTOS / 2),
+            ('TOPPADDING', (0, 0), (-1, -1), 4),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ]))
+        return tabla
+
+    @staticmethod
+    def generar(desde=None, hasta=None, con_encabezado=True):
+        """Genera el reporte con las fotos del período
+
+        Args:
+            desde, hasta: Límites de fecha (date o texto, inclusive); sin
+                          ninguno, los últimos DIAS_REPORTE_FOTOS días
+            con_encabezado: Encabezado y pie institucional en todas las páginas
+
+        Returns:
+            str: Ruta del PDF (en la caché de reportes), o None si no hay
+                 fotos en el período o hubo un error
+        """
+        if not PDF_DISPONIBLE:
+            print("❌ ReportLab no disponible")
+            return None
+
+        try:
+            desde, hasta = _periodo(desde, hasta)
+            dias = [(dia, AlmacenFotos.fotos_del_dia(dia)) for dia in AlmacenFotos.dias(desde, hasta)]
+            dias = [(dia, fotos) for dia, fotos in dias if fotos]
+            total = sum(len(fotos) for _, fotos in dias)
+            if not total:
+                print(f"⚠️ No hay fotos entre {desde or 'el inicio'} y {hasta or 'hoy'}")
+                return None
+
+            # Los manifiestos cambian con cada foto nueva: son la versión de los datos
+            version = {
+                "periodo": [desde, hasta],
+                "dias": [[dia, version_archivo(AlmacenFotos.ruta_manifiesto(dia))] for dia, _ in dias],
+            }
+            nombre_pdf = CacheReportes.ruta("fotos", version, PDFCreator._opciones_reporte(con_encabezado, False))
+            if CacheReportes.vigente(nombre_pdf):
+                Metricas.incrementar("plamph_reportes_total", reporte="fotos", resultado="cache")
+                print(f"♻️ Reporte fotográfico desde caché: {nombre_pdf}")
+                return nombre_pdf
+
+            doc = SimpleDocTemplate(nombre_pdf, pagesize=letter, rightMargin=72, leftMargin=72,
+                                    topMargin=120 if con_encabezado else 72,
+                                    bottomMargin=100 if con_encabezado else 72)
+            estilos = PDFCreator._estilos()
+            estilo_leyenda = ReporteFotosPDF._estilo_leyenda()
+
+            periodo = f"{_fecha(desde) if desde else 'inicio'} al {_fecha(hasta) if hasta else 'hoy'}"
+            elementos = [
+                Paragraph("REPORTE FOTOGRÁFICO DE PLANTA", estilos['titulo']),
+                Paragraph(f"Período: {periodo} - {total} fotos en {len(dias)} días", estilos['encabezado']),
+                Spacer(1, 10),
+            ]
+            for dia, fotos in dias:
+                # El título del día no queda solo al pie de una página
+                elementos.append(CondPageBreak(ALTO_FOTO_PDF + 70))
+                elementos.append(Paragraph(f"{_fecha(dia)} - {len(fotos)} fotos", estilos['subtitulo']))
+                elementos.append(ReporteFotosPDF._grilla(dia, fotos, estilo_leyenda))
+
+            def escribir(destino):
+                doc.filename = destino
+                with _sin_ascii85():
+                    if con_encabezado:
+                        encabezado = EncabezadoPersonalizado()
+                        doc.build(elementos, onFirstPage=encabezado.primera_pagina,
+                                  onLaterPages=encabezado.paginas_siguientes)
+                    else:
+                        doc.build(elementos)
+
+            with Metricas.cronometro("plamph_pdf_segundos", reporte="fotos"):
+                CacheReportes.guardar(nombre_pdf, escribir)
+            Metricas.incrementar("plamph_reportes_total", reporte="fotos", resultado="armado")
+            print(f"✅ Reporte fotográfico generado: {nombre_pdf} ({total} fotos, {len(dias)} días)")
+            return nombre_pdf
+
+        except Exception as e:
+            print(f"❌ Error generando reporte fotográfico: {e}")
+            return None
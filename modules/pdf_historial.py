@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📚 modules/pdf_historial.py - HISTORIAL COMPLETO DE MOVIMIENTOS EN PDF
+=====================================================================
+
+El reporte ejecutivo (PDFCreator.generar_pdf_materiales) muestra solo los
+últimos movimientos. Para auditoría, HistorialPDF escribe TODO el libro de
+movimientos sin cargarlo en memoria:
+
+    ruta = HistorialPDF.generar(desde=date(2025, 1, 1), hasta=date(2025, 12, 31))
+
+- Las filas se leen del Excel en modo streaming (iterar_movimientos) y se
+  toman de a una página por vez.
+- Cada fila tiene alto fijo (ALTO_FILA_HISTORIAL_PDF): el texto que no cabe
+  se recorta, así cada página lleva siempre la misma cantidad de filas y
+  se dibuja directamente en el canvas, sin maquetar una tabla gigante.
+- Cada página repite la fila de encabezados de la tabla, el encabezado y
+  pie institucional (EncabezadoPersonalizado) y el número de página.
+
+La memoria no depende de la cantidad de filas del Excel: solo se
+guardan las filas de la página actual. De cada página terminada ReportLab
+conserva hasta el final su contenido, que aquí se comprime al cerrarla
+(CanvasPaginasComprimidas, unos pocos KB por página).
+"""
+
+import os
+from datetime import datetime, date
+
+from .config import (ARCHIVO_EXCEL_MATERIALES, DIRECTORIO_REPORTES, ALTO_FILA_HISTORIAL_PDF,
+                     asegurar_directorios)
+from .excel_manager import ExcelManager
+from .lector_movimientos import iterar_movimientos, clave_dia, fecha_iso, SIN_FECHA
+from .clasificacion import clasificar_movimiento, DIRECCION_ENTRADA, DIRECCION_SALIDA
+from .metricas import Metricas
+from .pdf_creator import PDF_DISPONIBLE, EncabezadoPersonalizado
+
+if PDF_DISPONIBLE:
+    from reportlab.pdfgen.canvas import Canvas
+    from reportlab.pdfbase import pdfdoc
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.platypus import SimpleDocTemplate
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib import colors
+
+    class CanvasPaginasComprimidas(Canvas):
+        """Canvas que comprime cada página al terminarla
+
+        ReportLab guarda el contenido de todas las páginas sin comprimir
+        hasta save(): con miles de páginas eso crece con el historial. Aquí
+        cada página se comprime (FlateDecode) en showPage y solo queda en
+        memoria el resultado comprimido.
+
+        Usa detalles internos de ReportLab: si una versión no los tiene, se
+        sigue como un Canvas común con pageCompression, que comprime las
+        páginas recién en save().
+        """
+
+        def __init__(self, *args, **kwargs):
+            kwargs.setdefault("pageCompression", 1)
+            Canvas.__init__(self, *args, **kwargs)
+            self._comprimir_paginas = True
+
+        def showPage(self):
+            Canvas.showPage(self)
+            if not self._comprimir_paginas:
+                return
+            try:
+                pagina = self._doc.Pages.pages[-1]
+                flujo = pdfdoc.PDFStream(content=pdfdoc.PDFZCompress.encode(pagina.stream))
+                # Con "Filter" ya definido, ReportLab no vuelve a aplicar filtros al guardar
+                flujo.dictionary["Filter"] = pdfdoc.PDFArray([pdfdoc.PDFName(pdfdoc.PDFZCompress.pdfname)])
+            except (AttributeError, IndexError, TypeError) as e:
+                print(f"⚠️ Compresión por página no disponible en esta versión de ReportLab ({e}); "
+                      f"se comprime al guardar")
+                self._comprimir_paginas = False
+                return
+            pagina.Contents = flujo
+            pagina.stream = None
+
+# Columnas del historial: (título, ancho en puntos, alineación)
+COLUMNAS_HISTORIAL = [
+    ("Fecha", 54, "izquierda"),
+    ("Hora", 40, "izquierda"),
+    ("Material", 70, "izquierda"),
+    ("Proveedor/Destino", 84, "izquierda"),
+    ("Tipo", 46, "izquierda"),
+    ("Cantidad", 56, "derecha"),
+    ("Observaciones", 118, "izquierda"),
+]
+
+TEXTO_TIPO = {DIRECCION_ENTRADA: "Entrada", DIRECCION_SALIDA: "Salida"}
+
+FUENTE_FILAS = "Helvetica"
+FUENTE_ENCABEZADOS = "Helvetica-Bold"
+TAMANO_FUENTE_FILAS = 7.5
+ALTO_ENCABEZADO_TABLA = 16
+RELLENO_CELDA = 3
+COLOR_ENCABEZADO_TABLA = "#2e75b6"
+COLOR_FILA_ALTERNA = "#eeeeee"
+ANCHO_MAXIMO_CARACTER = 1.02   # En em, el carácter más ancho de Helvetica ("@")
+
+
+def _recortar(texto, ancho, fuente=FUENTE_FILAS, tamano=TAMANO_FUENTE_FILAS):
+    """Recorta el texto para que quepa en el ancho (termina en "…")"""
+    # Ningún carácter de Helvetica mide más de ~1 em: los textos cortos no se miden
+    if len(texto) * tamano * ANCHO_MAXIMO_CARACTER <= ancho or stringWidth(texto, fuente, tamano) <= ancho:
+        return texto
+    while texto and stringWidth(texto + "…", fuente, tamano) > ancho:
+        texto = texto[:-1]
+    return texto + "…"
+
+
+def _formatear(mov):
+    """Valores de una fila del historial como textos"""
+    fecha = mov.fecha.strftime("%d/%m/%Y") if isinstance(mov.fecha, (datetime, date)) else str(mov.fecha or "")
+    direccion = clasificar_movimiento(mov.tipo or "")[0]
+    tipo = TEXTO_TIPO.get(direccion, mov.tipo or "")
+    cantidad = f"{mov.cantidad:.2f}" if mov.cantidad is not None else ""
+    valores = (fecha, mov.hora or "", mov.material or "", mov.proveedor or "",
+               tipo, cantidad, mov.observaciones or "")
+    return [" ".join(valor.split()) for valor in valores], direccion
+
+
+class HistorialPDF:
+    """Reporte PDF del historial completo de movimientos, página por página"""
+
+    # ===============================
+    # DATOS
+    # ===============================
+
+    @staticmethod
+    def _movimientos(desde=None, hasta=None):
+        """Movimientos del Excel dentro de la ventana de fechas (streaming)"""
+        desde, hasta = fecha_iso(desde), fecha_iso(hasta)
+        con_ventana = desde is not None or hasta is not None
+
+        for mov in iterar_movimientos(ARCHIVO_EXCEL_MATERIALES):
+            if con_ventana:
+                dia = clave_dia(mov.fecha)
+                if dia == SIN_FECHA:
+                    continue
+                if (desde is not None and dia < desde) or (hasta is not None and dia > hasta):
+                    continue
+            yield mov
+
+    # ===============================
+    # DIBUJO
+    # ===============================
+
+    @staticmethod
+    def _iniciar_pagina(c, doc, numero, subtitulo, encabezado):
+        """Encabezado institucional, título y número de página
+
+        Returns:
+            float: Coordenada Y donde empieza la tabla
+        """
+        if encabezado is not None:
+            if numero == 1:
+                encabezado.primera_pagina(c, doc)
+            else:
+                encabezado.paginas_siguientes(c, doc)
+
+        izquierda = doc.leftMargin
+        derecha = doc.leftMargin + doc.width
+        arriba = doc.bottomMargin + doc.height
+
+        c.setFillColor(colors.black)
+        if numero == 1:
+            c.setFont(FUENTE_ENCABEZADOS, 13)
+            c.drawString(izquierda, arriba - 14, "HISTORIAL COMPLETO DE MOVIMIENTOS DE MATERIALES")
+            c.setFont(FUENTE_FILAS, 8.5)
+            c.drawString(izquierda, arriba - 28, subtitulo)
+            y = arriba - 40
+        else:
+            c.setFont(FUENTE_ENCABEZADOS, 9)
+            c.drawString(izquierda, arriba - 10, "Historial de movimientos de materiales (continuación)")
+            y = arriba - 18
+
+        c.setFont(FUENTE_FILAS, 7.5)
+        c.drawRightString(derecha, doc.bottomMargin - 12, f"Página {numero}")
+        return y
+
+    @staticmethod
+    def _dibujar_encabezado_tabla(c, x, y):
+        """Fila de títulos de columna (se repite en cada página)"""
+        ancho_total = sum(ancho for _, ancho, _ in COLUMNAS_HISTORIAL)
+        c.setFillColor(colors.HexColor(COLOR_ENCABEZADO_TABLA))
+        c.rect(x, y - ALTO_ENCABEZADO_TABLA, ancho_total, ALTO_ENCABEZADO_TABLA, stroke=0, fill=1)
+        c.setFillColor(colors.whitesmoke)
+        c.setFont(FUENTE_ENCABEZADOS, TAMANO_FUENTE_FILAS)
+        base = y - ALTO_ENCABEZADO_TABLA + (ALTO_ENCABEZADO_TABLA - TAMANO_FUENTE_FILAS) / 2 + 1
+        for titulo, ancho, alineacion in COLUMNAS_HISTORIAL:
+            if alineacion == "derecha":
+                c.drawRightString(x + ancho - RELLENO_CELDA, base, titulo)
+            else:
+                c.drawString(x + RELLENO_CELDA, base, titulo)
+            x += ancho
+        return y - ALTO_ENCABEZADO_TABLA
+
+    @staticmethod
+    def _dibujar_filas(c, x, y, filas):
+        """Filas de alto fijo; retorna la Y debajo de la última"""
+        ancho_total = sum(ancho for _, ancho, _ in COLUMNAS_HISTORIAL)
+        alto = ALTO_FILA_HISTORIAL_PDF
+
+        # Fondo de las filas alternas y luego todo el texto en un solo objeto de texto
+        c.setFillColor(colors.HexColor(COLOR_FILA_ALTERNA))
+        for indice in range(1, len(filas), 2):
+            c.rect(x, y - alto * (indice + 1), ancho_total, alto, stroke=0, fill=1)
+
+        texto_pagina = c.beginText()
+        texto_pagina.setFont(FUENTE_FILAS, TAMANO_FUENTE_FILAS)
+        texto_pagina.setFillColor(colors.black)
+        for valores in filas:
+            base = y - alto + (alto - TAMANO_FUENTE_FILAS) / 2 + 1
+            columna_x = x
+            for valor, (_, ancho, alineacion) in zip(valores, COLUMNAS_HISTORIAL):
+                texto = _recortar(valor, ancho - 2 * RELLENO_CELDA)
+                if alineacion == "derecha":
+                    inicio = columna_x + ancho - RELLENO_CELDA - stringWidth(texto, FUENTE_FILAS, TAMANO_FUENTE_FILAS)
+                else:
+                    inicio = columna_x + RELLENO_CELDA
+                texto_pagina.setTextOrigin(inicio, base)
+                texto_pagina.textOut(texto)
+                columna_x += ancho
+            y -= alto
+        c.drawText(texto_pagina)
+
+        c.setStrokeColor(colors.grey)
+        c.setLineWidth(0.5)
+        c.line(x, y, x + ancho_total, y)
+        return y
+
+    # ===============================
+    # GENERACIÓN
+    # ===============================
+
+    @staticmethod
+    def generar(desde=None, hasta=None, con_encabezado=True, ruta=None):
+        """Genera el PDF con todos los movimientos (opcionalmente de un período)
+
+        Args:
+            desde, hasta: Límites de fecha (date o texto, inclusive); sin límites
+                          se incluyen también los movimientos sin fecha válida
+            con_encabezado: Encabezado y pie institucional en todas las páginas
+            ruta: Archivo de salida (por defecto en DIRECTORIO_REPORTES)
+
+        Returns:
+            str: Ruta del PDF generado, o None si hubo un error
+        """
+        if not PDF_DISPONIBLE:
+            print("❌ ReportLab no disponible")
+            return None
+
+        try:
+            # Volcar al Excel los movimientos pendientes del diario
+            ExcelManager.sincronizar_diario()
+            if not os.path.exists(ARCHIVO_EXCEL_MATERIALES):
+                print(f"❌ No se encontró el archivo: {ARCHIVO_EXCEL_MATERIALES}")
+                return None
+
+            if ruta is None:
+                asegurar_directorios()
+                ruta = os.path.join(DIRECTORIO_REPORTES,
+                                    f"historial_materiales_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf")
+
+            # Solo como geometría de página para EncabezadoPersonalizado (no se maqueta con platypus)
+            doc = SimpleDocTemplate(ruta, pagesize=letter, rightMargin=72, leftMargin=72,
+                                    topMargin=120 if con_encabezado else 72,
+                                    bottomMargin=100 if con_encabezado else 72)
+            encabezado = EncabezadoPersonalizado() if con_encabezado else None
+
+            periodo = "todo el historial"
+            if desde is not None or hasta is not None:
+                periodo = f"{fecha_iso(desde) or 'inicio'} a {fecha_iso(hasta) or 'hoy'}"
+            subtitulo = f"Período: {periodo} - Generado el {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
+
+            with Metricas.cronometro("plamph_pdf_segundos", reporte="historial"):
+                totales = HistorialPDF._escribir(ruta, doc, encabezado, subtitulo,
+                                                 HistorialPDF._movimientos(desde, hasta))
+
+            print(f"✅ Historial PDF generado: {ruta} ({totales['movimientos']} movimientos, "
+                  f"{totales['paginas']} páginas)")
+            return ruta
+
+        except Exception as e:
+            print(f"❌ Error generando historial PDF: {e}")
+            return None
+
+    @staticmethod
+    def _escribir(ruta, doc, encabezado, subtitulo, movimientos):
+        """Dibuja las páginas tomando de `movimientos` solo lo que entra en cada una"""
+        c = CanvasPaginasComprimidas(ruta, pagesize=letter)
+        c.setTitle("Historial de movimientos de materiales")
+        c.setAuthor("Planta Municipal de Premoldeados - Tupiza")
+
+        totales = {"movimientos": 0, "entradas": 0, "salidas": 0, "paginas": 0}
+        alto_resumen = 2 * ALTO_FILA_HISTORIAL_PDF
+        siguiente = next(movimientos, None)
+
+        while True:
+            totales["paginas"] += 1
+            y = HistorialPDF._iniciar_pagina(c, doc, totales["paginas"], subtitulo, encabezado)
+            y = HistorialPDF._dibujar_encabezado_tabla(c, doc.leftMargin, y)
+            capacidad = max(1, int((y - doc.bottomMargin) // ALTO_FILA_HISTORIAL_PDF))
+
+            # Solo las filas de esta página están en memoria
+            filas = []
+            while siguiente is not None and len(filas) < capacidad:
+                valores, direccion = _formatear(siguiente)
+                filas.append(valores)
+                totales["movimientos"] += 1
+                totales["entradas"] += direccion == DIRECCION_ENTRADA
+                totales["salidas"] += direccion == DIRECCION_SALIDA
+                siguiente = next(movimientos, None)
+            y = HistorialPDF._dibujar_filas(c, doc.leftMargin, y, filas)
+
+            if siguiente is None:
+                break
+            c.showPage()
+
+        if y - alto_resumen < doc.bottomMargin:
+            c.showPage()
+            totales["paginas"] += 1
+            y = HistorialPDF._iniciar_pagina(c, doc, totales["paginas"], subtitulo, encabezado)
+
+        c.setFillColor(colors.black)
+        c.setFont(FUENTE_ENCABEZADOS, 8.5)
+        if totales["movimientos"]:
+            resumen = (f"Total: {totales['movimientos']} movimientos "
+                       f"({totales['entradas']} entradas, {totales['salidas']} salidas)")
+        else:
+            resumen = "No hay movimientos en el período"
+        c.drawString(doc.leftMargin, y - alto_resumen + 4, resumen)
+
+        c.showPage()
+        c.save()
+        return totales
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🎨 modules/plantillas_graficas.py - PLANTILLAS DE GRÁFICAS REUTILIZABLES
+========================================================================
+
+Cada gráfica de barras del sistema (combustibles, cemento, stock) tiene
+una plantilla que se construye una sola vez por proceso con la API
+orientada a objetos de matplotlib (Figure + FigureCanvasAgg, sin pyplot):
+
+- Fijos (se crean una vez): figura, ejes, título, etiquetas de ejes,
+  cuadrícula, líneas de referencia, leyenda y el texto de la nota al pie.
+- Variables (se actualizan en cada gráfica): alturas y colores de las
+  barras, etiquetas del eje X, valores sobre las barras y texto de la nota.
+
+Si la cantidad de barras no cambia, las barras existentes solo cambian de
+altura; si cambia, se reemplazan. Como no se usa el estado global de
+pyplot, dos hilos pueden dibujar gráficas distintas al mismo tiempo; cada
+plantilla tiene su propio lock para que una misma gráfica no se dibuje
+dos veces a la vez.
+
+El ajuste de márgenes (equivalente a tight_layout) se aplica sin dejar un
+motor de diseño en la figura, así savefig rasteriza con un solo dibujo.
+"""
+
+import threading
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.patches import Patch
+from matplotlib.layout_engine import TightLayoutEngine
+
+SUBTITULO = "Planta Municipal de Premoldeados - Tupiza"
+
+# Colores del nivel de stock (gráfica de stock de materiales)
+COLOR_OPTIMO = '#2ECC71'
+COLOR_BAJO = '#F39C12'
+COLOR_CRITICO = '#E74C3C'
+
+
+class PlantillaBarras:
+    """Gráfica de barras con sus elementos fijos ya construidos"""
+
+    def __init__(self, titulo, figsize, xlabel=None, ylabel=None, rotacion=0, alineacion='center',
+                 tamano_valores=10, separacion_valores=0.02, lineas_referencia=(), leyenda=None):
+        """
+        Args:
+            titulo: Primera línea del título (se agrega SUBTITULO)
+            figsize: Tamaño de la figura en pulgadas
+            rotacion, alineacion: Rotación y alineación de las etiquetas del eje X
+            tamano_valores: Tamaño de letra de los valores sobre las barras
+            separacion_valores: Separación de esos valores (fracción del máximo)
+            lineas_referencia: [(y, color, etiqueta)] líneas horizontales fijas
+            leyenda: [(color, etiqueta)] leyenda fija de colores; si es None y
+                     hay líneas de referencia, la leyenda muestra esas líneas
+        """
+        self.figura = Figure(figsize=figsize)
+        FigureCanvasAgg(self.figura)
+        self.ejes = self.figura.add_subplot()
+        self.rotacion = rotacion
+        self.alineacion = alineacion
+        self.tamano_valores = tamano_valores
+        self.separacion_valores = separacion_valores
+        self.lock = threading.Lock()
+
+        self.ejes.set_title(f"{titulo}\n{SUBTITULO}", fontsize=14, fontweight='bold', pad=20)
+        if xlabel:
+            self.ejes.set_xlabel(xlabel, fontsize=12)
+        if ylabel:
+            self.ejes.set_ylabel(ylabel, fontsize=12)
+        self.ejes.grid(True, alpha=0.3, axis='y')
+
+        for y, color, etiqueta in lineas_referencia:
+            self.ejes.axhline(y=y, color=color, linestyle='--', alpha=0.7, label=etiqueta)
+        if leyenda:
+            self.ejes.legend(handles=[Patch(color=color, label=etiqueta) for color, etiqueta in leyenda],
+                             loc='upper right')
+        elif lineas_referencia:
+            self.ejes.legend()
+
+        self.nota = self.figura.text(0.02, 0.02, "", fontsize=10, style='italic')
+        self._diseno = TightLayoutEngine()
+        self.barras = None
+        self.valores = []
+
+    def _actualizar_barras(self, cantidades, colores):
+        if self.barras is not None and len(self.barras) == len(cantidades):
+            for barra, altura, color in zip(self.barras, cantidades, colores):
+                barra.set_height(altura)
+                barra.set_facecolor(color)
+        else:
+            if self.barras is not None:
+                self.barras.remove()
+            self.barras = self.ejes.bar(range(len(cantidades)), cantidades, color=colores,
+                                        alpha=0.8, edgecolor='black')
+
+    def _actualizar_valores(self, cantidades, textos):
+        maximo = max(cantidades) if cantidades else 0
+        while len(self.valores) < len(cantidades):
+            self.valores.append(self.ejes.text(0, 0, "", ha='center', va='bottom',
+                                               fontweight='bold', fontsize=self.tamano_valores))
+        for i, texto in enumerate(self.valores):
+            if i < len(cantidades) and textos[i]:
+                barra = self.barras[i]
+                texto.set_position((barra.get_x() + barra.get_width() / 2,
+                                    barra.get_height() + maximo * self.separacion_valores))
+                texto.set_text(textos[i])
+                texto.set_visible(True)
+            else:
+                texto.set_visible(False)
+
+    def dibujar(self, etiquetas, cantidades, colores, textos, nota=""):
+        """Actualiza los elementos variables con los datos de esta gráfica
+
+        Args:
+            etiquetas: Etiqueta del eje X de cada barra
+            cantidades: Altura de cada barra
+            colores: Un color por barra
+            textos: Texto sobre cada barra ("" o None para no mostrarlo)
+            nota: Texto de la nota al pie
+        """
+        self._actualizar_barras(cantidades, colores)
+        self.ejes.set_xticks(range(len(etiquetas)))
+        self.ejes.set_xticklabels(etiquetas, rotation=self.rotacion, ha=self.alineacion)
+        self.ejes.relim()
+        self.ejes.autoscale_view()
+        self._actualizar_valores(cantidades, textos)
+        self.nota.set_text(nota)
+        # Mismo ajuste que tight_layout(), pero sin dejar un motor de diseño en la
+        # figura: así savefig no hace un dibujo previo extra antes de rasterizar
+        self._diseno.execute(self.figura)
+
+    def guardar(self, destino, **opciones):
+        """Rasteriza la figura (opciones de Figure.savefig)"""
+        self.figura.savefig(destino, facecolor='white', **opciones)
+
+
+# Definición de cada plantilla (se construye en el primer uso)
+DEFINICIONES = {
+    "combustibles": lambda: PlantillaBarras(
+        "⛽ STOCK ACTUAL DE COMBUSTIBLES", (10, 6), ylabel='Cantidad (Litros)', tamano_valores=12,
+        lineas_referencia=[(100, 'orange', 'Nivel mínimo (100L)'), (200, 'green', 'Nivel óptimo (200L)')]
+    ),
+    "cemento": lambda: PlantillaBarras(
+        "🏗️ CONSUMO DIARIO DE CEMENTO", (12, 6), xlabel='Fecha', ylabel='Bolsas Consumidas', rotacion=45
+    ),
+    "stock_materiales": lambda: PlantillaBarras(
+        "📦 STOCK ACTUAL DE MATERIALES", (14, 8), xlabel='Material', ylabel='Cantidad',
+        rotacion=45, alineacion='right', tamano_valores=9, separacion_valores=0.01,
+        leyenda=[(COLOR_OPTIMO, 'Óptimo (>50)'), (COLOR_BAJO, 'Bajo (10-50)'), (COLOR_CRITICO, 'Crítico (<10)')]
+    ),
+}
+
+
+class PlantillasGraficas:
+    """Plantillas construidas en este proceso, una por tipo de gráfica"""
+
+    _plantillas = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def obtener(tipo):
+        """Retorna la plantilla del tipo, construyéndola la primera vez"""
+        with PlantillasGraficas._lock:
+            plantilla = PlantillasGraficas._plantillas.get(tipo)
+            if plantilla is None:
+                plantilla = PlantillasGraficas._plantillas[tipo] = DEFINICIONES[tipo]()
+            return plantilla
+
+    @staticmethod
+    def descartar():
+        """Libera todas las plantillas (se vuelven a construir al usarlas)"""
+        with PlantillasGraficas._lock:
+            PlantillasGraficas._plantillas.clear()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🖌️ modules/prerender_graficas.py - PRE-DIBUJO DE GRÁFICAS EN SEGUNDO PLANO
+=========================================================================
+
+Los supervisores piden una y otra vez las mismas gráficas del menú
+(stock, combustibles, cemento). Cada vez que se registra un movimiento con
+ExcelManager.guardar_material, este programador espera RETARDO_PRERENDER_GRAFICAS
+segundos sin movimientos nuevos y dibuja esas gráficas en la caché
+(CacheGraficas). Cuando alguien presiona el botón, obtener() entrega la
+ruta de la gráfica ya dibujada sin volver a leer el Excel ni pasar por el
+grupo de procesos, siempre que no haya movimientos nuevos ni cambios en
+el archivo Excel desde que se dibujó.
+
+Corre en el bucle asyncio del bot y dibuja con la misma función que usan
+los handlers (normalmente generar_en_proceso, en el grupo de procesos),
+una gráfica a la vez. Si el ejecutor está ocupado con pedidos de los
+operadores, el pre-dibujo se posterga.
+"""
+
+import os
+import asyncio
+import itertools
+
+from .config import RETARDO_PRERENDER_GRAFICAS, ARCHIVO_EXCEL_MATERIALES, ARCHIVO_DIARIO_MATERIALES
+from .carga_diferida import MetodoDiferido
+from .ejecutor_tareas import EjecutorOcupado
+from .metricas import Metricas
+
+# Gráficas de los botones del menú y perfil con que las envía el bot
+GRAFICAS_PRERENDER = [
+    "generar_grafica_stock_materiales",
+    "generar_grafica_combustibles",
+    "generar_grafica_cemento",
+]
+PERFIL_PRERENDER = "telegram"
+
+
+def _estado_archivo(archivo):
+    """(fecha de modificación, tamaño) del archivo, o None si no existe"""
+    try:
+        info = os.stat(archivo)
+        return (info.st_mtime_ns, info.st_size)
+    except OSError:
+        return None
+
+
+class PrerenderGraficas:
+    """Programa el pre-dibujo de las gráficas del menú tras cambios en los datos"""
+
+    def __init__(self, lanzar, retardo=RETARDO_PRERENDER_GRAFICAS):
+        """
+        Args:
+            lanzar: Corrutina lanzar(funcion, perfil) que genera una gráfica
+            retardo: Segundos sin movimientos nuevos antes de dibujar
+        """
+        self._lanzar = lanzar
+        self._retardo = retardo
+        self._bucle = None
+        self._temporizador = None
+        self._tarea = None
+        self._repetir = False
+        self._contador = itertools.count(1)
+        self._version = 0
+        self._listas = {}  # nombre de la gráfica -> (firma de los datos, ruta)
+
+    def iniciar(self):
+        """Se llama desde el bucle del bot; programa un primer pre-dibujo"""
+        self._bucle = asyncio.get_running_loop()
+        self._reprogramar()
+
+    def notificar(self):
+        """Avisa que hay un movimiento nuevo (se puede llamar desde cualquier hilo)"""
+        self._version = next(self._contador)
+        bucle = self._bucle
+        if bucle is None or bucle.is_closed():
+            return
+        bucle.call_soon_threadsafe(self._reprogramar)
+
+    def obtener(self, nombre):
+        """Ruta de la gráfica pre-dibujada si los datos no cambiaron desde entonces, o None"""
+        lista = self._listas.get(nombre)
+        if lista and lista[0] == self._firma() and os.path.exists(lista[1]):
+            Metricas.incrementar("plamph_prerender_total", grafica=nombre, resultado="servida")
+            return lista[1]
+        return None
+
+    def detener(self):
+        """Cancela el pre-dibujo programado o en curso"""
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        if self._tarea is not None and not self._tarea.done():
+            self._tarea.cancel()
+        self._bucle = None
+
+    # ===============================
+    # EJECUCIÓN (en el bucle del bot)
+    # ===============================
+
+    def _firma(self):
+        """Versión de los datos: movimientos notificados y estado del Excel y del diario
+
+        El diario cuenta aunque el Excel no cambie: otro proceso (la consola,
+        un script de importación) puede registrar movimientos sin exportarlos.
+        """
+        return (self._version, _estado_archivo(ARCHIVO_EXCEL_MATERIALES),
+                _estado_archivo(ARCHIVO_DIARIO_MATERIALES))
+
+    def _reprogramar(self):
+        if self._bucle is None:
+            return
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+        self._temporizador = self._bucle.call_later(self._retardo, self._disparar)
+
+    def _disparar(self):
+        self._temporizador = None
+        if self._tarea is not None and not self._tarea.done():
+            self._repetir = True  # Llegaron datos nuevos mientras se dibujaba
+            return
+        self._tarea = self._bucle.create_task(self._prerender())
+
+    async def _prerender(self):
+        while True:
+            self._repetir = False
+            for nombre in GRAFICAS_PRERENDER:
+                version = self._version
+                try:
+                    # Por nombre: matplotlib se importa solo en el proceso trabajador
+                    grafica = MetodoDiferido(f"{__package__}.graphics_generator", "GraphicsGenerator", nombre)
+                    ruta = await self._lanzar(grafica, PERFIL_PRERENDER)
+                    # lanzar exporta el diario al Excel: la firma se toma después
+                    if ruta and version == self._version:
+                        self._listas[nombre] = (self._firma(), ruta)
+                    Metricas.incrementar("plamph_prerender_total", grafica=nombre, resultado="ok")
+                except EjecutorOcupado:
+                    # Los pedidos de los operadores tienen prioridad: se intenta más tarde
+                    Metricas.incrementar("plamph_prerender_total", grafica=nombre, resultado="postergada")
+                    self._reprogramar()
+                    return
+                except Exception as e:
+                    Metricas.incrementar("plamph_prerender_total", grafica=nombre, resultado="error")
+                    print(f"⚠️ Pre-dibujo de {nombre} no completado: {e}")
+            if not self._repetir:
+                break
+        print("🖌️ Gráficas del menú pre-dibujadas")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧮 modules/tabla_movimientos.py - TABLA COLUMNAR DE MOVIMIENTOS (NUMPY)
+======================================================================
+
+Representa los movimientos del Excel como columnas NumPy:
+
+- fechas: datetime64[D] (NaT si la fecha no se puede interpretar)
+- codigos: código entero de material (categoría interna)
+- cantidades: cantidad con signo (+ entrada, - salida, 0 otros)
+- direcciones: +1 entrada, -1 salida, 0 otro tipo de movimiento
+- filas: número de fila en el Excel (para la traza por fila)
+- categorias: material reconocido de cada código (modules/clasificacion.py)
+
+El texto de cada material, tipo de movimiento y fecha distinto se
+interpreta una sola vez al construir la tabla. Stock, saldos de
+combustibles y consumo diario son después agrupaciones vectorizadas
+(bincount / unique) en lugar de bucles por fila.
+"""
+
+from datetime import datetime, date
+
+import numpy as np
+
+from .config import ARCHIVO_EXCEL_MATERIALES
+from .cache_movimientos import CacheMovimientos
+from .clasificacion import clasificar_movimiento, id_material
+from .lector_movimientos import clave_dia, SIN_FECHA
+
+
+def _dia(valor):
+    """Convierte el valor de la celda Fecha a datetime64[D] (NaT si no se puede)"""
+    dia = clave_dia(valor)
+    return np.datetime64("NaT" if dia == SIN_FECHA else dia, "D")
+
+
+class MovimientosTable:
+    """Movimientos de materiales en columnas NumPy"""
+
+    # Última tabla construida desde la caché: (lista de movimientos, tabla)
+    _ultima = (None, None)
+
+    def __init__(self, movimientos):
+        materiales = {}   # nombre -> código
+        tipos = {}        # texto del tipo -> (dirección, consumo)
+        dias = {}         # valor de fecha -> datetime64[D]
+
+        codigos, cantidades, direcciones, consumos, fechas, filas = [], [], [], [], [], []
+
+        for mov in movimientos:
+            # Mismo filtro que los cálculos originales: material, tipo y cantidad
+            if not (mov.material and mov.tipo and mov.cantidad):
+                continue
+
+            nombre = mov.material.strip()
+            codigo = materiales.get(nombre)
+            if codigo is None:
+                codigo = materiales[nombre] = len(materiales)
+
+            clasificacion = tipos.get(mov.tipo)
+            if clasificacion is None:
+                clasificacion = tipos[mov.tipo] = clasificar_movimiento(mov.tipo)
+
+            clave_fecha = mov.fecha if isinstance(mov.fecha, (datetime, date)) else str(mov.fecha or "")
+            dia = dias.get(clave_fecha)
+            if dia is None:
+                dia = dias[clave_fecha] = _dia(mov.fecha)
+
+            codigos.append(codigo)
+            cantidades.append(mov.cantidad)
+            direcciones.append(clasificacion[0])
+            consumos.append(clasificacion[1])
+            fechas.append(dia)
+            filas.append(mov.fila)
+
+        self.materiales = list(materiales)
+        # Material reconocido (clasificacion.id_material) de cada código de material
+        self.categorias = np.array([id_material(nombre) for nombre in self.materiales], dtype=np.int32)
+        self.codigos = np.array(codigos, dtype=np.int32)
+        self.direcciones = np.array(direcciones, dtype=np.int8)
+        self.cantidades_brutas = np.array(cantidades, dtype=np.float64)
+        self.cantidades = self.cantidades_brutas * self.direcciones
+        self.consumo = np.array(consumos, dtype=bool)
+        self.fechas = np.array(fechas, dtype="datetime64[D]")
+        self.filas = np.array(filas, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.codigos)
+
+    @staticmethod
+    def desde_excel(archivo=ARCHIVO_EXCEL_MATERIALES):
+        """Construye (o reutiliza) la tabla para la versión actual del Excel"""
+        movimientos = CacheMovimientos.obtener_movimientos(archivo)
+        lista, tabla = MovimientosTable._ultima
+        if lista is not movimientos:
+            tabla = MovimientosTable(movimientos)
+            MovimientosTable._ultima = (movimientos, tabla)
+        return tabla
+
+    # ===============================
+    # CONSULTAS VECTORIZADAS
+    # ===============================
+
+    def codigos_material(self, predicado):
+        """Códigos de los materiales cuyo nombre cumple el predicado (una vez por material)"""
+        return np.array([codigo for codigo, nombre in enumerate(self.materiales) if predicado(nombre)],
+                        dtype=np.int32)
+
+    def codigos_categoria(self, categoria):
+        """Códigos de los materiales reconocidos como la categoría (p. ej. MATERIAL_CEMENTO)"""
+        return np.flatnonzero(self.categorias == categoria).astype(np.int32)
+
+    def _por_material(self, pesos):
+        return np.bincount(self.codigos, weights=pesos, minlength=len(self.materiales))
+
+    def stock(self):
+        """Saldo por material: {nombre: entradas - salidas}"""
+        saldos = self._por_material(self.cantidades)
+        return {nombre: float(saldos[codigo]) for codigo, nombre in enumerate(self.materiales)}
+
+    def saldo(self, codigos):
+        """Saldo total (entradas - salidas) de un grupo de materiales"""
+        if len(codigos) == 0:
+            return 0.0
+        return float(self.cantidades[np.isin(self.codigos, codigos)].sum())
+
+    def indices(self, codigos, solo_consumo=False):
+        """Posiciones (en orden) de los movimientos de un grupo de materiales"""
+        mascara = np.isin(self.codigos, codigos)
+        if solo_consumo:
+            mascara &= self.consumo
+        return np.flatnonzero(mascara)
+
+    def consumo_diario(self, codigos):
+        """Consumo por día de un grupo de materiales, en orden cronológico
+
+        Returns:
+            dict: {"dd/mm": cantidad}; los movimientos sin fecha válida van
+            al final con la etiqueta "S/F"
+        """
+        mascara = self.consumo & np.isin(self.codigos, codigos)
+        if not mascara.any():
+            return {}
+
+        dias, inverso = np.unique(self.fechas[mascara], return_inverse=True)
+        totales = np.bincount(inverso, weights=self.cantidades_brutas[mascara])
+
+        consumo = {}
+        for dia, total in zip(dias, totales):
+            if np.isnat(dia):
+                etiqueta = "S/F"
+            else:
+                etiqueta = dia.astype(datetime).strftime("%d/%m")
+            consumo[etiqueta] = consumo.get(etiqueta, 0) + float(total)
+        return consumo
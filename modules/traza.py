@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔍 modules/traza.py - TRAZA ESTRUCTURADA DE LA EXTRACCIÓN DE DATOS
+=================================================================
+
+Reemplaza los print() de diagnóstico de las funciones que extraen datos
+del Excel (combustibles, cemento). La traza está apagada por defecto y se
+enciende solo para una consulta:
+
+    with Traza.capturar(NIVEL_FILA) as captura:
+        GraphicsGenerator.obtener_datos_cemento()
+    for evento in captura.eventos:
+        print(Traza.formatear(evento))
+
+Niveles:
+- NIVEL_RESUMEN: un evento por consulta (movimientos leídos, totales)
+- NIVEL_FILA: además, un evento por cada fila del Excel que suma al resultado
+
+Sin captura activa, evento() retorna en la primera comparación y los
+bucles por fila ni siquiera se recorren (se preguntan antes con activa()).
+Los eventos se guardan en un búfer circular de MAX_EVENTOS_TRAZA: si hay
+más, se conservan los últimos y se cuentan los descartados.
+
+La captura es por contexto (contextvars): otras consultas que corren al
+mismo tiempo en otros hilos no se trazan.
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .config import MAX_EVENTOS_TRAZA
+
+NIVEL_APAGADO = 0
+NIVEL_RESUMEN = 1
+NIVEL_FILA = 2
+
+_captura_actual = ContextVar("captura_traza", default=None)
+
+
+class CapturaTraza:
+    """Eventos de traza de una consulta (búfer circular acotado)"""
+
+    def __init__(self, nivel, maximo=MAX_EVENTOS_TRAZA):
+        self.nivel = nivel
+        self.eventos = deque(maxlen=maximo)
+        self.descartados = 0
+
+    def agregar(self, evento):
+        if len(self.eventos) == self.eventos.maxlen:
+            self.descartados += 1
+        self.eventos.append(evento)
+
+
+class Traza:
+    """Traza estructurada por niveles, activada por consulta"""
+
+    @staticmethod
+    def activa(nivel):
+        """Indica si hay una captura activa que registre este nivel"""
+        captura = _captura_actual.get()
+        return captura is not None and captura.nivel >= nivel
+
+    @staticmethod
+    def evento(nivel, nombre, **campos):
+        """Registra un evento si hay una captura activa de ese nivel"""
+        captura = _captura_actual.get()
+        if captura is None or captura.nivel < nivel:
+            return
+        campos["evento"] = nombre
+        campos["hora"] = time.time()
+        captura.agregar(campos)
+
+    @staticmethod
+    @contextmanager
+    def capturar(nivel=NIVEL_FILA, maximo=MAX_EVENTOS_TRAZA):
+        """Activa la traza dentro del bloque y entrega la CapturaTraza"""
+        captura = CapturaTraza(nivel, maximo)
+        token = _captura_actual.set(captura)
+        try:
+            yield captura
+        finally:
+            _captura_actual.reset(token)
+
+    @staticmethod
+    def formatear(evento):
+        """Una línea legible: 'evento clave=valor ...'"""
+        campos = " ".join(f"{clave}={valor}" for clave, valor in evento.items()
+                          if clave not in ("evento", "hora"))
+        return f"{evento['evento']} {campos}".rstrip()
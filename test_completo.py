@@ -242,46 +242,18 @@ def probar_sistema_completo():
     return errores
 
 def probar_rendimiento():
-    """Prueba el rendimiento del sistema con datos múltiples"""
+    """Prueba el rendimiento del sistema con datos sintéticos (carpeta temporal)
+    
+    Usa benchmark.py con un inventario pequeño; no escribe en el Excel de
+    producción. Para la medición completa: python benchmark.py
+    """
     print("\n⚡ === PRUEBA DE RENDIMIENTO ===")
     
     try:
-        from modules.excel_manager import ExcelManager
-        from modules.graphics_generator import GraphicsGenerator
-        
-        # Generar múltiples registros
-        fecha = datetime.now().strftime("%d/%m/%Y")
-        hora = datetime.now().strftime("%H:%M:%S")
-        
-        print("📊 Generando 50 registros de prueba...")
-        inicio = datetime.now()
-        
-        for i in range(50):
-            material = f"Material_{i%5}"  # 5 tipos diferentes
-            cantidad = 10.0 + (i % 100)
-            tipo = "📈 Entrada" if i % 2 == 0 else "📉 Salida"
-            
-            ExcelManager.guardar_material(
-                fecha, hora, material, "Proveedor Test", tipo, cantidad, f"Registro {i}"
-            )
-        
-        fin = datetime.now()
-        duracion = (fin - inicio).total_seconds()
-        
-        print(f"   ✅ 50 registros en {duracion:.2f} segundos")
-        print(f"   📈 Velocidad: {50/duracion:.1f} registros/segundo")
-        
-        # Probar cálculo de stock con muchos datos
-        print("📊 Calculando stock con datos múltiples...")
-        inicio = datetime.now()
-        stock = ExcelManager.obtener_stock_materiales()
-        fin = datetime.now()
-        duracion = (fin - inicio).total_seconds()
-        
-        print(f"   ✅ Stock calculado en {duracion:.3f} segundos")
-        print(f"   📦 {len(stock)} tipos de materiales procesados")
+        from benchmark import ejecutar_benchmark
         
-        return True
+        informe = ejecutar_benchmark(tamanos=[1000], repeticiones=1, archivo_salida=None)
+        return not informe["regresiones"]
         
     except Exception as e:
         print(f"   ❌ Error en prueba de rendimiento: {e}")